@@ -12,7 +12,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import blueprints
-from rapid_eld import eld_blueprint
+from rapid_eld import eld_blueprint, metrics_view
 
 def create_app():
     """Application factory pattern"""
@@ -34,6 +34,9 @@ def create_app():
     # Register blueprints
     app.register_blueprint(eld_blueprint)
     
+    # Prometheus metrics for the sync and compliance pipeline
+    app.add_url_rule('/metrics', 'eld_metrics', metrics_view)
+    
     # Health check endpoint
     @app.route('/health')
     def health_check():
@@ -16,10 +16,61 @@ class Config:
     GEOTAB_API_KEY = os.environ.get('GEOTAB_API_KEY')
     GEOTAB_USERNAME = os.environ.get('GEOTAB_USERNAME')
     GEOTAB_DATABASE = os.environ.get('GEOTAB_DATABASE')
+    GEOTAB_SYNC_MODE = os.environ.get('GEOTAB_SYNC_MODE', 'window')  # 'window' or 'feed'
+    GEOTAB_FEED_RESULTS_LIMIT = int(os.environ.get('GEOTAB_FEED_RESULTS_LIMIT', '5000'))
+    
+    # Geotab call resilience: per-credential rate limit, retries and circuit breaker
+    GEOTAB_RATE_LIMIT = float(os.environ.get('GEOTAB_RATE_LIMIT', '10'))
+    GEOTAB_RATE_BURST = float(os.environ.get('GEOTAB_RATE_BURST', '10'))
+    GEOTAB_MAX_ATTEMPTS = int(os.environ.get('GEOTAB_MAX_ATTEMPTS', '5'))
+    GEOTAB_RETRY_BUDGET = float(os.environ.get('GEOTAB_RETRY_BUDGET', '0.2'))
+    GEOTAB_BREAKER_THRESHOLD = int(os.environ.get('GEOTAB_BREAKER_THRESHOLD', '5'))
+    GEOTAB_BREAKER_RESET = float(os.environ.get('GEOTAB_BREAKER_RESET', '30'))
+    
+    # HOS status cache lifetime in seconds
+    HOS_STATUS_CACHE_TTL = float(os.environ.get('HOS_STATUS_CACHE_TTL', '15'))
+    
+    # Parallel HOS violation checks: 'inline', 'process' or 'celery'
+    HOS_CHECK_EXECUTOR = os.environ.get('HOS_CHECK_EXECUTOR', 'inline')
+    HOS_CHECK_WORKERS = int(os.environ.get('HOS_CHECK_WORKERS', '0'))
+    HOS_CHECK_CHUNK_SIZE = int(os.environ.get('HOS_CHECK_CHUNK_SIZE', '500'))
+    
+    # Alert coalescing window (seconds) and retention
+    ALERT_COALESCE_WINDOW = float(os.environ.get('ALERT_COALESCE_WINDOW', str(4 * 3600)))
+    ALERT_RESOLVE_AFTER_HOURS = float(os.environ.get('ALERT_RESOLVE_AFTER_HOURS', '24'))
+    ALERT_RETENTION_DAYS = float(os.environ.get('ALERT_RETENTION_DAYS', '30'))
+    
+    # Monthly HOS log partitions, online retention and cold archive
+    HOS_PARTITIONED = os.environ.get('HOS_PARTITIONED', 'false').lower() == 'true'
+    HOS_RETENTION_MONTHS = int(os.environ.get('HOS_RETENTION_MONTHS', '6'))
+    HOS_ARCHIVE_DIR = os.environ.get('HOS_ARCHIVE_DIR', 'hos_archive')
+    
+    # Live event stream (server-sent events)
+    ELD_EVENT_POLL_INTERVAL = float(os.environ.get('ELD_EVENT_POLL_INTERVAL', '2'))
+    SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', '15'))
+    
+    # Duty timeline reload interval for roadside reports, in seconds
+    DUTY_TIMELINE_TTL = float(os.environ.get('DUTY_TIMELINE_TTL', '60'))
+    
+    # In-memory store journal for warm restarts (unset: no journal)
+    ELD_JOURNAL_DIR = os.environ.get('ELD_JOURNAL_DIR')
+    ELD_JOURNAL_SNAPSHOT_BYTES = int(os.environ.get('ELD_JOURNAL_SNAPSHOT_BYTES', str(256 * 1024 * 1024)))
+    
+    # Pipeline metrics, shared snapshot directory (unset: this process only) and spans ('', 'log', 'otel')
+    ELD_METRICS = os.environ.get('ELD_METRICS', 'true').lower() == 'true'
+    ELD_METRICS_DIR = os.environ.get('ELD_METRICS_DIR')
+    ELD_TRACING = os.environ.get('ELD_TRACING', '')
+    
+    # Fleet dashboard: hours left at or below which a driver is near a limit
+    FLEET_NEAR_LIMIT_HOURS = float(os.environ.get('FLEET_NEAR_LIMIT_HOURS', '1'))
     
     # Database Configuration
     DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///eld_portal.db')
     
+    # Multi-tenant stores: company header and company -> SQLALCHEMY_BINDS key (JSON)
+    ELD_COMPANY_HEADER = os.environ.get('ELD_COMPANY_HEADER', 'X-Company-ID')
+    ELD_TENANT_BINDS = os.environ.get('ELD_TENANT_BINDS', '{}')
+    
     # Celery Configuration
     CELERY_BROKER_URL = REDIS_URL
     CELERY_RESULT_BACKEND = REDIS_URL
@@ -0,0 +1,311 @@
+"""
+Duty Status Timeline and Roadside Inspection Reports
+Per-driver timelines of merged duty periods, and the record of duty status
+(RODS) report an officer asks for at the roadside: the current day and the
+previous 7 days.
+
+A driver's timeline is seeded from the data store with one query the first
+time it is read. After that, ELDService.track_hos_ingest applies new and
+edited logs to it incrementally. Consecutive logs with the same duty status
+are merged into one period, so a report only slices the few periods in its
+window. Rendered reports are cached by (driver, timeline revision, minute).
+
+Days and grid columns are in UTC, like all stored ELD timestamps.
+"""
+
+import os
+import csv
+import io
+import time
+import threading
+import weakref
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from itertools import count
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+from hos_rules import (
+    DRIVING, HOS_LOOKBACK, OFF_DUTY, ON_DUTY, SLEEPER_BERTH, from_epoch_seconds, status_code,
+    to_epoch_seconds,
+)
+
+# Seconds before a driver's timeline is reloaded from the store, to pick up
+# logs written by other processes
+DUTY_TIMELINE_TTL = float(os.environ.get("DUTY_TIMELINE_TTL", "60"))
+
+REPORT_DAYS = 8
+GRID_SLOT = 15 * 60
+DAY = 24 * 3600
+GRID_SLOTS = DAY // GRID_SLOT
+REPORT_CACHE_SIZE = 1024
+
+# RODS grid rows, top to bottom
+GRID_ROWS = (
+    (OFF_DUTY, 'off_duty', 'OFF'),
+    (SLEEPER_BERTH, 'sleeper_berth', 'SB'),
+    (DRIVING, 'driving', 'D'),
+    (ON_DUTY, 'on_duty', 'ON'),
+)
+_STATUS_NAMES = {code: name for code, name, _ in GRID_ROWS}
+
+_sequence = count()
+_revisions = count(1)
+
+class DriverTimeline:
+    """
+    One driver's duty status changes and the merged periods they form.
+
+    `points` are (start epoch seconds, sequence) keys in time order, with the
+    duty status code of each in `statuses`. A point starts a period when its
+    status differs from the previous point's; those points are kept in
+    `period_points`/`period_statuses` and updated locally on every insert or
+    removal. Each period lasts until the next one starts (the last is open).
+    """
+
+    def __init__(self, driver_id: str):
+        self.driver_id = driver_id
+        self.points: List[Tuple[float, int]] = []
+        self.statuses: List[int] = []
+        self.period_points: List[Tuple[float, int]] = []
+        self.period_statuses: List[int] = []
+        # source_id -> (point, source_version)
+        self._by_source: Dict[Any, Tuple[Tuple[float, int], Any]] = {}
+        self._point_sources: Dict[Tuple[float, int], Any] = {}
+        self.revision = next(_revisions)
+        self.loaded_at = time.monotonic()
+
+    def apply(self, log: Dict[str, Any]) -> bool:
+        """Add a log, or move/replace the point of an edited one; returns True if changed"""
+        start = to_epoch_seconds(log.get('start_time'))
+        if start is None:
+            return False
+        source_id = log.get('source_id')
+        version = log.get('source_version')
+        if source_id is not None:
+            stored = self._by_source.get(source_id)
+            if stored is not None:
+                if stored[1] == version:
+                    return False
+                self._remove(stored[0])
+        point = (start, next(_sequence))
+        self._insert(point, status_code(log.get('log_type')))
+        if source_id is not None:
+            self._by_source[source_id] = (point, version)
+            self._point_sources[point] = source_id
+        self.revision = next(_revisions)
+        return True
+
+    def _insert(self, point: Tuple[float, int], status: int):
+        i = bisect_left(self.points, point)
+        self.points.insert(i, point)
+        self.statuses.insert(i, status)
+        self._refresh_period(i)
+        self._refresh_period(i + 1)
+
+    def _remove(self, point: Tuple[float, int]):
+        i = bisect_left(self.points, point)
+        del self.points[i]
+        del self.statuses[i]
+        j = bisect_left(self.period_points, point)
+        if j < len(self.period_points) and self.period_points[j] == point:
+            del self.period_points[j]
+            del self.period_statuses[j]
+        self._refresh_period(i)
+        source_id = self._point_sources.pop(point, None)
+        if source_id is not None:
+            del self._by_source[source_id]
+
+    def _refresh_period(self, i: int):
+        """Make period membership of points[i] match its status and its predecessor's"""
+        if i >= len(self.points):
+            return
+        point = self.points[i]
+        starts_period = i == 0 or self.statuses[i] != self.statuses[i - 1]
+        j = bisect_left(self.period_points, point)
+        present = j < len(self.period_points) and self.period_points[j] == point
+        if starts_period and present:
+            self.period_statuses[j] = self.statuses[i]
+        elif starts_period:
+            self.period_points.insert(j, point)
+            self.period_statuses.insert(j, self.statuses[i])
+        elif present:
+            del self.period_points[j]
+            del self.period_statuses[j]
+
+    def prune(self, before: float):
+        """Drop changes older than `before`, keeping the one in effect at `before`"""
+        keep_from = bisect_right(self.points, (before, -1)) - 1
+        if keep_from <= 0:
+            return
+        for point in self.points[:keep_from]:
+            source_id = self._point_sources.pop(point, None)
+            if source_id is not None:
+                del self._by_source[source_id]
+        del self.points[:keep_from]
+        del self.statuses[:keep_from]
+        drop = bisect_left(self.period_points, self.points[0])
+        del self.period_points[:drop]
+        del self.period_statuses[:drop]
+        self._refresh_period(0)
+
+    def periods(self, start: float, end: float) -> List[Tuple[float, float, int]]:
+        """Merged (start, end, status) periods clipped to [start, end)"""
+        first = max(bisect_right(self.period_points, (start, float('inf'))) - 1, 0)
+        last = bisect_left(self.period_points, (end, -1))
+        periods = []
+        for j in range(first, last):
+            period_start = max(self.period_points[j][0], start)
+            period_end = self.period_points[j + 1][0] if j + 1 < len(self.period_points) else end
+            period_end = min(period_end, end)
+            if period_end > period_start:
+                periods.append((period_start, period_end, self.period_statuses[j]))
+        return periods
+
+class DutyTimeline:
+    """
+    Duty status timelines of the drivers of one data store.
+
+    Args:
+        data_store: Store the timelines are seeded from.
+        ttl (float): Seconds before a timeline is reloaded from the store.
+    """
+
+    def __init__(self, data_store, ttl: float = DUTY_TIMELINE_TTL):
+        self.data_store = data_store
+        self.ttl = ttl
+        self._drivers: Dict[str, DriverTimeline] = {}
+        self._reports: 'OrderedDict[Tuple[str, int, int], Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.RLock()
+
+    def driver(self, driver_id: str, now: Optional[datetime] = None) -> DriverTimeline:
+        """A driver's timeline, loaded from the store if missing or older than the TTL"""
+        with self._lock:
+            timeline = self._drivers.get(driver_id)
+            if timeline is not None and time.monotonic() - timeline.loaded_at < self.ttl:
+                return timeline
+            now = now or datetime.utcnow()
+            timeline = DriverTimeline(driver_id)
+            for log in self.data_store.get_hos_logs(driver_id, now - HOS_LOOKBACK, now):
+                timeline.apply(log)
+            self._drivers[driver_id] = timeline
+            return timeline
+
+    def apply(self, logs: Iterable[Dict[str, Any]]):
+        """Apply newly stored logs to the timelines already loaded"""
+        by_driver: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for log in logs:
+            by_driver[log.get('driver_id')].append(log)
+        with self._lock:
+            for driver_id, driver_logs in by_driver.items():
+                timeline = self._drivers.get(driver_id)
+                if timeline is None:
+                    continue
+                for log in driver_logs:
+                    timeline.apply(log)
+                if timeline.points:
+                    timeline.prune(timeline.points[-1][0] - HOS_LOOKBACK.total_seconds())
+
+    def invalidate(self, driver_ids: Optional[Iterable[str]] = None):
+        """Drop timelines (all of them by default) so they are reloaded on next use"""
+        with self._lock:
+            if driver_ids is None:
+                self._drivers.clear()
+            else:
+                for driver_id in driver_ids:
+                    self._drivers.pop(driver_id, None)
+
+    def roadside_report(self, driver_id: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """RODS report for the current day and the previous 7, cached per timeline revision"""
+        now = now or datetime.utcnow()
+        now_s = to_epoch_seconds(now)
+        with self._lock:
+            timeline = self.driver(driver_id, now)
+            key = (driver_id, timeline.revision, int(now_s // 60))
+            report = self._reports.get(key)
+            if report is not None:
+                self._reports.move_to_end(key)
+                return report
+            report = render_roadside_report(driver_id, timeline, now_s)
+            self._reports[key] = report
+            if len(self._reports) > REPORT_CACHE_SIZE:
+                self._reports.popitem(last=False)
+            return report
+
+def render_roadside_report(driver_id: str, timeline: DriverTimeline, now: float) -> Dict[str, Any]:
+    """
+    Render a RODS report as of `now` (epoch seconds): per-day 15-minute grids
+    and hour totals, the duty periods, and the same periods as CSV.
+    """
+    today = now - now % DAY
+    window_start = today - (REPORT_DAYS - 1) * DAY
+    periods = timeline.periods(window_start, now)
+
+    days = []
+    for day_start in range(int(window_start), int(today) + 1, DAY):
+        day_end = min(day_start + DAY, now)
+        grid = {code: [' '] * GRID_SLOTS for code, _, _ in GRID_ROWS}
+        totals = dict.fromkeys(_STATUS_NAMES, 0.0)
+        for start, end, status in periods:
+            start, end = max(start, day_start), min(end, day_end)
+            if end <= start:
+                continue
+            totals[status] += end - start
+            first = int((start - day_start) // GRID_SLOT)
+            last = int(-(-(end - day_start) // GRID_SLOT))
+            row = grid[status]
+            row[first:last] = '#' * (last - first)
+        days.append({
+            "date": from_epoch_seconds(day_start).date().isoformat(),
+            "totals": {_STATUS_NAMES[code]: round(seconds / 3600, 2) for code, seconds in totals.items()},
+            "grid": {name: ''.join(grid[code]) for code, name, _ in GRID_ROWS},
+        })
+
+    period_dicts = [{
+        "status": _STATUS_NAMES[status],
+        "start": from_epoch_seconds(start).isoformat(),
+        "end": from_epoch_seconds(end).isoformat(),
+        "hours": round((end - start) / 3600, 2),
+    } for start, end, status in periods]
+
+    return {
+        "reportId": f"{driver_id}-{timeline.revision}-{int(now)}",
+        "driverId": driver_id,
+        "generatedAt": from_epoch_seconds(now).isoformat(),
+        "periodStart": from_epoch_seconds(window_start).isoformat(),
+        "periodEnd": from_epoch_seconds(now).isoformat(),
+        "days": days,
+        "periods": period_dicts,
+        "csv": _report_csv(driver_id, period_dicts),
+        "grid": _report_grid(days),
+    }
+
+def _report_csv(driver_id: str, periods: List[Dict[str, Any]]) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(["driver_id", "status", "start", "end", "hours"])
+    for period in periods:
+        writer.writerow([driver_id, period["status"], period["start"], period["end"], period["hours"]])
+    return out.getvalue()
+
+def _report_grid(days: List[Dict[str, Any]]) -> str:
+    """Plain-text RODS grid: one block per day, one row per duty status, one column per 15 minutes"""
+    hours = ''.join(f"{hour:<4}" for hour in range(24))
+    lines = []
+    for day in days:
+        lines.append(f"{day['date']:<10} |{hours}| hours")
+        for _, name, label in GRID_ROWS:
+            lines.append(f"{label:<10} |{day['grid'][name]}| {day['totals'][name]:5.2f}")
+        lines.append("")
+    return '\n'.join(lines)
+
+_timelines: 'weakref.WeakKeyDictionary[Any, DutyTimeline]' = weakref.WeakKeyDictionary()
+_timelines_lock = threading.Lock()
+
+def get_duty_timeline(data_store) -> DutyTimeline:
+    """Get the duty timeline of a data store, created on first use"""
+    with _timelines_lock:
+        timeline = _timelines.get(data_store)
+        if timeline is None:
+            timeline = _timelines[data_store] = DutyTimeline(data_store)
+        return timeline
@@ -0,0 +1,372 @@
+"""
+ELD Data Store Benchmarks
+Compares ELDDataStore implementations on synthetic fleets from
+geotab_simulator.FleetSimulator.
+
+For each store and fleet size the benchmark measures:
+- HOS log and DVIR ingest throughput (batch store calls)
+- per-driver get_hos_logs range query latency percentiles (last 24 hours)
+  and a fleet-wide query of the last hour
+- full and incremental HOS violation check times
+- resident memory added by the stored records, and the store's size on disk
+
+Each case runs in a fresh process, so memory figures are not shared between
+stores. Results are written as JSON; --baseline compares them with an
+earlier run and exits with status 1 on regressions.
+
+    python eld_benchmark.py --drivers 100 1000 10000 --output benchmark.json
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import multiprocessing
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Iterator
+
+from geotab_simulator import FleetSimulator
+from hos_rules import HOS_LOOKBACK, NUMPY_AVAILABLE
+from rapid_eld import (
+    ColumnarELDDataStore, ELDService, IndexedInMemoryELDDataStore, InMemoryELDDataStore,
+    normalize_duty_status_log, normalize_dvir_log,
+)
+
+DEFAULT_DRIVERS = (100, 1000, 10000)
+DEFAULT_QUERIES = 500
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_TIMEOUT = 1800
+DEFAULT_TOLERANCE = 0.2
+# Fixed simulated time, so every run benchmarks the same records
+BENCHMARK_START = datetime(2025, 1, 15, 12)
+
+# --- Stores ---
+@contextmanager
+def _memory_store(directory: str):
+    yield InMemoryELDDataStore()
+
+@contextmanager
+def _indexed_store(directory: str):
+    yield IndexedInMemoryELDDataStore()
+
+@contextmanager
+def _columnar_store(directory: str):
+    yield ColumnarELDDataStore()
+
+@contextmanager
+def _sqlite_store(directory: str, partitioned: bool = False):
+    from sqlite_store import SQLiteELDDataStore
+    store = SQLiteELDDataStore(os.path.join(directory, 'eld.db'), partitioned=partitioned)
+    try:
+        yield store
+    finally:
+        store.close()
+
+def _sqlite_partitioned_store(directory: str):
+    return _sqlite_store(directory, partitioned=True)
+
+@contextmanager
+def _journal_store(directory: str):
+    from store_journal import JournaledELDDataStore
+    store = JournaledELDDataStore(os.path.join(directory, 'journal'), IndexedInMemoryELDDataStore())
+    try:
+        yield store
+    finally:
+        store.close()
+
+@contextmanager
+def _flask_store(directory: str):
+    from eld_integration import FLASK_SQLALCHEMY_AVAILABLE
+    if not FLASK_SQLALCHEMY_AVAILABLE:
+        raise ImportError("Flask-SQLAlchemy is required for the flask store")
+    from flask import Flask
+    from flask_sqlalchemy import SQLAlchemy
+    from eld_integration import Base, FlaskELDDataStore
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+        "ELD_BENCHMARK_DATABASE_URL", f"sqlite:///{os.path.join(directory, 'eld.db')}")
+    db = SQLAlchemy(app)
+    with app.app_context():
+        # The store defines its models on Base, so create it before the tables
+        store = FlaskELDDataStore(db)
+        Base.metadata.drop_all(db.engine)
+        Base.metadata.create_all(db.engine)
+        try:
+            yield store
+        finally:
+            db.session.remove()
+            db.engine.dispose()
+
+# Store name -> context manager creating the store in a scratch directory
+STORES = {
+    "memory": _memory_store,
+    "indexed": _indexed_store,
+    "columnar": _columnar_store,
+    "sqlite": _sqlite_store,
+    "sqlite_partitioned": _sqlite_partitioned_store,
+    "journal": _journal_store,
+    "flask": _flask_store,
+}
+
+# --- Measurements ---
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current size; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _disk_bytes(directory: str) -> int:
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def _latency_summary(samples: List[float]) -> Dict[str, Any]:
+    """Nearest-rank percentiles of latencies in seconds, reported in milliseconds"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 3)
+
+    return {"count": len(ordered), "p50_ms": percentile(50), "p95_ms": percentile(95),
+            "p99_ms": percentile(99), "max_ms": round(ordered[-1] * 1000, 3)}
+
+def _feed_records(simulator: FleetSimulator, type_name: str,
+                  from_version: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Every record of a simulator feed after `from_version`, page by page"""
+    while True:
+        page = simulator.get_feed(type_name, from_version)
+        yield from page["data"]
+        if not page["data"] or page["toVersion"] == from_version:
+            return
+        from_version = page["toVersion"]
+
+def _normalized(records, normalize) -> List[Dict[str, Any]]:
+    return [record for record in map(normalize, records) if record is not None]
+
+def _ingest(store_batch, records: List[Dict[str, Any]], normalize, batch_size: int) -> Dict[str, Any]:
+    """Store records in batches, timing only the store calls"""
+    elapsed = 0.0
+    stored = 0
+    for offset in range(0, len(records), batch_size):
+        # Normalize per batch, so the store holds the only references afterwards
+        batch = _normalized(records[offset:offset + batch_size], normalize)
+        started = time.perf_counter()
+        store_batch(batch)
+        elapsed += time.perf_counter() - started
+        stored += len(batch)
+    return {"records": stored, "seconds": round(elapsed, 3),
+            "records_per_s": round(stored / elapsed) if elapsed else None}
+
+def run_case(store_name: str, drivers: int, days: float = HOS_LOOKBACK.days, seed: int = 0,
+             queries: int = DEFAULT_QUERIES, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Any]:
+    """Benchmark one store on one fleet size; returns the measurements"""
+    result: Dict[str, Any] = {"store": store_name, "drivers": drivers, "days": days}
+    simulator = FleetSimulator(drivers, seed, BENCHMARK_START, acceleration=0,
+                               history=timedelta(days=days))
+    raw_logs = list(_feed_records(simulator, "DutyStatusLog"))
+    raw_dvirs = list(_feed_records(simulator, "DVIRLog"))
+    version = raw_logs[-1]['version'] if raw_logs else None
+    now = simulator.now()
+    directory = tempfile.mkdtemp(prefix=f"eld-bench-{store_name}-")
+    try:
+        with STORES[store_name](directory) as store:
+            # Measured from the empty store, so driver imports are not counted
+            gc.collect()
+            rss_before = _rss_bytes()
+            result["ingest"] = _ingest(store.store_hos_logs, raw_logs, normalize_duty_status_log,
+                                       batch_size)
+            result["dvir_ingest"] = _ingest(store.store_dvir_reports, raw_dvirs, normalize_dvir_log,
+                                            batch_size)
+            gc.collect()
+            rss_after = _rss_bytes()
+            result["memory"] = {
+                "rss_bytes": rss_after - rss_before if None not in (rss_before, rss_after) else None,
+                "disk_bytes": _disk_bytes(directory),
+            }
+
+            rng = random.Random(seed)
+            driver_ids = [driver.id for driver in simulator.drivers]
+            samples = []
+            rows = 0
+            for _ in range(queries):
+                driver_id = rng.choice(driver_ids)
+                started = time.perf_counter()
+                rows += len(store.get_hos_logs(driver_id, now - timedelta(hours=24), now))
+                samples.append(time.perf_counter() - started)
+            result["query"] = {**_latency_summary(samples), "rows": rows}
+            samples = []
+            for _ in range(max(1, queries // 50)):
+                started = time.perf_counter()
+                fleet_rows = len(store.get_hos_logs(None, now - timedelta(hours=1), now))
+                samples.append(time.perf_counter() - started)
+            result["fleet_query"] = {**_latency_summary(samples), "rows": fleet_rows}
+
+            service = ELDService(store)
+            started = time.perf_counter()
+            violations = service.check_hos_violations(now, incremental=False)
+            full_s = time.perf_counter() - started
+            service.track_hos_ingest(_normalized(raw_logs, normalize_duty_status_log))
+            started = time.perf_counter()
+            service.check_hos_violations(now)
+            incremental_s = time.perf_counter() - started
+
+            # One more simulated hour of logs, checked incrementally
+            del raw_logs, raw_dvirs
+            simulator.advance(timedelta(hours=1))
+            new_logs = _normalized(_feed_records(simulator, "DutyStatusLog", version),
+                                   normalize_duty_status_log)
+            started = time.perf_counter()
+            service.ingest_hos_logs(new_logs)
+            service.check_hos_violations(simulator.now())
+            update_s = time.perf_counter() - started
+            result["checks"] = {
+                "full_s": round(full_s, 3),
+                "incremental_initial_s": round(incremental_s, 3),
+                "incremental_update_s": round(update_s, 3),
+                "update_logs": len(new_logs),
+                "violations": len(violations),
+            }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return result
+
+def _run_case_isolated(args: tuple, timeout: float) -> Dict[str, Any]:
+    store_name, drivers = args[:2]
+    pool = multiprocessing.get_context('spawn').Pool(1)
+    try:
+        return pool.apply_async(run_case, args).get(timeout)
+    except multiprocessing.TimeoutError:
+        return {"store": store_name, "drivers": drivers, "error": f"timed out after {timeout}s"}
+    except ImportError as e:
+        return {"store": store_name, "drivers": drivers, "skipped": str(e)}
+    except Exception as e:
+        return {"store": store_name, "drivers": drivers, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        pool.terminate()
+        pool.join()
+
+def run_benchmarks(stores: Optional[List[str]] = None, drivers: Optional[List[int]] = None,
+                   days: float = HOS_LOOKBACK.days, seed: int = 0, queries: int = DEFAULT_QUERIES,
+                   batch_size: int = DEFAULT_BATCH_SIZE, timeout: float = DEFAULT_TIMEOUT,
+                   isolate: bool = True) -> Dict[str, Any]:
+    """
+    Benchmark every store on every fleet size.
+
+    Returns:
+        dict: Environment details and one result per (fleet size, store);
+        failed cases have an "error" and unavailable stores a "skipped" reason.
+    """
+    results = []
+    for fleet_size in drivers or DEFAULT_DRIVERS:
+        for store_name in stores or list(STORES):
+            args = (store_name, fleet_size, days, seed, queries, batch_size)
+            logging.info(f"Benchmarking {store_name} store with {fleet_size} drivers...")
+            if isolate:
+                result = _run_case_isolated(args, timeout)
+            else:
+                result = run_case(*args)
+            logging.info(json.dumps(result))
+            results.append(result)
+    return {
+        "generated_at": datetime.utcnow().isoformat() + 'Z',
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": NUMPY_AVAILABLE,
+        "config": {"days": days, "seed": seed, "queries": queries, "batch_size": batch_size},
+        "results": results,
+    }
+
+# --- Regression Tracking ---
+# Result paths compared by compare_results, and whether larger is better
+METRICS = (
+    (("ingest", "records_per_s"), True),
+    (("dvir_ingest", "records_per_s"), True),
+    (("query", "p50_ms"), False),
+    (("query", "p95_ms"), False),
+    (("fleet_query", "p50_ms"), False),
+    (("checks", "full_s"), False),
+    (("checks", "incremental_initial_s"), False),
+    (("checks", "incremental_update_s"), False),
+    (("memory", "rss_bytes"), False),
+)
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """Metrics of `current` worse than `baseline` by more than `tolerance` (a fraction)"""
+    previous = {(result["store"], result["drivers"]): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in current.get("results", []):
+        before = previous.get((result["store"], result["drivers"]))
+        if before is None:
+            continue
+        for (section, name), higher_is_better in METRICS:
+            old = (before.get(section) or {}).get(name)
+            new = (result.get(section) or {}).get(name)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append({"store": result["store"], "drivers": result["drivers"],
+                                    "metric": f"{section}.{name}", "baseline": old,
+                                    "current": new, "change": round(change, 3)})
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ELD data stores on synthetic fleets")
+    parser.add_argument("--stores", nargs="+", choices=list(STORES), default=list(STORES))
+    parser.add_argument("--drivers", nargs="+", type=int, default=list(DEFAULT_DRIVERS),
+                        help="Fleet sizes (e.g. 100 1000 10000 50000)")
+    parser.add_argument("--days", type=float, default=HOS_LOOKBACK.days,
+                        help="Days of duty status history per driver")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="Seconds before a case is abandoned")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--baseline", help="Earlier results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s %(message)s')
+    report = run_benchmarks(args.stores, args.drivers, args.days, args.seed, args.queries,
+                            args.batch_size, args.timeout)
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    logging.info(f"Wrote {len(report['results'])} results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare_results(json.load(baseline), report, args.tolerance)
+        for regression in regressions:
+            logging.warning(f"Regression: {json.dumps(regression)}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Async ELD Ingestion Pipeline
+Syncs many Geotab databases concurrently from a single asyncio event loop.
+
+Each database is synced with the same GetFeed/ExecuteMultiCall protocol as
+ELDService.sync_eld_data. Round trips are limited per Geotab host, and
+fetched pages go through a bounded queue to a single writer, so a slow data
+store pushes back on the fetchers instead of buffering without limit. The
+writer stores pages in a worker thread, so fetching goes on while it writes.
+A database whose page fails to store stops syncing, and its feed tokens stay
+at the last stored page. Record, driver and vehicle ids are prefixed with the
+database name, so databases can share a data store.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Callable
+
+from eld_metrics import ELD_METRICS, INGEST_QUEUE_WAIT_SECONDS, phase
+from geotab_client import (
+    AIOHTTP_AVAILABLE, DEFAULT_GEOTAB_SERVER, AsyncGeotabClient, GeotabAPIError,
+)
+from rapid_eld import (
+    GEOTAB_FEED_RESULTS_LIMIT, ELDDataStore, ELDService, feed_request, get_data_store,
+    read_feed_page,
+)
+
+if AIOHTTP_AVAILABLE:
+    import aiohttp
+
+@dataclass
+class GeotabDatabaseConfig:
+    """Credentials and target data store (explicit, or the company's tenant store) for one Geotab database"""
+    database: str
+    username: str
+    password: str
+    server: str = DEFAULT_GEOTAB_SERVER
+    data_store: Optional[ELDDataStore] = None
+    company_id: Optional[str] = None
+
+@dataclass
+class DatabaseSyncReport:
+    """Progress and latency of one database's sync"""
+    database: str
+    records: Dict[str, int] = field(default_factory=dict)
+    latencies: List[float] = field(default_factory=list)
+    started_at: float = 0.0
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(percentile / 100 * len(ordered)))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        finished = self.finished_at if self.finished_at is not None else time.monotonic()
+        return {
+            "database": self.database,
+            "records": dict(self.records),
+            "round_trips": len(self.latencies),
+            "latency_p50_ms": _ms(self.latency_percentile(50)),
+            "latency_p95_ms": _ms(self.latency_percentile(95)),
+            "latency_max_ms": _ms(max(self.latencies) if self.latencies else None),
+            "duration_s": round(finished - self.started_at, 3),
+            "error": self.error,
+        }
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+# Geotab ids are only unique within a database
+_NAMESPACED_FIELDS = ('source_id', 'driver_id', 'vehicle_id')
+
+def _namespace_records(records: List[Dict[str, Any]], database: str):
+    """Prefix the Geotab ids of normalized records with their database, in place"""
+    for record in records:
+        for key in _NAMESPACED_FIELDS:
+            if record.get(key) is not None:
+                record[key] = f"{database}:{record[key]}"
+
+class ELDIngestPipeline:
+    """
+    Concurrent GetFeed sync of many Geotab databases.
+
+    Args:
+        databases: Databases to sync.
+        max_concurrency_per_host (int): Concurrent round trips per Geotab server.
+        queue_size (int): Fetched pages that may wait for the writer before
+            fetchers block.
+        results_limit (int): Records per GetFeed page.
+        on_progress: Called with the DatabaseSyncReport after every page.
+    """
+
+    def __init__(self, databases: List[GeotabDatabaseConfig], max_concurrency_per_host: int = 8,
+                 queue_size: int = 64, results_limit: Optional[int] = None,
+                 on_progress: Optional[Callable[[DatabaseSyncReport], None]] = None):
+        if not AIOHTTP_AVAILABLE:
+            raise ImportError("aiohttp is required for the async ingestion pipeline")
+        self.databases = databases
+        self.max_concurrency_per_host = max_concurrency_per_host
+        self.queue_size = queue_size
+        self.results_limit = results_limit or GEOTAB_FEED_RESULTS_LIMIT
+        self.on_progress = on_progress
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def _host_slot(self, server: str) -> asyncio.Semaphore:
+        slot = self._host_slots.get(server)
+        if slot is None:
+            slot = self._host_slots[server] = asyncio.Semaphore(self.max_concurrency_per_host)
+        return slot
+
+    async def run(self) -> List[DatabaseSyncReport]:
+        """Sync every database; returns one report per database, in input order"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        connector = aiohttp.TCPConnector(limit_per_host=self.max_concurrency_per_host)
+        async with aiohttp.ClientSession(connector=connector) as http:
+            writer = asyncio.create_task(self._write_pages(queue))
+            try:
+                reports = await asyncio.gather(*(self._sync_database(config, http, queue)
+                                                 for config in self.databases))
+                await queue.join()
+            finally:
+                writer.cancel()
+        return list(reports)
+
+    async def _sync_database(self, config: GeotabDatabaseConfig, http,
+                             queue: asyncio.Queue) -> DatabaseSyncReport:
+        with phase("ingest_database", database=config.database) as span:
+            report = await self._fetch_database(config, http, queue)
+            span.records = sum(report.records.values())
+        return report
+
+    async def _fetch_database(self, config: GeotabDatabaseConfig, http,
+                              queue: asyncio.Queue) -> DatabaseSyncReport:
+        report = DatabaseSyncReport(database=config.database, started_at=time.monotonic())
+        service = ELDService(config.data_store if config.data_store is not None
+                             else get_data_store(config.company_id))
+        client = AsyncGeotabClient(config.database, config.username, config.password,
+                                   config.server, session=http)
+        feeds = service.eld_feeds()
+        keys = {type_name: f"{config.database}:{type_name}" for type_name in feeds}
+        try:
+            versions = {type_name: service.data_store.get_feed_version(keys[type_name])
+                        for type_name in feeds}
+        except Exception as e:
+            report.error = f"Failed to read feed versions: {e}"
+            logging.exception(f"{config.database}: failed to read feed versions")
+            report.finished_at = time.monotonic()
+            return report
+        pending = list(feeds)
+        try:
+            # Stops at the first page the writer fails to store
+            while pending and report.error is None:
+                calls = [feed_request(type_name, versions[type_name], self.results_limit)
+                         for type_name in pending]
+                async with self._host_slot(client.server):
+                    started = time.monotonic()
+                    results = await client.multi_call(calls)
+                    report.latencies.append(time.monotonic() - started)
+
+                still_pending = []
+                for type_name, result in zip(pending, results):
+                    normalize, store = feeds[type_name]
+                    records, version, more = read_feed_page(result, normalize, versions[type_name],
+                                                            self.results_limit)
+                    _namespace_records(records, config.database)
+                    # Blocks while the writer is behind
+                    waited = time.perf_counter()
+                    await queue.put((report, (service, type_name, keys[type_name], records,
+                                              version, store), None))
+                    if ELD_METRICS:
+                        INGEST_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - waited)
+                    # The next page is requested from here; the stored token
+                    # only advances once the writer has stored this page
+                    versions[type_name] = version
+                    if more:
+                        still_pending.append(type_name)
+                pending = still_pending
+                logging.info(f"{config.database}: {sum(report.records.values())} records, "
+                             f"round trip {report.latencies[-1] * 1000:.0f} ms")
+                if self.on_progress:
+                    self.on_progress(report)
+        except GeotabAPIError as e:
+            report.error = str(e)
+            logging.error(f"{config.database}: {e}")
+        # Wait for the writer to get through this database's pages
+        flushed = asyncio.get_running_loop().create_future()
+        await queue.put((report, None, flushed))
+        await flushed
+        report.finished_at = time.monotonic()
+        return report
+
+    async def _write_pages(self, queue: asyncio.Queue):
+        """Single writer, so data stores never see concurrent writes"""
+        while True:
+            report, page, flushed = await queue.get()
+            try:
+                if page is None:
+                    flushed.set_result(None)
+                elif report.error is None:
+                    await asyncio.to_thread(self._write_page, report, *page)
+            except Exception as e:
+                report.error = f"Failed to store {page[1]} page: {e}"
+                logging.exception(f"{report.database}: failed to store {page[1]} page")
+            finally:
+                queue.task_done()
+
+    @staticmethod
+    def _write_page(report: DatabaseSyncReport, service: ELDService, type_name: str, key: str,
+                    records: List[Dict[str, Any]], version: Optional[str], store):
+        with phase("ingest_write_page", type_name=type_name) as span:
+            span.records = len(records)
+            # HOS logs are stored with service.ingest_hos_logs, which tracks them
+            service.store_feed_page(key, records, version, store)
+            if type_name == "DVIRLog":
+                service.track_dvir_ingest(records)
+        report.records[type_name] = report.records.get(type_name, 0) + len(records)
+
+def load_database_configs() -> List[GeotabDatabaseConfig]:
+    """
+    Read database credentials from GEOTAB_DATABASES: a JSON list of objects
+    with database, username, password and optional server and company_id.
+    """
+    return [GeotabDatabaseConfig(**entry) for entry in json.loads(os.environ.get("GEOTAB_DATABASES", "[]"))]
+
+def run_ingest(databases: List[GeotabDatabaseConfig], **options) -> List[Dict[str, Any]]:
+    """Run the pipeline to completion and return the per-database reports as dicts"""
+    reports = asyncio.run(ELDIngestPipeline(databases, **options).run())
+    return [report.to_dict() for report in reports]
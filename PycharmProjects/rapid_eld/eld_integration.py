@@ -3,15 +3,31 @@ Integration adapter for connecting the ELD module to existing client portal appl
 This module provides adapters for common frameworks and databases.
 """
 
-from typing import Optional, Dict, Any, List
+import json
+import logging
+import os
+import threading
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Sequence, Set, Tuple
 from datetime import datetime
-from rapid_eld import ELDDataStore, ELDService, set_data_store
+from itertools import islice
+from hos_partitions import (
+    HOS_PARTITIONED, add_months, archive_path, expired_months, iter_months, partition_month,
+    partition_name, write_archive,
+)
+from eld_tenancy import register_tenant_store
+from rapid_eld import ELDDataStore, ELDService, PageKey, set_data_store
 
 # Optional imports for different integrations
 try:
     from flask_sqlalchemy import SQLAlchemy
-    from sqlalchemy import Column, String, Integer, DateTime, Boolean, Text, JSON
+    from sqlalchemy import (
+        Column, String, Integer, DateTime, Boolean, Text, JSON, Index, UniqueConstraint, and_,
+        bindparam, delete, insert, inspect, literal, or_, select, text, tuple_, update,
+    )
+    from sqlalchemy.dialects import postgresql, sqlite
+    from sqlalchemy.schema import CreateIndex
     from sqlalchemy.ext.declarative import declarative_base
+    from sqlalchemy.orm import scoped_session, sessionmaker
     FLASK_SQLALCHEMY_AVAILABLE = True
 except ImportError:
     FLASK_SQLALCHEMY_AVAILABLE = False
@@ -26,34 +42,169 @@ except ImportError:
 if FLASK_SQLALCHEMY_AVAILABLE:
     Base = declarative_base()
     
+    # (column names, row tuples, next page key) from the *_rows readers
+    RowPage = Tuple[List[str], Iterable[Sequence[Any]], Optional[PageKey]]
+    
+    # Dialects with INSERT ... ON CONFLICT DO UPDATE
+    _UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+    
+    def _upgrade_table(conn, table) -> List[str]:
+        """
+        Add the columns, unique keys and indexes of `table` that its existing
+        database table lacks; returns the DDL run. create_all only creates
+        missing tables, so this is how tables from earlier versions catch up.
+        """
+        inspector = inspect(conn)
+        preparer = conn.dialect.identifier_preparer
+        name = preparer.format_table(table)
+        statements = []
+        stored_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in stored_columns:
+                continue
+            statement = (f"ALTER TABLE {name} ADD COLUMN {preparer.format_column(column)}"
+                         f" {column.type.compile(conn.dialect)}")
+            if not column.nullable and column.default is not None and column.default.is_scalar:
+                # Existing rows take the model default (e.g. eld_alerts.occurrences = 1)
+                default = literal(column.default.arg, column.type).compile(
+                    dialect=conn.dialect, compile_kwargs={'literal_binds': True})
+                statement += f" DEFAULT {default} NOT NULL"
+            statements.append(statement)
+        stored_indexes = inspector.get_indexes(table.name)
+        unique_keys = {tuple(constraint['column_names'])
+                       for constraint in inspector.get_unique_constraints(table.name)}
+        unique_keys.update(tuple(index['column_names']) for index in stored_indexes if index['unique'])
+        for constraint in table.constraints:
+            columns = tuple(column.name for column in constraint.columns)
+            if isinstance(constraint, UniqueConstraint) and columns not in unique_keys:
+                # A unique index serves ON CONFLICT like the constraint would
+                index_name = constraint.name or f"uq_{table.name}_{'_'.join(columns)}"
+                statements.append(f"CREATE UNIQUE INDEX {preparer.quote(index_name)} ON {name}"
+                                  f" ({', '.join(map(preparer.quote, columns))})")
+        stored_names = {index['name'] for index in stored_indexes}
+        statements.extend(str(CreateIndex(index).compile(dialect=conn.dialect))
+                          for index in table.indexes if index.name not in stored_names)
+        for statement in statements:
+            conn.execute(text(statement))
+        return statements
+    
+    # Model classes, defined by the first FlaskELDDataStore and shared by the
+    # rest (e.g. one store per tenant bind), since Base holds one table per name
+    _eld_models: Optional[Dict[str, Any]] = None
+    
     class FlaskELDDataStore(ELDDataStore):
-        """Flask-SQLAlchemy implementation of ELD data storage"""
+        """
+        Flask-SQLAlchemy implementation of ELD data storage.
+
+        The batch methods (store_hos_logs, store_dvir_reports, store_alerts)
+        insert `chunk_size` rows per executemany statement, all in one
+        transaction. HOS logs and DVIRs with a source_id are upserted on the
+        unique source_id index, replacing the row only when source_version
+        changed. HOS states and rollups are upserted on their primary keys and
+        alert updates are executemany UPDATEs, `chunk_size` rows a statement.
+        Pages are keyset range queries on (time, id) indexes, and
+        the iter_* methods stream rows in batches of `chunk_size`.
+        
+        With `partitioned` (PostgreSQL only), eld_hos_logs is a native range
+        partitioned table with one partition per month of start_time, created
+        as logs arrive. Postgres prunes date-range queries to the months they
+        name, and archive_hos_partitions exports and drops expired months.
+        Unique keys of a partitioned table must include start_time, so the
+        primary key is (id, start_time) and logs are upserted on
+        (source_id, start_time).
+        
+        With `bind_key`, the store uses that SQLALCHEMY_BINDS database through
+        a session of its own, so each tenant's store (see eld_tenancy) has its
+        own database, engine and connection pool. Call remove_session at the
+        end of each app context, as Flask-SQLAlchemy does for db.session.
+        """
         
-        def __init__(self, db: SQLAlchemy):
+        def __init__(self, db: SQLAlchemy, chunk_size: int = 1000,
+                     partitioned: bool = HOS_PARTITIONED, bind_key: Optional[str] = None):
             self.db = db
+            self.chunk_size = chunk_size
+            self.partitioned = partitioned
+            self.bind_key = bind_key
+            self._session = None
+            self._session_lock = threading.Lock()
+            # Months with an HOS log partition, loaded from the catalog on first use
+            self._hos_partitions: Optional[set] = None
             self._create_models()
         
+        @property
+        def session(self):
+            """db.session, or with a bind_key a scoped session on that bind's engine"""
+            if self.bind_key is None:
+                return self.db.session
+            if self._session is None:
+                with self._session_lock:
+                    if self._session is None:
+                        self._session = scoped_session(sessionmaker(bind=self.db.engines[self.bind_key]))
+            return self._session
+        
+        def remove_session(self):
+            """Close this thread's session on the store's bind"""
+            if self._session is not None:
+                self._session.remove()
+        
+        def upgrade_schema(self) -> List[str]:
+            """
+            Bring existing ELD tables up to the current models (see
+            _upgrade_table), in one transaction; returns the DDL run. Missing
+            tables are left to create_all.
+            """
+            engine = self.db.engine if self.bind_key is None else self.db.engines[self.bind_key]
+            statements = []
+            with engine.begin() as conn:
+                stored_tables = set(inspect(conn).get_table_names())
+                for model in (self.HOSLogModel, self.DVIRReportModel, self.AlertModel,
+                              self.HOSStateModel, self.FeedVersionModel, self.RollupModel):
+                    if model.__tablename__ in stored_tables:
+                        statements += _upgrade_table(conn, model.__table__)
+            for statement in statements:
+                logging.info(f"Upgraded ELD schema: {statement}")
+            return statements
+        
         def _create_models(self):
             """Create ELD models if they don't exist"""
+            global _eld_models
+            partitioned = self.partitioned
+            if _eld_models is not None:
+                if _eld_models['partitioned'] != partitioned:
+                    raise ValueError("All FlaskELDDataStores in a process must agree on HOS log partitioning")
+                for name, model in _eld_models.items():
+                    if name != 'partitioned':
+                        setattr(self, name, model)
+                return
+            hos_log_args = (Index('ix_eld_hos_logs_start_time_id', 'start_time', 'id'),)
+            if partitioned:
+                hos_log_args += (
+                    UniqueConstraint('source_id', 'start_time', name='uq_eld_hos_logs_source_id_start_time'),
+                    {'postgresql_partition_by': 'RANGE (start_time)'},
+                )
             
             class HOSLogModel(Base):
                 __tablename__ = 'eld_hos_logs'
+                __table_args__ = hos_log_args
                 
-                id = Column(Integer, primary_key=True)
+                id = Column(Integer, primary_key=True, autoincrement=True)
                 driver_id = Column(String(50), nullable=False)
                 vehicle_id = Column(String(50))
                 log_type = Column(String(20), nullable=False)
-                start_time = Column(DateTime, nullable=False)
+                start_time = Column(DateTime, nullable=False, primary_key=partitioned)
                 end_time = Column(DateTime)
                 location = Column(String(200))
                 odometer_reading = Column(Integer)
                 is_edited = Column(Boolean, default=False)
                 edit_reason = Column(Text)
+                source_id = Column(String(100), unique=not partitioned)
+                source_version = Column(String(50))
                 created_at = Column(DateTime, default=datetime.utcnow)
                 updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
             
             class DVIRReportModel(Base):
                 __tablename__ = 'eld_dvir_reports'
+                __table_args__ = (Index('ix_eld_dvir_reports_inspection_date_id', 'inspection_date', 'id'),)
                 
                 id = Column(Integer, primary_key=True)
                 driver_id = Column(String(50), nullable=False)
@@ -63,11 +214,17 @@ if FLASK_SQLALCHEMY_AVAILABLE:
                 defects = Column(JSON)
                 is_safe_to_drive = Column(Boolean, nullable=False)
                 signature = Column(Text)
+                source_id = Column(String(100), unique=True)
+                source_version = Column(String(50))
                 created_at = Column(DateTime, default=datetime.utcnow)
                 updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
             
             class AlertModel(Base):
                 __tablename__ = 'eld_alerts'
+                __table_args__ = (
+                    Index('ix_eld_alerts_created_at_id', 'created_at', 'id'),
+                    Index('ix_eld_alerts_driver_id_alert_type', 'driver_id', 'alert_type'),
+                )
                 
                 id = Column(Integer, primary_key=True)
                 driver_id = Column(String(50), nullable=False)
@@ -75,6 +232,11 @@ if FLASK_SQLALCHEMY_AVAILABLE:
                 severity = Column(String(20), nullable=False)
                 title = Column(String(200), nullable=False)
                 message = Column(Text, nullable=False)
+                rule = Column(String(50))
+                occurred_at = Column(DateTime)
+                occurrences = Column(Integer, nullable=False, default=1)
+                first_seen = Column(DateTime)
+                last_seen = Column(DateTime)
                 is_read = Column(Boolean, default=False)
                 is_resolved = Column(Boolean, default=False)
                 resolved_at = Column(DateTime)
@@ -82,25 +244,89 @@ if FLASK_SQLALCHEMY_AVAILABLE:
                 created_at = Column(DateTime, default=datetime.utcnow)
                 updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
             
+            class HOSStateModel(Base):
+                __tablename__ = 'eld_hos_states'
+                
+                driver_id = Column(String(50), primary_key=True)
+                state = Column(JSON, nullable=False)
+                updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+            
+            class FeedVersionModel(Base):
+                __tablename__ = 'eld_feed_versions'
+                
+                type_name = Column(String(100), primary_key=True)
+                version = Column(String(50), nullable=False)
+                updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+            
+            class RollupModel(Base):
+                __tablename__ = 'eld_rollups'
+                
+                rollup = Column(String(50), primary_key=True)
+                key = Column(String(100), primary_key=True)
+                value = Column(JSON, nullable=False)
+                updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+            
             self.HOSLogModel = HOSLogModel
             self.DVIRReportModel = DVIRReportModel
             self.AlertModel = AlertModel
+            self.HOSStateModel = HOSStateModel
+            self.FeedVersionModel = FeedVersionModel
+            self.RollupModel = RollupModel
+            _eld_models = {
+                'partitioned': partitioned, 'HOSLogModel': HOSLogModel,
+                'DVIRReportModel': DVIRReportModel, 'AlertModel': AlertModel,
+                'HOSStateModel': HOSStateModel, 'FeedVersionModel': FeedVersionModel,
+                'RollupModel': RollupModel,
+            }
         
         def store_hos_log(self, log_data: Dict[str, Any]) -> bool:
-            try:
-                log = self.HOSLogModel(**log_data)
-                self.db.session.add(log)
-                self.db.session.commit()
-                return True
-            except Exception as e:
-                self.db.session.rollback()
-                print(f"Error storing HOS log: {e}")
-                return False
+            return self.store_hos_logs([log_data]) == 1
         
         def get_hos_logs(self, driver_id: Optional[str] = None, 
                         start_date: Optional[datetime] = None,
                         end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
-            query = self.db.session.query(self.HOSLogModel)
+            logs = self._hos_log_query(driver_id, start_date, end_date).all()
+            return [self._model_to_dict(log) for log in logs]
+        
+        def get_hos_logs_page(self, driver_id: Optional[str] = None,
+                              start_date: Optional[datetime] = None,
+                              end_date: Optional[datetime] = None,
+                              after: Optional[PageKey] = None,
+                              limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+            return self._keyset_page(self._hos_log_query(driver_id, start_date, end_date),
+                                     self.HOSLogModel, 'start_time', after, limit)
+        
+        def iter_hos_logs(self, driver_id: Optional[str] = None,
+                          start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+            return self._iter_rows(self._hos_log_query(driver_id, start_date, end_date))
+
+        def get_hos_logs_by_source(self, source_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+            source_ids = list(source_ids)
+            logs = {}
+            for start in range(0, len(source_ids), self.chunk_size):
+                chunk = source_ids[start:start + self.chunk_size]
+                query = self.session.query(self.HOSLogModel).filter(self.HOSLogModel.source_id.in_(chunk))
+                logs.update((log.source_id, self._model_to_dict(log)) for log in query.all())
+            return logs
+
+        def get_hos_log_driver_ids(self, start_date: Optional[datetime] = None,
+                                   end_date: Optional[datetime] = None) -> Set[str]:
+            query = self._hos_log_query(None, start_date, end_date).with_entities(
+                self.HOSLogModel.driver_id).filter(self.HOSLogModel.driver_id.isnot(None)).distinct()
+            return {driver_id for driver_id, in query.all()}
+
+        def hos_log_rows(self, driver_id: Optional[str] = None,
+                         start_date: Optional[datetime] = None,
+                         end_date: Optional[datetime] = None,
+                         after: Optional[PageKey] = None,
+                         limit: Optional[int] = None) -> RowPage:
+            """HOS logs as (columns, row tuples, next page key), for eld_serialization"""
+            return self._projected_rows(self._hos_log_query(driver_id, start_date, end_date),
+                                        self.HOSLogModel, 'start_time', after, limit)
+        
+        def _hos_log_query(self, driver_id, start_date, end_date):
+            query = self.session.query(self.HOSLogModel)
             
             if driver_id:
                 query = query.filter(self.HOSLogModel.driver_id == driver_id)
@@ -108,55 +334,444 @@ if FLASK_SQLALCHEMY_AVAILABLE:
                 query = query.filter(self.HOSLogModel.start_time >= start_date)
             if end_date:
                 query = query.filter(self.HOSLogModel.start_time <= end_date)
-            
-            logs = query.all()
-            return [self._model_to_dict(log) for log in logs]
-        
-        def store_dvir_report(self, dvir_data: Dict[str, Any]) -> bool:
+            return query
+
+        def _load_hos_partitions(self) -> set:
+            """Months with a partition of eld_hos_logs, read from the Postgres catalog once"""
+            if self._hos_partitions is None:
+                if self.session.get_bind().dialect.name != 'postgresql':
+                    raise ValueError("Partitioned HOS logs require PostgreSQL")
+                parent = self.HOSLogModel.__tablename__
+                names = self.session.execute(text(
+                    "SELECT child.relname FROM pg_inherits"
+                    " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+                    " JOIN pg_class parent ON parent.oid = pg_inherits.inhparent"
+                    " WHERE parent.relname = :parent"), {'parent': parent}).scalars()
+                months = {partition_month(parent, name) for name in names}
+                self._hos_partitions = {month for month in months if month is not None}
+            return self._hos_partitions
+
+        def _create_hos_partitions(self, logs: List[Dict[str, Any]]) -> bool:
+            """Create the monthly partitions the logs fall into, if missing"""
+            starts = [log['start_time'] for log in logs if isinstance(log.get('start_time'), datetime)]
+            if not starts:
+                return True
+            parent = self.HOSLogModel.__tablename__
             try:
-                report = self.DVIRReportModel(**dvir_data)
-                self.db.session.add(report)
-                self.db.session.commit()
+                existing = self._load_hos_partitions()
+                missing = [month for month in iter_months(min(starts), max(starts))
+                           if month not in existing]
+                for month in missing:
+                    self.session.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {partition_name(parent, month)} PARTITION OF {parent}"
+                        f" FOR VALUES FROM ('{month.isoformat(' ')}') TO ('{add_months(month, 1).isoformat(' ')}')"))
+                self.session.commit()
+                existing.update(missing)
                 return True
             except Exception as e:
-                self.db.session.rollback()
-                print(f"Error storing DVIR report: {e}")
+                self.session.rollback()
+                print(f"Error creating HOS log partitions: {e}")
                 return False
+
+        def archive_hos_partitions(self, before: datetime, archive_dir: str) -> List[Dict[str, Any]]:
+            """
+            Export each monthly partition ending at or before `before` to
+            <archive_dir>/<partition>.ndjson.gz, then detach and drop it.
+            Returns one summary per archived month; unpartitioned stores
+            archive nothing.
+            """
+            archived = []
+            if not self.partitioned:
+                return archived
+            parent = self.HOSLogModel.__tablename__
+            for month in expired_months(self._load_hos_partitions(), before):
+                name = partition_name(parent, month)
+                path = archive_path(archive_dir, name)
+                query = self._hos_log_query(None, month, None).filter(
+                    self.HOSLogModel.start_time < add_months(month, 1))
+                try:
+                    # Block writes to the month until it is dropped, so none miss the export
+                    self.session.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+                    rows = write_archive(path, self._iter_rows(query))
+                    self.session.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {name}"))
+                    self.session.execute(text(f"DROP TABLE {name}"))
+                    self.session.commit()
+                except Exception as e:
+                    self.session.rollback()
+                    print(f"Error archiving HOS log partition {name}: {e}")
+                    break
+                self._hos_partitions.discard(month)
+                archived.append({"partition": name, "month": month.strftime('%Y-%m'),
+                                 "rows": rows, "path": path})
+            return archived
+
+        def store_dvir_report(self, dvir_data: Dict[str, Any]) -> bool:
+            return self.store_dvir_reports([dvir_data]) == 1
         
         def get_dvir_reports(self, driver_id: Optional[str] = None,
                             vehicle_id: Optional[str] = None) -> List[Dict[str, Any]]:
-            query = self.db.session.query(self.DVIRReportModel)
+            reports = self._dvir_report_query(driver_id, vehicle_id).all()
+            return [self._model_to_dict(report) for report in reports]
+        
+        def get_dvir_reports_page(self, driver_id: Optional[str] = None,
+                                  vehicle_id: Optional[str] = None,
+                                  after: Optional[PageKey] = None,
+                                  limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+            return self._keyset_page(self._dvir_report_query(driver_id, vehicle_id),
+                                     self.DVIRReportModel, 'inspection_date', after, limit)
+        
+        def iter_dvir_reports(self, driver_id: Optional[str] = None,
+                              vehicle_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+            return self._iter_rows(self._dvir_report_query(driver_id, vehicle_id))
+        
+        def dvir_report_rows(self, driver_id: Optional[str] = None,
+                             vehicle_id: Optional[str] = None,
+                             after: Optional[PageKey] = None,
+                             limit: Optional[int] = None) -> RowPage:
+            """DVIR reports as (columns, row tuples, next page key), for eld_serialization"""
+            return self._projected_rows(self._dvir_report_query(driver_id, vehicle_id),
+                                        self.DVIRReportModel, 'inspection_date', after, limit)
+        
+        def _dvir_report_query(self, driver_id, vehicle_id):
+            query = self.session.query(self.DVIRReportModel)
             
             if driver_id:
                 query = query.filter(self.DVIRReportModel.driver_id == driver_id)
             if vehicle_id:
                 query = query.filter(self.DVIRReportModel.vehicle_id == vehicle_id)
-            
-            reports = query.all()
-            return [self._model_to_dict(report) for report in reports]
+            return query
+        
+        def store_hos_logs(self, logs: Iterable[Dict[str, Any]]) -> int:
+            logs = list(logs)
+            if self.partitioned and not self._create_hos_partitions(logs):
+                return 0
+            stored = self._bulk_insert(self.HOSLogModel, logs, "HOS logs")
+            if stored:
+                self._notify_hos_logs({log.get('driver_id') for log in logs})
+            return stored
+        
+        def store_dvir_reports(self, reports: Iterable[Dict[str, Any]]) -> int:
+            return self._bulk_insert(self.DVIRReportModel, reports, "DVIR reports")
         
         def store_alert(self, alert_data: Dict[str, Any]) -> bool:
             try:
-                alert = self.AlertModel(**alert_data)
-                self.db.session.add(alert)
-                self.db.session.commit()
+                alert = self.AlertModel(**self._alert_row(alert_data))
+                self.session.add(alert)
+                self.session.commit()
                 return True
             except Exception as e:
-                self.db.session.rollback()
+                self.session.rollback()
                 print(f"Error storing alert: {e}")
                 return False
         
+        def store_alerts(self, alerts: Iterable[Dict[str, Any]]) -> int:
+            return self._bulk_insert(self.AlertModel, (self._alert_row(alert) for alert in alerts),
+                                     "alerts")
+        
+        def _alert_row(self, alert_data: Dict[str, Any]) -> Dict[str, Any]:
+            """Map a service alert dict ('type' key) onto AlertModel columns"""
+            row = dict(alert_data)
+            if 'type' in row:
+                row['alert_type'] = row.pop('type')
+            if 'resolved_at' in row:
+                row['is_resolved'] = row['resolved_at'] is not None
+            columns = self.AlertModel.__table__.columns.keys()
+            return {key: value for key, value in row.items() if key in columns}
+        
+        def update_alerts(self, updates: Dict[Any, Dict[str, Any]]) -> int:
+            table = self.AlertModel.__table__
+            # One executemany UPDATE per set of changed columns
+            groups: Dict[tuple, List[Dict[str, Any]]] = {}
+            for alert_id, fields in updates.items():
+                row = self._alert_row(fields)
+                row.pop('id', None)
+                if row:
+                    groups.setdefault(tuple(sorted(row)), []).append({**row, 'alert_id': alert_id})
+            try:
+                updated = 0
+                statement = update(table).where(table.c.id == bindparam('alert_id'))
+                for rows in groups.values():
+                    for start in range(0, len(rows), self.chunk_size):
+                        result = self.session.execute(statement, rows[start:start + self.chunk_size])
+                        updated += result.rowcount
+                self.session.commit()
+                return updated
+            except Exception as e:
+                self.session.rollback()
+                print(f"Error updating alerts: {e}")
+                return 0
+        
+        def delete_alerts(self, alert_ids: Iterable[Any]) -> int:
+            table = self.AlertModel.__table__
+            alert_ids = iter(alert_ids)
+            try:
+                deleted = 0
+                while True:
+                    chunk = list(islice(alert_ids, self.chunk_size))
+                    if not chunk:
+                        break
+                    deleted += self.session.execute(delete(table).where(table.c.id.in_(chunk))).rowcount
+                self.session.commit()
+                return deleted
+            except Exception as e:
+                self.session.rollback()
+                print(f"Error deleting alerts: {e}")
+                return 0
+        
+        def _bulk_insert(self, model, records: Iterable[Dict[str, Any]], label: str) -> int:
+            """Insert records in chunks of multi-row executemany statements, in one transaction"""
+            table = model.__table__
+            columns = set(table.columns.keys())
+            records = iter(records)
+            stored = 0
+            try:
+                while True:
+                    chunk = list(islice(records, self.chunk_size))
+                    if not chunk:
+                        break
+                    # Each executemany binds one column set, so group rows by
+                    # the columns they set; omitted columns keep their defaults.
+                    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+                    for record in chunk:
+                        row = {key: value for key, value in record.items() if key in columns}
+                        groups.setdefault(tuple(sorted(row)), []).append(row)
+                    for rows in groups.values():
+                        self._insert_rows(table, rows)
+                    stored += len(chunk)
+                self.session.commit()
+                return stored
+            except Exception as e:
+                self.session.rollback()
+                print(f"Error storing {label}: {e}")
+                return 0
+        
+        def _insert_rows(self, table, rows: List[Dict[str, Any]]):
+            """Insert rows binding the same columns; rows with a source_id are upserted"""
+            if 'source_id' not in rows[0]:
+                self.session.execute(insert(table), rows)
+                return
+            plain = []
+            # Last write wins within a chunk; one upsert statement can't touch a row twice
+            latest: Dict[str, Dict[str, Any]] = {}
+            for row in rows:
+                if row['source_id'] is None:
+                    plain.append(row)
+                else:
+                    latest[row['source_id']] = row
+            if plain:
+                self.session.execute(insert(table), plain)
+            if latest:
+                self._upsert_rows(table, list(latest.values()))
+        
+        def _upsert_rows(self, table, rows: List[Dict[str, Any]]):
+            changed = {key for key in rows[0] if key != 'source_id'}
+            conflict = [table.c.source_id]
+            if self.partitioned and table is self.HOSLogModel.__table__:
+                # The unique key includes start_time, so a log whose start_time
+                # changed would not conflict: delete the copy stored under the old one
+                self.session.execute(
+                    delete(table).where(table.c.source_id == bindparam('moved_source_id'),
+                                        table.c.start_time != bindparam('moved_start_time')),
+                    [{'moved_source_id': row['source_id'], 'moved_start_time': row['start_time']}
+                     for row in rows])
+                conflict.append(table.c.start_time)
+            dialect_insert = _UPSERT_INSERTS.get(self.session.get_bind().dialect.name)
+            if dialect_insert is not None:
+                statement = dialect_insert(table)
+                statement = statement.on_conflict_do_update(
+                    index_elements=conflict,
+                    set_={**{key: statement.excluded[key] for key in changed},
+                          'updated_at': datetime.utcnow()},
+                    where=table.c.source_version.is_distinct_from(statement.excluded.source_version),
+                )
+                self.session.execute(statement, rows)
+                return
+            
+            # Other dialects: compare against the stored versions first
+            stored = dict(self.session.execute(
+                select(table.c.source_id, table.c.source_version)
+                .where(table.c.source_id.in_([row['source_id'] for row in rows]))
+            ).all())
+            inserts = [row for row in rows if row['source_id'] not in stored]
+            if inserts:
+                self.session.execute(insert(table), inserts)
+            for row in rows:
+                source_id = row['source_id']
+                if source_id in stored and stored[source_id] != row.get('source_version'):
+                    self.session.execute(
+                        update(table).where(table.c.source_id == source_id)
+                        .values(**{key: row[key] for key in changed}, updated_at=datetime.utcnow())
+                    )
+        
+        def _upsert_keyed(self, table, keys: List[str], rows: List[Dict[str, Any]]):
+            """Insert or overwrite rows by primary key, `chunk_size` rows per executemany statement"""
+            changed = [key for key in rows[0] if key not in keys]
+            dialect_insert = _UPSERT_INSERTS.get(self.session.get_bind().dialect.name)
+            for start in range(0, len(rows), self.chunk_size):
+                chunk = rows[start:start + self.chunk_size]
+                if dialect_insert is not None:
+                    statement = dialect_insert(table)
+                    statement = statement.on_conflict_do_update(
+                        index_elements=[table.c[key] for key in keys],
+                        set_={**{key: statement.excluded[key] for key in changed},
+                              'updated_at': datetime.utcnow()},
+                    )
+                    self.session.execute(statement, chunk)
+                    continue
+                
+                # Other dialects: update the stored keys, insert the rest
+                key_columns = [table.c[key] for key in keys]
+                if len(keys) == 1:
+                    matched = key_columns[0].in_([row[keys[0]] for row in chunk])
+                else:
+                    matched = tuple_(*key_columns).in_([tuple(row[key] for key in keys) for row in chunk])
+                stored = {tuple(key) for key in self.session.execute(select(*key_columns).where(matched))}
+                existing = [row for row in chunk if tuple(row[key] for key in keys) in stored]
+                inserts = [row for row in chunk if tuple(row[key] for key in keys) not in stored]
+                if inserts:
+                    self.session.execute(insert(table), inserts)
+                if existing:
+                    statement = update(table).where(
+                        and_(*(table.c[key] == bindparam(f'key_{key}') for key in keys))
+                    ).values(updated_at=datetime.utcnow())
+                    self.session.execute(statement, [
+                        {**{key: row[key] for key in changed}, **{f'key_{key}': row[key] for key in keys}}
+                        for row in existing])
+        
         def get_alerts(self, driver_id: Optional[str] = None,
                       alert_type: Optional[str] = None) -> List[Dict[str, Any]]:
-            query = self.db.session.query(self.AlertModel)
+            alerts = self._alert_query(driver_id, alert_type).all()
+            return [self._model_to_dict(alert) for alert in alerts]
+        
+        def get_alerts_page(self, driver_id: Optional[str] = None,
+                            alert_type: Optional[str] = None,
+                            after: Optional[PageKey] = None,
+                            limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+            return self._keyset_page(self._alert_query(driver_id, alert_type),
+                                     self.AlertModel, 'created_at', after, limit)
+        
+        def iter_alerts(self, driver_id: Optional[str] = None,
+                        alert_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+            return self._iter_rows(self._alert_query(driver_id, alert_type))
+        
+        def alert_rows(self, driver_id: Optional[str] = None,
+                       alert_type: Optional[str] = None,
+                       after: Optional[PageKey] = None,
+                       limit: Optional[int] = None) -> RowPage:
+            """Alerts as (columns, row tuples, next page key), for eld_serialization"""
+            return self._projected_rows(self._alert_query(driver_id, alert_type),
+                                        self.AlertModel, 'created_at', after, limit)
+        
+        def _alert_query(self, driver_id, alert_type):
+            query = self.session.query(self.AlertModel)
             
             if driver_id:
                 query = query.filter(self.AlertModel.driver_id == driver_id)
             if alert_type:
                 query = query.filter(self.AlertModel.alert_type == alert_type)
-            
-            alerts = query.all()
-            return [self._model_to_dict(alert) for alert in alerts]
+            return query
+        
+        def _keyset_page(self, query, model, field: str, after: Optional[PageKey],
+                         limit: int) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+            """Rows ordered by (field, id) after the `after` key; fetches one extra row to detect the last page"""
+            column = getattr(model, field)
+            query = self._after_key(query, model, column, after)
+            rows = query.order_by(column, model.id).limit(limit + 1).all()
+            next_key = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_key = (getattr(rows[-1], field), rows[-1].id)
+            return [self._model_to_dict(row) for row in rows], next_key
+        
+        def _iter_rows(self, query) -> Iterator[Dict[str, Any]]:
+            for row in query.yield_per(self.chunk_size):
+                yield self._model_to_dict(row)
+        
+        def _after_key(self, query, model, column, after: Optional[PageKey]):
+            if after is None:
+                return query
+            value, last_id = after
+            return query.filter(or_(column > value, and_(column == value, model.id > last_id)))
+        
+        def _projected_rows(self, query, model, field: str, after: Optional[PageKey],
+                            limit: Optional[int]) -> RowPage:
+            """
+            Rows ordered by (field, id) as plain tuples of the table's columns,
+            so no ORM objects are built. With a limit, one keyset page (and the
+            next key); without, all rows streamed in batches of `chunk_size`.
+            """
+            table_columns = list(model.__table__.columns)
+            columns = [column.name for column in table_columns]
+            column = getattr(model, field)
+            query = (self._after_key(query, model, column, after)
+                     .with_entities(*table_columns).order_by(column, model.id))
+            if limit is None:
+                return columns, query.yield_per(self.chunk_size), None
+            rows = query.limit(limit + 1).all()
+            next_key = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                last = rows[-1]
+                next_key = (last[columns.index(field)], last[columns.index('id')])
+            return columns, rows, next_key
+        
+        def get_hos_states(self, driver_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+            query = self.session.query(self.HOSStateModel)
+            if driver_ids is not None:
+                query = query.filter(self.HOSStateModel.driver_id.in_(driver_ids))
+            return {row.driver_id: row.state for row in query.all()}
+        
+        def store_hos_states(self, states: Dict[str, Dict[str, Any]]) -> bool:
+            try:
+                if states:
+                    self._upsert_keyed(self.HOSStateModel.__table__, ['driver_id'],
+                                       [{'driver_id': driver_id, 'state': state}
+                                        for driver_id, state in states.items()])
+                self.session.commit()
+                return True
+            except Exception as e:
+                self.session.rollback()
+                print(f"Error storing HOS state: {e}")
+                return False
+        
+        def get_rollups(self, rollup: str, keys: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+            query = self.session.query(self.RollupModel).filter(self.RollupModel.rollup == rollup)
+            if keys is not None:
+                query = query.filter(self.RollupModel.key.in_(list(keys)))
+            return {row.key: row.value for row in query.all()}
+        
+        def store_rollups(self, rollup: str, entries: Dict[str, Dict[str, Any]],
+                          replace: bool = False) -> bool:
+            try:
+                if replace:
+                    self.session.query(self.RollupModel).filter(
+                        self.RollupModel.rollup == rollup).delete(synchronize_session=False)
+                if entries:
+                    rows = [{'rollup': rollup, 'key': key, 'value': value} for key, value in entries.items()]
+                    if replace:
+                        self.session.execute(insert(self.RollupModel.__table__), rows)
+                    else:
+                        self._upsert_keyed(self.RollupModel.__table__, ['rollup', 'key'], rows)
+                self.session.commit()
+                return True
+            except Exception as e:
+                self.session.rollback()
+                print(f"Error storing rollups: {e}")
+                return False
+        
+        def get_feed_version(self, type_name: str) -> Optional[str]:
+            row = self.session.get(self.FeedVersionModel, type_name)
+            return row.version if row else None
+        
+        def store_feed_version(self, type_name: str, version: str) -> bool:
+            try:
+                self.session.merge(self.FeedVersionModel(type_name=type_name, version=version))
+                self.session.commit()
+                return True
+            except Exception as e:
+                self.session.rollback()
+                print(f"Error storing feed version: {e}")
+                return False
         
         def _model_to_dict(self, model) -> Dict[str, Any]:
             """Convert SQLAlchemy model to dictionary"""
@@ -207,25 +822,75 @@ if DJANGO_AVAILABLE:
             pass
 
 # --- Integration Helper Functions ---
-def setup_flask_integration(app, db: SQLAlchemy):
-    """Setup ELD module integration with Flask application"""
+# Company id -> SQLALCHEMY_BINDS key of the company's own database (JSON object)
+ELD_TENANT_BINDS: Dict[str, str] = json.loads(os.environ.get("ELD_TENANT_BINDS", "{}"))
+
+def setup_flask_integration(app, db: SQLAlchemy, tenant_binds: Optional[Dict[str, str]] = None,
+                            upgrade_schema: bool = True):
+    """
+    Setup ELD module integration with Flask application. Companies in
+    `tenant_binds` (default ELD_TENANT_BINDS) get a store on their own bind.
+    With `upgrade_schema`, existing ELD tables get the columns and indexes
+    added since they were created (see FlaskELDDataStore.upgrade_schema).
+    """
     if not FLASK_SQLALCHEMY_AVAILABLE:
         raise ImportError("Flask-SQLAlchemy is required for Flask integration")
     
     # Create data store
     data_store = FlaskELDDataStore(db)
     set_data_store(data_store)
+    if upgrade_schema:
+        with app.app_context():
+            data_store.upgrade_schema()
+    setup_flask_tenants(app, db, ELD_TENANT_BINDS if tenant_binds is None else tenant_binds,
+                        upgrade_schema)
     
     # Register blueprint if available
     try:
-        from rapid_eld import eld_blueprint
+        from rapid_eld import eld_blueprint, metrics_view
         if eld_blueprint:
             app.register_blueprint(eld_blueprint)
+        if 'eld_metrics' not in app.view_functions:
+            app.add_url_rule('/metrics', 'eld_metrics', metrics_view)
     except ImportError:
         pass
     
     return data_store
 
+def setup_flask_tenants(app, db: SQLAlchemy, tenant_binds: Dict[str, str],
+                        upgrade_schema: bool = True) -> Dict[str, ELDDataStore]:
+    """
+    Register a FlaskELDDataStore per company on its SQLALCHEMY_BINDS key, so
+    requests and tasks for that company use its database and connection pool.
+    With `upgrade_schema`, each company's existing ELD tables are upgraded.
+    """
+    if not FLASK_SQLALCHEMY_AVAILABLE:
+        raise ImportError("Flask-SQLAlchemy is required for Flask integration")
+    companies_by_bind: Dict[str, str] = {}
+    for company_id, bind_key in tenant_binds.items():
+        if bind_key in companies_by_bind:
+            # Stores don't filter by company, so a shared database would mix tenants' rows
+            raise ValueError(f"Companies {companies_by_bind[bind_key]} and {company_id} "
+                             f"share bind {bind_key}; each company needs its own database")
+        companies_by_bind[bind_key] = company_id
+    
+    stores = {company_id: FlaskELDDataStore(db, bind_key=bind_key)
+              for company_id, bind_key in tenant_binds.items()}
+    for company_id, store in stores.items():
+        register_tenant_store(company_id, store)
+    if upgrade_schema and stores:
+        with app.app_context():
+            for store in stores.values():
+                store.upgrade_schema()
+    
+    if stores:
+        @app.teardown_appcontext
+        def remove_tenant_sessions(exc):
+            for store in stores.values():
+                store.remove_session()
+    
+    return stores
+
 def setup_django_integration():
     """Setup ELD module integration with Django application"""
     if not DJANGO_AVAILABLE:
@@ -0,0 +1,384 @@
+"""
+ELD Pipeline Metrics
+Counters, latency histograms and tracing spans for the sync and compliance
+pipeline, exposed in the Prometheus text format.
+
+Recorded automatically:
+- every Geotab HTTP request: duration, outcome and rate limiter wait
+- every data store operation: duration and records moved
+- pipeline phases (fetch_hos_logs, sync_feeds, track_hos_ingest,
+  check_hos_violations, the Celery tasks, ...): duration, records and
+  outcome
+
+Comparing phase durations with the Geotab request, store and rate-limiter
+times shows which stage limits how often a sync can run.
+
+Celery workers are separate processes. With ELD_METRICS_DIR set, every
+process writes its metrics to <dir>/<pid>.json after each task, and
+render_metrics() merges them, so the Flask app's /metrics also covers the
+workers. Phases can also become tracing spans (ELD_TRACING): OpenTelemetry
+spans if opentelemetry is installed ('otel'), or log lines ('log').
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional, Any, Callable, Iterator, Tuple
+
+# Optional dependencies - only import if available
+try:
+    from opentelemetry import trace
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+# Metrics on/off (store instrumentation is applied when store classes are defined),
+# snapshot directory shared by processes, and span output: '', 'log' or 'otel'
+ELD_METRICS = os.environ.get("ELD_METRICS", "true").lower() == "true"
+ELD_METRICS_DIR = os.environ.get("ELD_METRICS_DIR")
+ELD_TRACING = os.environ.get("ELD_TRACING", "").lower()
+
+if ELD_TRACING == "otel" and not OTEL_AVAILABLE:
+    logging.warning("ELD_TRACING=otel needs opentelemetry-api; phase spans are not traced")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans Geotab round trips and store operations through whole syncs
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+class Counter:
+    """Monotonic counter per label combination"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        self.inc_series(tuple(str(labels[name]) for name in self.labelnames), amount)
+
+    def inc_series(self, key: LabelValues, amount: float = 1.0):
+        """inc() with the label values already in labelnames order"""
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[List[Any]]:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+class Histogram:
+    """Bucketed observations (with sum and count) per label combination"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[LabelValues, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        self.observe_series(tuple(str(labels[name]) for name in self.labelnames), value)
+
+    def observe_series(self, key: LabelValues, value: float):
+        """observe() with the label values already in labelnames order"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> List[List[Any]]:
+        with self._lock:
+            return [[list(key), list(counts), total, count]
+                    for key, (counts, total, count) in self._values.items()]
+
+class MetricsRegistry:
+    """Named metrics of this process, with snapshot and merge for multi-process export"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help: str, labelnames: Tuple[str, ...], **options):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **options)
+            elif not isinstance(metric, cls) or metric.labelnames != labelnames:
+                raise ValueError(f"Metric {name} is already registered with another type or labels")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable state of every metric"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        snapshot = {}
+        for metric in metrics:
+            entry = {"type": metric.kind, "help": metric.help, "labels": list(metric.labelnames),
+                     "samples": metric.samples()}
+            if metric.kind == "histogram":
+                entry["buckets"] = list(metric.buckets)
+            snapshot[metric.name] = entry
+        return snapshot
+
+def merge_snapshots(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum snapshots of several processes, series by series"""
+    merged: Dict[str, Any] = {}
+    for snapshot in snapshots:
+        for name, entry in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                merged[name] = target = {key: value for key, value in entry.items() if key != "samples"}
+                target["series"] = {}
+            elif target.get("buckets") != entry.get("buckets"):
+                logging.warning(f"Skipping metric {name} with different buckets")
+                continue
+            series = target["series"]
+            for sample in entry["samples"]:
+                key = tuple(sample[0])
+                if entry["type"] == "histogram":
+                    counts, total, count = series.get(key) or ([0] * len(sample[1]), 0.0, 0)
+                    series[key] = ([a + b for a, b in zip(counts, sample[1])],
+                                   total + sample[2], count + sample[3])
+                else:
+                    series[key] = series.get(key, 0.0) + sample[1]
+    return merged
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names: List[str], values: Any, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+def render_prometheus(merged: Dict[str, Any]) -> str:
+    """Prometheus text exposition (format 0.0.4) of merged snapshots"""
+    lines = []
+    for name in sorted(merged):
+        entry = merged[name]
+        lines.append(f"# HELP {name} {entry['help']}")
+        lines.append(f"# TYPE {name} {entry['type']}")
+        labelnames = entry["labels"]
+        for key in sorted(entry["series"]):
+            value = entry["series"][key]
+            if entry["type"] != "histogram":
+                lines.append(f"{name}{_labels(labelnames, key)} {_number(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(list(entry["buckets"]) + ["+Inf"], counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else _number(bound)
+                lines.append(f"{name}_bucket{_labels(labelnames, key, ('le', le))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labelnames, key)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(labelnames, key)} {count}")
+    return "\n".join(lines) + "\n"
+
+_registry = MetricsRegistry()
+
+def get_metrics_registry() -> MetricsRegistry:
+    return _registry
+
+def write_metrics_snapshot(directory: Optional[str] = None):
+    """Save this process's metrics to <directory>/<pid>.json for render_metrics in other processes"""
+    directory = directory or ELD_METRICS_DIR
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{os.getpid()}.json")
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as out:
+        json.dump(_registry.snapshot(), out, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+def render_metrics(directory: Optional[str] = None) -> str:
+    """This process's metrics merged with the snapshots other processes wrote, as Prometheus text"""
+    directory = directory or ELD_METRICS_DIR
+    snapshots = [_registry.snapshot()]
+    if directory and os.path.isdir(directory):
+        own = f"{os.getpid()}.json"
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".json") or filename == own:
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as snapshot:
+                    snapshots.append(json.load(snapshot))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Skipping metrics snapshot {filename}: {e}")
+    return render_prometheus(merge_snapshots(snapshots))
+
+# --- Pipeline Metrics ---
+GEOTAB_REQUESTS = _registry.counter(
+    "eld_geotab_requests_total", "Geotab HTTP requests by method and outcome (ok, retry, error, circuit_open)",
+    ("method", "outcome"))
+GEOTAB_REQUEST_SECONDS = _registry.histogram(
+    "eld_geotab_request_duration_seconds", "Geotab HTTP request latency", ("method",))
+GEOTAB_RATE_LIMIT_WAIT_SECONDS = _registry.histogram(
+    "eld_geotab_rate_limit_wait_seconds", "Time Geotab requests waited for the per-credential rate limiter",
+    ("method",))
+STORE_OPERATION_SECONDS = _registry.histogram(
+    "eld_store_operation_duration_seconds", "Data store operation latency", ("store", "operation"))
+STORE_RECORDS = _registry.counter(
+    "eld_store_records_total", "Records written or read by data store operations", ("store", "operation"))
+PHASE_SECONDS = _registry.histogram(
+    "eld_phase_duration_seconds", "Pipeline phase duration", ("phase",))
+PHASE_RECORDS = _registry.counter(
+    "eld_phase_records_total", "Records moved by pipeline phases", ("phase",))
+PHASE_RUNS = _registry.counter(
+    "eld_phase_runs_total", "Pipeline phase runs by outcome (ok, error)", ("phase", "outcome"))
+INGEST_QUEUE_WAIT_SECONDS = _registry.histogram(
+    "eld_ingest_queue_wait_seconds", "Time ingest fetchers waited for the store writer to take a page")
+
+def observe_geotab_request(method: str, outcome: str, seconds: Optional[float] = None):
+    """One Geotab request attempt; no duration for requests the circuit breaker refused"""
+    if not ELD_METRICS:
+        return
+    GEOTAB_REQUESTS.inc(method=method, outcome=outcome)
+    if seconds is not None:
+        GEOTAB_REQUEST_SECONDS.observe(seconds, method=method)
+
+def observe_rate_limit_wait(method: str, seconds: float):
+    if ELD_METRICS:
+        GEOTAB_RATE_LIMIT_WAIT_SECONDS.observe(seconds, method=method)
+
+# --- Store Operations ---
+class _StoreCallState(threading.local):
+    active = False
+
+_in_store_operation = _StoreCallState()
+
+def _record_count(result: Any) -> int:
+    """Records moved by a store call: batch counts, single-record flags, lists and pages"""
+    if isinstance(result, bool):
+        return int(result)
+    if isinstance(result, int):
+        return result
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        return len(result[0])
+    if isinstance(result, (list, dict)):
+        return len(result)
+    return 0
+
+def instrument_store_operation(func: Callable) -> Callable:
+    """
+    Time a data store method. Only the outermost store call is recorded, so
+    a batch write is not also counted as the single writes it delegates to.
+    """
+    operation = func.__name__
+    clock = time.perf_counter
+
+    @wraps(func)
+    def timed(self, *args, **kwargs):
+        if _in_store_operation.active:
+            return func(self, *args, **kwargs)
+        _in_store_operation.active = True
+        started = clock()
+        try:
+            result = func(self, *args, **kwargs)
+        finally:
+            _in_store_operation.active = False
+        key = (type(self).__name__, operation)
+        STORE_OPERATION_SECONDS.observe_series(key, clock() - started)
+        STORE_RECORDS.inc_series(key, _record_count(result))
+        return result
+    timed.__instrumented__ = True
+    return timed
+
+# --- Phases and Tracing ---
+_phase_path: ContextVar[Tuple[str, ...]] = ContextVar("eld_phase_path", default=())
+
+class PhaseSpan:
+    """Handle of a running phase; set `records` to the number of records it moved"""
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.records: Optional[int] = None
+
+def _otel_span(name: str, attributes: Dict[str, Any]):
+    tracer = trace.get_tracer("rapid_eld")
+    return tracer.start_as_current_span(
+        name, attributes={key: value for key, value in attributes.items() if value is not None})
+
+@contextmanager
+def phase(name: str, **attributes) -> Iterator[PhaseSpan]:
+    """
+    Time one pipeline phase (metrics, plus a tracing span when ELD_TRACING is
+    set). Phases nest; the span path (e.g. fetch_eld_data/sync_feeds) is
+    logged with the span.
+    """
+    span = PhaseSpan(name, attributes)
+    path = _phase_path.get() + (name,)
+    token = _phase_path.set(path)
+    otel = _otel_span(name, attributes) if ELD_TRACING == "otel" and OTEL_AVAILABLE else None
+    otel_span = otel.__enter__() if otel is not None else None
+    started = time.perf_counter()
+    error: Optional[BaseException] = None
+    try:
+        yield span
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        outcome = "ok" if error is None else "error"
+        seconds = time.perf_counter() - started
+        _phase_path.reset(token)
+        if ELD_METRICS:
+            PHASE_SECONDS.observe(seconds, phase=name)
+            PHASE_RUNS.inc(phase=name, outcome=outcome)
+            if span.records is not None:
+                PHASE_RECORDS.inc(span.records, phase=name)
+        if otel_span is not None:
+            if span.records is not None:
+                otel_span.set_attribute("eld.records", span.records)
+            otel.__exit__(type(error) if error else None, error, error.__traceback__ if error else None)
+        elif ELD_TRACING == "log":
+            details = "".join(f" {key}={value}" for key, value in attributes.items())
+            records = "" if span.records is None else f" records={span.records}"
+            logging.info(f"span {'/'.join(path)} {seconds * 1000:.1f} ms {outcome}{records}{details}")
+
+def traced_phase(name: Optional[str] = None, count: Optional[Callable[[Any], int]] = None):
+    """Decorator running a function as a phase; `count` maps its result to the records moved"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name or func.__name__) as span:
+                result = func(*args, **kwargs)
+                if count is not None:
+                    span.records = count(result)
+                return result
+        return wrapper
+    return decorator
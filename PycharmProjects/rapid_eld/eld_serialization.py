@@ -0,0 +1,78 @@
+"""
+Fast JSON Serialization
+Bulk encoding of ELD records and SQL result rows straight to JSON bytes.
+
+Read-only list endpoints take column-projected row tuples from SQL stores
+(e.g. FlaskELDDataStore.hos_log_rows) and encode them here, without building
+ORM objects, per-row dicts of isoformat() strings, or a second encoding pass
+in jsonify. orjson is used when installed; it encodes datetimes natively,
+with the same text as datetime.isoformat(). Without it the standard library
+encoder produces the same output.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Sequence
+
+# Optional dependencies - only import if available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# NDJSON records per streamed chunk
+NDJSON_BATCH_SIZE = 500
+
+def json_default(value: Any) -> Any:
+    """Encode values JSON has no type for: dates as ISO-8601, decimals as numbers, the rest as strings"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+_encoder = json.JSONEncoder(default=json_default, ensure_ascii=False, separators=(',', ':'))
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def encode_json(value: Any) -> bytes:
+        """Encode a value as compact UTF-8 JSON"""
+        return orjson.dumps(value, default=json_default, option=_ORJSON_OPTIONS)
+else:
+    def encode_json(value: Any) -> bytes:
+        """Encode a value as compact UTF-8 JSON"""
+        return _encoder.encode(value).encode()
+
+def rows_to_records(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Row tuples as dicts keyed by column name, values left as read (datetimes included)"""
+    return [dict(zip(columns, row)) for row in rows]
+
+def encode_rows(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> bytes:
+    """JSON array of objects from row tuples"""
+    return encode_json(rows_to_records(columns, rows))
+
+def encode_page(items: List[Dict[str, Any]], next_cursor: Optional[str]) -> bytes:
+    """Keyset page body: {"items": [...], "next_cursor": ...}"""
+    return encode_json({"items": items, "next_cursor": next_cursor})
+
+def iter_ndjson(records: Iterable[Dict[str, Any]],
+                batch_size: int = NDJSON_BATCH_SIZE) -> Iterator[bytes]:
+    """Newline-delimited JSON, `batch_size` records per yielded chunk"""
+    chunk: List[bytes] = []
+    for record in records:
+        chunk.append(encode_json(record))
+        if len(chunk) >= batch_size:
+            chunk.append(b'')
+            yield b'\n'.join(chunk)
+            chunk = []
+    if chunk:
+        chunk.append(b'')
+        yield b'\n'.join(chunk)
+
+def iter_ndjson_rows(columns: Sequence[str], rows: Iterable[Sequence[Any]],
+                     batch_size: int = NDJSON_BATCH_SIZE) -> Iterator[bytes]:
+    """Newline-delimited JSON objects from row tuples"""
+    return iter_ndjson((dict(zip(columns, row)) for row in rows), batch_size)
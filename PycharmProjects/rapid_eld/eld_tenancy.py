@@ -0,0 +1,117 @@
+"""
+Multi-Tenant Store Routing
+Per-company ELD data stores, selected from the request or task context.
+
+Each company (models.Company) gets its own data store instance: its own
+SQLite file, its own Flask-SQLAlchemy bind (a separate database with its own
+engine and connection pool), or its own in-memory store. Queries never scan
+another carrier's rows, a large carrier's load stays on its own database,
+and every per-store structure (HOS status cache, duty timelines, event
+publisher) is per company too.
+
+The current company is a context variable. The Flask blueprint sets it from
+the request, and Celery tasks and the ingest pipeline from their arguments.
+rapid_eld.get_data_store() then returns that company's store. Without
+registered tenants, or outside a company context, the process-wide store is
+used as before.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional, Any, Callable
+
+# Request header naming the company (the `company_id` query argument also works)
+ELD_COMPANY_HEADER = os.environ.get("ELD_COMPANY_HEADER", "X-Company-ID")
+
+_current_company: ContextVar[Optional[str]] = ContextVar("eld_company_id", default=None)
+
+class UnknownTenantError(LookupError):
+    """No data store is registered, or can be created, for a company"""
+
+def current_company_id() -> Optional[str]:
+    """Company of the current request or task, if any"""
+    return _current_company.get()
+
+def set_current_company(company_id: Optional[str]) -> Token:
+    """Enter a company's context; pass the token to reset_current_company to leave it"""
+    return _current_company.set(company_id)
+
+def reset_current_company(token: Token):
+    _current_company.reset(token)
+
+@contextmanager
+def company_scope(company_id: Optional[str]):
+    """Run a block in a company's context (None: no company)"""
+    token = _current_company.set(company_id)
+    try:
+        yield
+    finally:
+        _current_company.reset(token)
+
+class TenantStoreRegistry:
+    """
+    Company id -> data store. Stores are registered up front, or created on
+    first use by `factory(company_id)`; a factory returning None marks the
+    company as unknown.
+    """
+
+    def __init__(self, factory: Optional[Callable[[str], Any]] = None):
+        self.factory = factory
+        self._stores: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether requests are routed to tenant stores at all"""
+        return self.factory is not None or bool(self._stores)
+
+    def register(self, company_id: str, store: Any):
+        with self._lock:
+            self._stores[company_id] = store
+
+    def unregister(self, company_id: str) -> Optional[Any]:
+        with self._lock:
+            return self._stores.pop(company_id, None)
+
+    def get(self, company_id: str) -> Any:
+        store = self._stores.get(company_id)
+        if store is not None:
+            return store
+        if self.factory is None:
+            raise UnknownTenantError(company_id)
+        with self._lock:
+            store = self._stores.get(company_id)
+            if store is None:
+                store = self.factory(company_id)
+                if store is None:
+                    raise UnknownTenantError(company_id)
+                self._stores[company_id] = store
+        return store
+
+    def companies(self) -> List[str]:
+        """Companies with a store so far"""
+        with self._lock:
+            return list(self._stores)
+
+    def stores(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stores)
+
+_registry = TenantStoreRegistry()
+
+def get_tenant_registry() -> TenantStoreRegistry:
+    return _registry
+
+def register_tenant_store(company_id: str, store: Any):
+    """Route a company's requests and tasks to `store`"""
+    _registry.register(company_id, store)
+
+def set_tenant_store_factory(factory: Optional[Callable[[str], Any]]):
+    """Create a company's store on first use, e.g. lambda company: SQLiteELDDataStore(f"{company}.db")"""
+    _registry.factory = factory
+
+def routed_company_id() -> Optional[str]:
+    """The current company when tenant stores are in use; None when the process-wide store serves it"""
+    return current_company_id() if _registry.enabled else None
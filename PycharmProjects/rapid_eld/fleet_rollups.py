@@ -0,0 +1,135 @@
+"""
+Fleet Compliance Rollups
+Aggregates behind the fleet dashboard endpoints, maintained as records arrive.
+
+Each rollup is a set of small JSON entries in the data store
+(ELDDataStore.get_rollups / store_rollups):
+- driver_status: driver id -> HOS status (hours remaining per limit) as of
+  the latest violation check, written from the check's results
+- vehicle_defects: vehicle id -> open defects from the vehicle's latest DVIR
+- violations_daily: UTC date -> violations first detected that day, by rule
+
+ELDService updates them whenever DVIRs are stored, after each violation check
+and when violation alerts are recorded. The dashboard endpoints then read one
+entry per driver, vehicle or day instead of the log history.
+ELDService.rebuild_fleet_rollups() recomputes them from the stored records,
+e.g. after upgrading a database that already has history.
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Any, Iterable, Set
+
+from hos_rules import to_epoch_seconds
+
+ROLLUP_DRIVER_STATUS = "driver_status"
+ROLLUP_VEHICLE_DEFECTS = "vehicle_defects"
+ROLLUP_VIOLATIONS_DAILY = "violations_daily"
+FLEET_ROLLUPS = (ROLLUP_DRIVER_STATUS, ROLLUP_VEHICLE_DEFECTS, ROLLUP_VIOLATIONS_DAILY)
+
+# Hours remaining (on the tightest limit) at or below which a driver is near a limit
+FLEET_NEAR_LIMIT_HOURS = float(os.environ.get("FLEET_NEAR_LIMIT_HOURS", "1"))
+
+def _iso(value: Any) -> Optional[str]:
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+# --- Updates ---
+def driver_status_entries(statuses: Iterable[Optional[Dict[str, Any]]],
+                          as_of: datetime) -> Dict[str, Dict[str, Any]]:
+    """driver_status entries from HOS status dicts (hos_rules status entries)"""
+    return {status['driverId']: {**status, "asOf": as_of.isoformat()}
+            for status in statuses if status and status.get('driverId')}
+
+def vehicle_defect_updates(current: Dict[str, Dict[str, Any]],
+                           reports: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Changed vehicle_defects entries after `reports` arrive. A vehicle's entry
+    follows its latest inspection: a later report, or a new version of the
+    same report, replaces it; an older report is ignored.
+    """
+    changed: Dict[str, Dict[str, Any]] = {}
+    for report in reports:
+        vehicle_id = report.get('vehicle_id')
+        inspected = to_epoch_seconds(report.get('inspection_date'))
+        if not vehicle_id or inspected is None:
+            continue
+        report_id = report.get('source_id', report.get('id'))
+        entry = changed.get(vehicle_id) or current.get(vehicle_id)
+        if (entry is not None and inspected < to_epoch_seconds(entry['lastInspection'])
+                and (report_id is None or report_id != entry.get('reportId'))):
+            continue
+        defects = list(report.get('defects') or [])
+        changed[vehicle_id] = {
+            "vehicleId": vehicle_id,
+            "openDefects": defects,
+            "defectCount": len(defects),
+            "isSafeToDrive": bool(report.get('is_safe_to_drive', not defects)),
+            "lastInspection": _iso(report.get('inspection_date')),
+            "driverId": report.get('driver_id'),
+            "reportId": report_id,
+        }
+    return changed
+
+def violation_days(violations: Iterable[Dict[str, Any]]) -> Set[str]:
+    """violations_daily keys touched by `violations`"""
+    return {day for day in map(_violation_day, violations) if day is not None}
+
+def _violation_day(violation: Dict[str, Any]) -> Optional[str]:
+    occurred = violation.get('occurred_at')
+    if isinstance(occurred, str):
+        occurred = datetime.fromisoformat(occurred.replace('Z', '+00:00'))
+    return occurred.date().isoformat() if occurred is not None else None
+
+def violation_day_updates(current: Dict[str, Dict[str, Any]],
+                          violations: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """violations_daily entries with `violations` counted in"""
+    changed: Dict[str, Dict[str, Any]] = {}
+    for violation in violations:
+        day = _violation_day(violation)
+        if day is None:
+            continue
+        entry = changed.get(day)
+        if entry is None:
+            stored = current.get(day) or {"date": day, "total": 0, "byRule": {}}
+            entry = changed[day] = {**stored, "byRule": dict(stored["byRule"])}
+        rule = violation.get('rule') or 'unknown'
+        entry["total"] += 1
+        entry["byRule"][rule] = entry["byRule"].get(rule, 0) + 1
+    return changed
+
+# --- Reads ---
+def drivers_near_limit(entries: Dict[str, Dict[str, Any]],
+                       hours: float = FLEET_NEAR_LIMIT_HOURS) -> List[Dict[str, Any]]:
+    """Drivers with at most `hours` left on their tightest limit, tightest first"""
+    near = [entry for entry in entries.values() if entry.get('hoursRemaining', 0) <= hours]
+    return sorted(near, key=lambda entry: (entry.get('hoursRemaining', 0), entry['driverId']))
+
+def vehicles_with_defects(entries: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Vehicles whose latest DVIR has open defects, most defects first"""
+    open_entries = [entry for entry in entries.values() if entry.get('defectCount')]
+    return sorted(open_entries, key=lambda entry: (-entry['defectCount'], entry['vehicleId']))
+
+def day_keys(end: date, days: int) -> List[str]:
+    """violations_daily keys of the `days` days ending with `end`, oldest first"""
+    return [(end - timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1)]
+
+def violations_series(entries: Dict[str, Dict[str, Any]], keys: List[str]) -> List[Dict[str, Any]]:
+    """One entry per day key, with zero counts for days without violations"""
+    return [entries.get(day) or {"date": day, "total": 0, "byRule": {}} for day in keys]
+
+def fleet_overview(drivers: Dict[str, Dict[str, Any]], vehicles: Dict[str, Dict[str, Any]],
+                   days: List[Dict[str, Any]], hours: float = FLEET_NEAR_LIMIT_HOURS) -> Dict[str, Any]:
+    """Dashboard summary of the three rollups; `days` is a violations_series, oldest first"""
+    with_defects = vehicles_with_defects(vehicles)
+    return {
+        "drivers": len(drivers),
+        "driversNearLimit": len(drivers_near_limit(drivers, hours)),
+        "driversOutOfHours": sum(1 for entry in drivers.values() if entry.get('hoursRemaining', 0) <= 0),
+        "driving": sum(1 for entry in drivers.values() if entry.get('status') == 'driving'),
+        "vehiclesWithDefects": len(with_defects),
+        "openDefects": sum(entry['defectCount'] for entry in with_defects),
+        "vehiclesUnsafe": sum(1 for entry in vehicles.values() if not entry.get('isSafeToDrive', True)),
+        "violationsToday": days[-1]["total"] if days else 0,
+        "violationsInPeriod": sum(day["total"] for day in days),
+        "statusAsOf": max((entry.get('asOf') for entry in drivers.values()), default=None),
+    }
@@ -0,0 +1,399 @@
+"""
+Geotab API Client
+Pooled, session-reusing JSON-RPC client for the Geotab API (MyGeotab).
+
+The client keeps one HTTP session (keep-alive connection pool), authenticates
+once and reuses the returned session id for every call, and can batch several
+method calls into a single ExecuteMultiCall round trip.
+
+Every HTTP request goes through the resilience layer in geotab_resilience:
+a per-credential rate limiter, a per-server circuit breaker, and jittered
+exponential retries of transient failures within a per-server retry budget.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Any, Tuple
+
+from eld_metrics import observe_geotab_request, observe_rate_limit_wait
+from geotab_resilience import (
+    RetryPolicy, RetryBudget, CircuitBreaker, TokenBucket,
+    get_rate_limiter, get_circuit_breaker, get_retry_budget,
+)
+
+# Optional dependencies - only import if available
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+DEFAULT_GEOTAB_SERVER = "my.geotab.com"
+
+# JSON-RPC errors worth retrying; OverLimitException also pauses the credential's rate limiter
+RATE_LIMIT_ERRORS = {"OverLimitException"}
+TRANSIENT_ERRORS = RATE_LIMIT_ERRORS | {"DbUnavailableException", "ServiceUnavailableException"}
+
+class GeotabAPIError(Exception):
+    """
+    Raised when a Geotab call fails at the HTTP or JSON-RPC level.
+    `transient` errors (network failures, timeouts, HTTP 429/5xx, overload
+    errors) are retried; `retry_after` carries the server's Retry-After.
+    """
+
+    def __init__(self, message: str, name: Optional[str] = None, transient: bool = False,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.name = name
+        self.transient = transient
+        self.retry_after = retry_after
+
+class GeotabCircuitOpenError(GeotabAPIError):
+    """Raised without calling Geotab while the server's circuit breaker is open"""
+
+def _http_error(method: str, status: int, reason: str, retry_after: Optional[str]) -> GeotabAPIError:
+    name = "OverLimitException" if status == 429 else None
+    return GeotabAPIError(f"Geotab API call failed for method {method}: HTTP {status} {reason}",
+                          name=name, transient=status == 429 or status >= 500,
+                          retry_after=_parse_retry_after(retry_after))
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header (seconds or HTTP date) as seconds from now"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+class _ResilientCalls:
+    """Rate limiting, circuit breaking and retry bookkeeping shared by both clients"""
+
+    def _init_resilience(self, retry_policy: Optional[RetryPolicy], rate_limiter: Optional[TokenBucket],
+                         circuit_breaker: Optional[CircuitBreaker], retry_budget: Optional[RetryBudget]):
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter or get_rate_limiter(self.database, self.username)
+        self._circuit_breaker = circuit_breaker
+        self._retry_budget = retry_budget
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        # Resolved per call: authentication may move the client to another server
+        return self._circuit_breaker or get_circuit_breaker(self.server)
+
+    @property
+    def retry_budget(self) -> RetryBudget:
+        return self._retry_budget or get_retry_budget(self.server)
+
+    def _admit(self, method: str, retry: int) -> float:
+        """Fail fast while the server's breaker is open; otherwise return the rate limiter's wait"""
+        breaker = self.circuit_breaker
+        if not breaker.allow():
+            observe_geotab_request(method, "circuit_open")
+            raise GeotabCircuitOpenError(f"Geotab server {self.server} is unavailable, not calling "
+                                         f"{method} (retry in {breaker.retry_in():.1f}s)")
+        if retry == 0:
+            self.retry_budget.record_call()
+        wait = self.rate_limiter.reserve()
+        observe_rate_limit_wait(method, wait)
+        return wait
+
+    def _settle(self, method: str, error: Optional[GeotabAPIError], retry: int,
+                seconds: float) -> Optional[float]:
+        """Record an attempt's outcome; returns the delay before the next retry, or None to stop"""
+        delay = self._next_delay(error, retry)
+        outcome = "ok" if error is None else "error" if delay is None else "retry"
+        observe_geotab_request(method, outcome, seconds)
+        return delay
+
+    def _next_delay(self, error: Optional[GeotabAPIError], retry: int) -> Optional[float]:
+        breaker = self.circuit_breaker
+        if error is None or not error.transient:
+            # The server answered, even if it rejected the call
+            breaker.record_success()
+            return None
+        delay = self.retry_policy.delay(retry, error.retry_after)
+        if error.name in RATE_LIMIT_ERRORS:
+            breaker.record_success()
+            self.rate_limiter.pause(delay)
+        else:
+            breaker.record_failure()
+        if retry + 1 >= self.retry_policy.max_attempts or not self.retry_budget.try_retry():
+            return None
+        return delay
+
+class GeotabClient(_ResilientCalls):
+    """
+    Authenticated Geotab API client.
+
+    Args:
+        database (str): Geotab database name.
+        username (str): Geotab user name.
+        password (str): Geotab password or API key.
+        server (str): Geotab server host; updated after authentication if the
+            database lives on another server.
+        timeout (int): Per-request timeout in seconds.
+        pool_size (int): Maximum pooled connections per host.
+        retry_policy, rate_limiter, circuit_breaker, retry_budget: Override the
+            defaults and the instances shared per credential and per server.
+    """
+
+    def __init__(self, database: Optional[str] = None, username: Optional[str] = None,
+                 password: Optional[str] = None, server: str = DEFAULT_GEOTAB_SERVER,
+                 timeout: int = 30, pool_size: int = 10, retry_policy: Optional[RetryPolicy] = None,
+                 rate_limiter: Optional[TokenBucket] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 retry_budget: Optional[RetryBudget] = None):
+        self.database = database
+        self.username = username
+        self.password = password
+        self.server = server
+        self.timeout = timeout
+        self.credentials: Optional[Dict[str, Any]] = None
+        self._auth_lock = threading.Lock()
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+        self._init_resilience(retry_policy, rate_limiter, circuit_breaker, retry_budget)
+
+    @classmethod
+    def from_env(cls) -> 'GeotabClient':
+        """Create a client from the GEOTAB_* environment variables"""
+        return cls(
+            database=os.environ.get("GEOTAB_DATABASE"),
+            username=os.environ.get("GEOTAB_USERNAME"),
+            password=os.environ.get("GEOTAB_API_KEY"),
+            server=os.environ.get("GEOTAB_SERVER", DEFAULT_GEOTAB_SERVER),
+        )
+
+    @property
+    def url(self) -> str:
+        if self.server.startswith(("http://", "https://")):
+            return f"{self.server.rstrip('/')}/apiv1"
+        return f"https://{self.server}/apiv1"
+
+    def _post(self, method: str, params: Dict[str, Any]) -> Any:
+        retry = 0
+        while True:
+            wait = self._admit(method, retry)
+            if wait:
+                time.sleep(wait)
+            started = time.perf_counter()
+            try:
+                result = self._send(method, params)
+            except GeotabAPIError as e:
+                delay = self._settle(method, e, retry, time.perf_counter() - started)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                retry += 1
+                continue
+            self._settle(method, None, retry, time.perf_counter() - started)
+            return result
+
+    def _send(self, method: str, params: Dict[str, Any]) -> Any:
+        try:
+            response = self.http.post(self.url, json={"method": method, "params": params},
+                                      timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise GeotabAPIError(f"Geotab API call failed for method {method}: {e}",
+                                 transient=True) from e
+        if response.status_code >= 400:
+            raise _http_error(method, response.status_code, response.reason,
+                              response.headers.get("Retry-After"))
+        try:
+            body = response.json()
+        except ValueError as e:
+            # Typically an error page from a proxy in front of an overloaded server
+            raise GeotabAPIError(f"Geotab API call failed for method {method}: {e}",
+                                 transient=True) from e
+        return _parse_response(method, body)
+
+    def authenticate(self) -> Dict[str, Any]:
+        """Authenticate with the password and cache the returned session credentials"""
+        with self._auth_lock:
+            result = self._post("Authenticate", {
+                "database": self.database,
+                "userName": self.username,
+                "password": self.password,
+            })
+            path = result.get("path")
+            if path and path != "ThisServer":
+                self.server = path
+            self.credentials = result["credentials"]
+            return self.credentials
+
+    def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Call one API method with the cached session, re-authenticating once if it expired"""
+        return self._with_session(method, dict(params or {}))
+
+    def multi_call(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """
+        Execute several method calls in one ExecuteMultiCall round trip.
+
+        Args:
+            calls: (method, params) pairs.
+
+        Returns:
+            list: One result per call, in order.
+        """
+        if not calls:
+            return []
+        if len(calls) == 1:
+            return [self.call(*calls[0])]
+        return self._with_session("ExecuteMultiCall", {
+            "calls": [{"method": method, "params": params} for method, params in calls],
+        })
+
+    def _with_session(self, method: str, params: Dict[str, Any]) -> Any:
+        credentials = self.credentials or self.authenticate()
+        try:
+            return self._post(method, {**params, "credentials": credentials})
+        except GeotabAPIError as e:
+            if e.name != "InvalidUserException":
+                raise
+        # Session expired: authenticate again and retry once
+        return self._post(method, {**params, "credentials": self.authenticate()})
+
+    def close(self):
+        self.http.close()
+
+def _parse_response(method: str, body: Dict[str, Any]) -> Any:
+    error = body.get("error")
+    if error:
+        errors = error.get("errors") or [{}]
+        name = errors[0].get("name") or error.get("name")
+        raise GeotabAPIError(f"Geotab API call {method} returned {name}: "
+                             f"{error.get('message', '')}", name=name,
+                             transient=name in TRANSIENT_ERRORS)
+    return body.get("result")
+
+# --- Async Client (Optional) ---
+class AsyncGeotabClient(_ResilientCalls):
+    """
+    asyncio counterpart of GeotabClient built on aiohttp.
+
+    Many clients can share one aiohttp.ClientSession (and its connection
+    pool) by passing it in; otherwise the client opens its own on first use.
+    """
+
+    def __init__(self, database: Optional[str] = None, username: Optional[str] = None,
+                 password: Optional[str] = None, server: str = DEFAULT_GEOTAB_SERVER,
+                 timeout: int = 30, session: Optional['aiohttp.ClientSession'] = None,
+                 retry_policy: Optional[RetryPolicy] = None, rate_limiter: Optional[TokenBucket] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 retry_budget: Optional[RetryBudget] = None):
+        if not AIOHTTP_AVAILABLE:
+            raise ImportError("aiohttp is required for AsyncGeotabClient")
+        self.database = database
+        self.username = username
+        self.password = password
+        self.server = server
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.credentials: Optional[Dict[str, Any]] = None
+        self.http = session
+        self._owns_session = session is None
+        self._init_resilience(retry_policy, rate_limiter, circuit_breaker, retry_budget)
+
+    url = GeotabClient.url
+
+    async def _post(self, method: str, params: Dict[str, Any]) -> Any:
+        retry = 0
+        while True:
+            wait = self._admit(method, retry)
+            if wait:
+                await asyncio.sleep(wait)
+            started = time.perf_counter()
+            try:
+                result = await self._send(method, params)
+            except GeotabAPIError as e:
+                delay = self._settle(method, e, retry, time.perf_counter() - started)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                retry += 1
+                continue
+            self._settle(method, None, retry, time.perf_counter() - started)
+            return result
+
+    async def _send(self, method: str, params: Dict[str, Any]) -> Any:
+        if self.http is None:
+            self.http = aiohttp.ClientSession()
+        try:
+            async with self.http.post(self.url, json={"method": method, "params": params},
+                                      timeout=self.timeout) as response:
+                if response.status >= 400:
+                    raise _http_error(method, response.status, response.reason or "",
+                                      response.headers.get("Retry-After"))
+                try:
+                    body = await response.json(content_type=None)
+                except ValueError as e:
+                    raise GeotabAPIError(f"Geotab API call failed for method {method}: {e}",
+                                         transient=True) from e
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise GeotabAPIError(f"Geotab API call failed for method {method}: {e}",
+                                 transient=True) from e
+        return _parse_response(method, body)
+
+    async def authenticate(self) -> Dict[str, Any]:
+        result = await self._post("Authenticate", {
+            "database": self.database,
+            "userName": self.username,
+            "password": self.password,
+        })
+        path = result.get("path")
+        if path and path != "ThisServer":
+            self.server = path
+        self.credentials = result["credentials"]
+        return self.credentials
+
+    async def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return await self._with_session(method, dict(params or {}))
+
+    async def multi_call(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        if not calls:
+            return []
+        if len(calls) == 1:
+            return [await self.call(*calls[0])]
+        return await self._with_session("ExecuteMultiCall", {
+            "calls": [{"method": method, "params": params} for method, params in calls],
+        })
+
+    async def _with_session(self, method: str, params: Dict[str, Any]) -> Any:
+        credentials = self.credentials or await self.authenticate()
+        try:
+            return await self._post(method, {**params, "credentials": credentials})
+        except GeotabAPIError as e:
+            if e.name != "InvalidUserException":
+                raise
+        return await self._post(method, {**params, "credentials": await self.authenticate()})
+
+    async def close(self):
+        if self._owns_session and self.http is not None:
+            await self.http.close()
+
+# --- Shared Client Instance ---
+_client: Optional[GeotabClient] = None
+
+def set_geotab_client(client: GeotabClient):
+    """Set the shared Geotab client instance"""
+    global _client
+    _client = client
+
+def get_geotab_client() -> GeotabClient:
+    """Get the shared Geotab client instance, created from the environment on first use"""
+    global _client
+    if _client is None:
+        _client = GeotabClient.from_env()
+    return _client
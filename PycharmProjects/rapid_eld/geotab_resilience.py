@@ -0,0 +1,218 @@
+"""
+Geotab Call Resilience
+Retry, circuit breaker and rate limiting primitives for the Geotab clients.
+
+- RetryPolicy: capped exponential backoff with full jitter, so clients that
+  failed together do not retry together.
+- RetryBudget: retries may add at most `ratio` of the recent request volume
+  (plus a small floor), so an outage cannot multiply the load on Geotab.
+- CircuitBreaker: after `failure_threshold` consecutive transient failures a
+  server is skipped for `reset_timeout` seconds, then one probe call decides
+  whether it is back.
+- TokenBucket: paces calls to the per-user rate Geotab permits. An
+  OverLimitException pauses the bucket, so every caller sharing the
+  credential backs off together instead of producing a burst of rejections.
+
+Limiters are shared per credential and breakers and budgets per server,
+across all clients in the process.
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Any, Callable, Hashable
+
+# Calls per second and burst allowed per Geotab credential
+GEOTAB_RATE_LIMIT = float(os.environ.get("GEOTAB_RATE_LIMIT", "10"))
+GEOTAB_RATE_BURST = float(os.environ.get("GEOTAB_RATE_BURST", "10"))
+# Attempts per call (first try included) and the share of calls that may be retries
+GEOTAB_MAX_ATTEMPTS = int(os.environ.get("GEOTAB_MAX_ATTEMPTS", "5"))
+GEOTAB_RETRY_BUDGET = float(os.environ.get("GEOTAB_RETRY_BUDGET", "0.2"))
+# Consecutive failures that open a server's breaker, and seconds until it is probed
+GEOTAB_BREAKER_THRESHOLD = int(os.environ.get("GEOTAB_BREAKER_THRESHOLD", "5"))
+GEOTAB_BREAKER_RESET = float(os.environ.get("GEOTAB_BREAKER_RESET", "30"))
+
+class RetryPolicy:
+    """
+    Capped exponential backoff with full jitter.
+
+    Args:
+        max_attempts (int): Attempts per call, the first one included.
+        base_delay (float): Backoff ceiling of the first retry, in seconds.
+        max_delay (float): Largest backoff ceiling, in seconds.
+    """
+
+    def __init__(self, max_attempts: int = GEOTAB_MAX_ATTEMPTS, base_delay: float = 0.5,
+                 max_delay: float = 30.0, rng: Optional[random.Random] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    def delay(self, retry: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number `retry` (0 for the first), at least `retry_after`"""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** retry)
+        return max(self._rng.uniform(0, ceiling), retry_after or 0.0)
+
+class RetryBudget:
+    """
+    Caps retries at `ratio` of the calls made in the last `window` seconds,
+    plus `min_per_second` so a quiet client can still retry.
+    """
+
+    def __init__(self, ratio: float = GEOTAB_RETRY_BUDGET, min_per_second: float = 1.0,
+                 window: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        self._calls: deque = deque()
+        self._retries: deque = deque()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        horizon = now - self.window
+        for events in (self._calls, self._retries):
+            while events and events[0] < horizon:
+                events.popleft()
+
+    def record_call(self):
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._calls.append(now)
+
+    def try_retry(self) -> bool:
+        """Spend one retry if the budget allows it"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            allowed = self.min_per_second * self.window + self.ratio * len(self._calls)
+            if len(self._retries) >= allowed:
+                return False
+            self._retries.append(now)
+            return True
+
+class CircuitBreaker:
+    """
+    Closed: calls pass. Open (after `failure_threshold` consecutive failures):
+    calls fail fast for `reset_timeout` seconds. Half-open: one probe call
+    passes; its success closes the breaker and its failure reopens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = GEOTAB_BREAKER_THRESHOLD,
+                 reset_timeout: float = GEOTAB_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go ahead now. Once `reset_timeout` has passed, one
+        caller gets through as the probe; a probe that never reports back is
+        replaced after another `reset_timeout`.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._opened_at = now
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets the next probe through"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens per second up to `capacity`.
+    reserve() books a token and returns how long the caller must wait for
+    it, so waiting callers are served in order at the bucket's rate.
+    """
+
+    def __init__(self, rate: float = GEOTAB_RATE_LIMIT, capacity: float = GEOTAB_RATE_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, possibly ahead of time; returns the seconds to wait before using it"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            if now > self._updated:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+            self._tokens -= 1
+            # _updated is in the future while the bucket is paused
+            wait = self._updated - now
+            if self._tokens < 0:
+                wait -= self._tokens / self.rate
+            return max(0.0, wait)
+
+    def acquire(self, sleep: Callable[[float], Any] = time.sleep):
+        wait = self.reserve()
+        if wait > 0:
+            sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold every caller for `seconds`, e.g. after Geotab reported the rate limit exceeded"""
+        with self._lock:
+            now = time.monotonic()
+            if now > self._updated:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            # Resume with an empty bucket rather than a burst
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = max(self._updated, now + seconds)
+
+# --- Shared Instances ---
+_rate_limiters: Dict[Hashable, TokenBucket] = {}
+_breakers: Dict[Hashable, CircuitBreaker] = {}
+_budgets: Dict[Hashable, RetryBudget] = {}
+_registry_lock = threading.Lock()
+
+def _shared(registry: Dict[Hashable, Any], key: Hashable, factory: Callable[[], Any]) -> Any:
+    with _registry_lock:
+        instance = registry.get(key)
+        if instance is None:
+            instance = registry[key] = factory()
+        return instance
+
+def get_rate_limiter(database: Optional[str], username: Optional[str]) -> TokenBucket:
+    """Token bucket shared by every client using this Geotab credential"""
+    return _shared(_rate_limiters, (database, username), TokenBucket)
+
+def get_circuit_breaker(server: str) -> CircuitBreaker:
+    """Circuit breaker shared by every client calling this Geotab server"""
+    return _shared(_breakers, server, CircuitBreaker)
+
+def get_retry_budget(server: str) -> RetryBudget:
+    """Retry budget shared by every client calling this Geotab server"""
+    return _shared(_budgets, server, RetryBudget)
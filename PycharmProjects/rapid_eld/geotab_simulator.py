@@ -0,0 +1,618 @@
+"""
+Geotab Stand-in Server and Fleet Simulator
+Local replacement for my.geotab.com for offline load and latency testing.
+
+FleetSimulator generates deterministic duty cycles for N drivers: pre-trip
+inspections, driving blocks with stops and breaks, post-trip inspections,
+rests and weekly restarts, with a share of shifts that break the HOS limits.
+The same seed and start time always produce the same records; only how far
+the simulated clock has run changes between runs. The clock runs
+`acceleration` times faster than wall time, or stands still (acceleration 0)
+and is moved with advance().
+
+GeotabStandInServer serves the JSON-RPC subset used by GeotabClient and
+AsyncGeotabClient on /apiv1: Authenticate, GetFeed, Get, GetLogRecords and
+ExecuteMultiCall, for the DutyStatusLog, DVIRLog, Device, User and
+LogRecord types. Point the module at it with GEOTAB_SERVER=http://host:port.
+
+    python geotab_simulator.py --drivers 1000 --acceleration 60 --port 8765
+"""
+
+import os
+import json
+import time
+import heapq
+import random
+import logging
+import argparse
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count, islice
+from typing import Dict, List, Optional, Any, Iterator, Tuple
+
+from hos_rules import HOS_LOOKBACK, from_epoch_seconds, to_epoch_seconds
+
+HOUR = 3600
+MINUTE = 60
+MAX_RESULTS = 50000
+
+# Shifts between 34-hour restarts, and the share of shifts that drive past
+# the 11-hour limit without a 30-minute break
+SHIFTS_PER_RESTART = 5
+# Compliant shifts break and end with a margin before the 8-hour and 14-hour limits
+COMPLIANT_DRIVE_BEFORE_BREAK = 7.5 * HOUR
+COMPLIANT_SHIFT = 13.5 * HOUR
+DEFAULT_VIOLATION_RATE = 0.05
+DEFAULT_DEFECT_RATE = 0.05
+DEFAULT_EDIT_RATE = 0.01
+
+DVIR_DEFECTS = ("Brakes", "Tires", "Lights", "Horn", "Mirrors", "Coupling Devices", "Wipers")
+FEED_TYPES = ("DutyStatusLog", "DVIRLog", "Device", "User")
+
+def _iso(seconds: float) -> str:
+    """Geotab-style UTC timestamp"""
+    return from_epoch_seconds(seconds).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+class _Feed:
+    """Records of one type in version order, with their versions and times"""
+
+    __slots__ = ('versions', 'times', 'records', 'current')
+
+    def __init__(self):
+        self.versions: List[int] = []
+        # Record times; None for entities (devices, users) without a date
+        self.times: List[Optional[float]] = []
+        self.records: List[Dict[str, Any]] = []
+        # id -> latest version of each record, for Get
+        self.current: Dict[str, Dict[str, Any]] = {}
+
+    def append(self, version: int, at: Optional[float], record: Dict[str, Any]):
+        self.versions.append(version)
+        self.times.append(at)
+        self.records.append(record)
+        self.current[record['id']] = record
+
+class _Driver:
+    __slots__ = ('index', 'id', 'device_id', 'rng', 'plan', 'segments', 'shifts',
+                 'odometer', 'last_log')
+
+    def __init__(self, index: int, seed: int):
+        self.index = index
+        self.id = f"b{index + 1:X}"
+        self.device_id = f"b{index + 0x1001:X}"
+        self.rng = random.Random(f"{seed}:{index}")
+        self.plan: deque = deque()
+        # (start epoch seconds, Geotab status) of every generated change
+        self.segments: List[Tuple[float, str]] = []
+        self.shifts = self.rng.randrange(SHIFTS_PER_RESTART)
+        self.odometer = self.rng.uniform(50_000, 900_000) * 1000
+        self.last_log: Optional[Dict[str, Any]] = None
+
+class FleetSimulator:
+    """
+    Deterministic duty cycles for a fleet of drivers.
+
+    Args:
+        drivers (int): Number of drivers, each with its own vehicle.
+        seed (int): Seed of every random choice.
+        start (datetime): Simulated time when the simulator is created
+            (naive UTC; defaults to now, rounded down to the minute).
+        acceleration (float): Simulated seconds per wall-clock second; 0
+            stops the clock so only advance() moves it.
+        history (timedelta): Duty cycles already on record at `start`.
+        violation_rate (float): Share of shifts that break the driving limits.
+        defect_rate (float): Share of inspections that report a defect.
+        edit_rate (float): Share of duty status changes later edited.
+    """
+
+    def __init__(self, drivers: int = 100, seed: int = 0, start: Optional[datetime] = None,
+                 acceleration: float = 1.0, history: timedelta = HOS_LOOKBACK,
+                 violation_rate: float = DEFAULT_VIOLATION_RATE,
+                 defect_rate: float = DEFAULT_DEFECT_RATE,
+                 edit_rate: float = DEFAULT_EDIT_RATE):
+        start = start or datetime.utcnow().replace(second=0, microsecond=0)
+        self.start = to_epoch_seconds(start)
+        self.acceleration = acceleration
+        self.violation_rate = violation_rate
+        self.defect_rate = defect_rate
+        self.edit_rate = edit_rate
+        self._offset = 0.0
+        self._started = time.monotonic()
+        self._lock = threading.RLock()
+        self._versions = count(1)
+        self._version = 0
+        self._ids = count(1)
+        self._feeds: Dict[str, _Feed] = {type_name: _Feed() for type_name in FEED_TYPES}
+        self.drivers = [_Driver(index, seed) for index in range(drivers)]
+
+        origin = self.start - history.total_seconds()
+        self._heap: List[Tuple[float, int]] = []
+        for driver in self.drivers:
+            self._add('User', None, {"id": driver.id, "name": f"driver{driver.index + 1}",
+                                       "isDriver": True, "firstName": "Driver",
+                                       "lastName": str(driver.index + 1)})
+            self._add('Device', None, {"id": driver.device_id,
+                                         "name": f"Truck {driver.index + 1}",
+                                         "serialNumber": f"G9{driver.index:010d}"})
+            # Stagger the fleet: everyone starts off duty for up to a day
+            driver.plan.append(("OFF", driver.rng.uniform(0, 24 * HOUR), None))
+            heapq.heappush(self._heap, (origin, driver.index))
+        self._generate(self.start)
+
+    # --- Clock ---
+    def now(self) -> datetime:
+        """Current simulated time (naive UTC)"""
+        return from_epoch_seconds(self._now())
+
+    def _now(self) -> float:
+        return self.start + (time.monotonic() - self._started) * self.acceleration + self._offset
+
+    def advance(self, delta: timedelta):
+        """Move the simulated clock forward"""
+        with self._lock:
+            self._offset += delta.total_seconds()
+
+    # --- Duty cycles ---
+    def _shift_plan(self, driver: _Driver) -> List[Tuple[str, float, Optional[str]]]:
+        """(status, seconds, inspection type) steps of one shift and the rest after it"""
+        rng = driver.rng
+        violating = rng.random() < self.violation_rate
+        pre_trip = rng.uniform(15, 30) * MINUTE
+        plan = [("ON", pre_trip, "PreTrip")]
+        drive_left = (rng.uniform(11.25, 12.5) if violating else rng.uniform(7.5, 10.5)) * HOUR
+        elapsed = pre_trip
+        since_break = 0.0
+        while drive_left > 0:
+            block = min(rng.uniform(2, 4.5) * HOUR, drive_left)
+            if not violating:
+                if COMPLIANT_DRIVE_BEFORE_BREAK - since_break < 30 * MINUTE:
+                    stop = rng.uniform(30, 45) * MINUTE
+                    plan.append(("OFF", stop, None))
+                    elapsed += stop
+                    since_break = 0.0
+                block = min(block, COMPLIANT_DRIVE_BEFORE_BREAK - since_break)
+            plan.append(("D", block, None))
+            drive_left -= block
+            elapsed += block
+            since_break += block
+            if drive_left <= 0:
+                break
+            if not violating and rng.random() < 0.6:
+                stop = rng.uniform(30, 60) * MINUTE
+                plan.append(("OFF", stop, None))
+                since_break = 0.0
+            else:
+                stop = rng.uniform(15, 45) * MINUTE
+                plan.append(("ON", stop, None))
+            elapsed += stop
+            if not violating:
+                # Leave time for a break and the post-trip inspection
+                drive_left = min(drive_left, COMPLIANT_SHIFT - elapsed - HOUR)
+        plan.append(("ON", rng.uniform(15, 30) * MINUTE, "PostTrip"))
+
+        driver.shifts += 1
+        if driver.shifts % SHIFTS_PER_RESTART == 0:
+            plan.append(("OFF", rng.uniform(34, 36) * HOUR, None))
+        elif rng.random() < 0.4:
+            plan.append(("SB", rng.uniform(10, 11) * HOUR, None))
+        else:
+            plan.append(("OFF", rng.uniform(10, 14) * HOUR, None))
+        return plan
+
+    def _generate(self, until: float):
+        """Emit every duty status change up to `until`, in time order"""
+        heap = self._heap
+        while heap and heap[0][0] <= until:
+            at, index = heapq.heappop(heap)
+            driver = self.drivers[index]
+            if not driver.plan:
+                driver.plan.extend(self._shift_plan(driver))
+            status, seconds, inspection = driver.plan.popleft()
+            self._emit(driver, at, status, inspection)
+            if status == "D":
+                driver.odometer += seconds * driver.rng.uniform(20, 26)  # ~80 km/h, in meters
+            heapq.heappush(heap, (at + seconds, index))
+
+    def _emit(self, driver: _Driver, at: float, status: str, inspection: Optional[str]):
+        rng = driver.rng
+        if driver.last_log is not None and rng.random() < self.edit_rate:
+            # Edit the previous change, as a driver or carrier would after the fact
+            edited = dict(driver.last_log, editDateTime=_iso(at))
+            self._add('DutyStatusLog', to_epoch_seconds(edited['dateTime']), edited)
+        driver.segments.append((at, status))
+        log = {
+            "id": f"a{next(self._ids):X}",
+            "driver": {"id": driver.id},
+            "device": {"id": driver.device_id},
+            "status": status,
+            "state": "Active",
+            "origin": "Automatic" if status == "D" else "Manual",
+            "dateTime": _iso(at),
+            "odometer": round(driver.odometer),
+        }
+        driver.last_log = self._add('DutyStatusLog', at, log)
+        if inspection:
+            defects = []
+            if rng.random() < self.defect_rate:
+                defects = [{"defect": {"name": rng.choice(DVIR_DEFECTS)}}]
+            self._add('DVIRLog', at, {
+                "id": f"a{next(self._ids):X}",
+                "driver": {"id": driver.id},
+                "device": {"id": driver.device_id},
+                "logType": inspection,
+                "dateTime": _iso(at),
+                "dVIRDefects": defects,
+                "isSafeToOperate": not defects,
+            })
+
+    def _add(self, type_name: str, at: Optional[float], record: Dict[str, Any]) -> Dict[str, Any]:
+        version = next(self._versions)
+        self._version = version
+        record = dict(record, version=f"{version:016x}")
+        self._feeds[type_name].append(version, at, record)
+        return record
+
+    def catch_up(self) -> float:
+        """Generate everything up to the simulated now; returns it in epoch seconds"""
+        with self._lock:
+            now = self._now()
+            self._generate(now)
+            return now
+
+    # --- Queries ---
+    def get_feed(self, type_name: str, from_version: Optional[str] = None,
+                 from_date: Optional[str] = None,
+                 results_limit: int = MAX_RESULTS) -> Dict[str, Any]:
+        """GetFeed: records newer than `from_version`, or dated from `from_date` on a first call"""
+        self.catch_up()
+        feed = self._feed(type_name)
+        results_limit = min(results_limit or MAX_RESULTS, MAX_RESULTS)
+        with self._lock:
+            if from_version:
+                first = bisect_right(feed.versions, int(from_version, 16))
+                positions: Iterator[int] = iter(range(first, len(feed.records)))
+            else:
+                since = to_epoch_seconds(from_date) if from_date else float('-inf')
+                times = feed.times
+                positions = (i for i in range(len(feed.records))
+                             if times[i] is None or times[i] >= since)
+            positions = list(islice(positions, results_limit))
+            data = [feed.records[i] for i in positions]
+            if len(data) == results_limit:
+                to_version = feed.versions[positions[-1]]
+            else:
+                to_version = self._version
+        return {"data": data, "toVersion": f"{to_version:016x}"}
+
+    def get(self, type_name: str, search: Optional[Dict[str, Any]] = None,
+            results_limit: int = MAX_RESULTS) -> List[Dict[str, Any]]:
+        """Get: latest version of the records matching a search, in time order"""
+        if type_name == 'LogRecord':
+            return self.log_records(search, results_limit)
+        now = self.catch_up()
+        search = search or {}
+        since = to_epoch_seconds(search.get('fromDate')) if search.get('fromDate') else float('-inf')
+        until = to_epoch_seconds(search.get('toDate')) if search.get('toDate') else now
+        driver_id = (search.get('userSearch') or {}).get('id')
+        device_id = (search.get('deviceSearch') or {}).get('id')
+        record_id = search.get('id')
+        feed = self._feed(type_name)
+        with self._lock:
+            records = list(feed.current.values())
+        matches = []
+        for record in records:
+            if record_id and record['id'] != record_id:
+                continue
+            if driver_id and (record.get('driver') or {}).get('id') != driver_id:
+                continue
+            if device_id and (record.get('device') or {}).get('id') != device_id:
+                continue
+            if 'dateTime' in record and not since <= to_epoch_seconds(record['dateTime']) <= until:
+                continue
+            matches.append(record)
+        matches.sort(key=lambda record: record.get('dateTime', ''))
+        return matches[:min(results_limit or MAX_RESULTS, MAX_RESULTS)]
+
+    def log_records(self, search: Optional[Dict[str, Any]] = None, results_limit: int = MAX_RESULTS,
+                    interval: float = MINUTE) -> List[Dict[str, Any]]:
+        """GPS LogRecords: one point per `interval` of driving, in time order"""
+        now = self.catch_up()
+        search = search or {}
+        since = to_epoch_seconds(search.get('fromDate')) if search.get('fromDate') else now - 24 * HOUR
+        until = min(to_epoch_seconds(search.get('toDate')) if search.get('toDate') else now, now)
+        device_id = (search.get('deviceSearch') or {}).get('id')
+        with self._lock:
+            drivers = [(driver, list(driver.segments)) for driver in self.drivers
+                       if device_id in (None, driver.device_id)]
+        points = heapq.merge(*(self._gps_points(driver, segments, since, until, interval)
+                               for driver, segments in drivers),
+                             key=lambda record: record['dateTime'])
+        return list(islice(points, min(results_limit or MAX_RESULTS, MAX_RESULTS)))
+
+    def _gps_points(self, driver: _Driver, segments: List[Tuple[float, str]],
+                    since: float, until: float, interval: float) -> Iterator[Dict[str, Any]]:
+        first = max(bisect_left(segments, (since,)) - 1, 0)
+        for i in range(first, len(segments)):
+            start, status = segments[i]
+            if start > until:
+                return
+            if status != "D":
+                continue
+            end = segments[i + 1][0] if i + 1 < len(segments) else until
+            at = max(start, since)
+            at += -(at - start) % interval
+            while at < min(end, until):
+                hours = (at - self.start) / HOUR
+                yield {
+                    "id": f"{driver.device_id}-{int(at)}",
+                    "device": {"id": driver.device_id},
+                    "dateTime": _iso(at),
+                    "latitude": round(30 + (driver.index % 150) * 0.1 + (hours % 10) * 0.05, 6),
+                    "longitude": round(-120 + (driver.index // 150) * 0.1 + (hours % 7) * 0.05, 6),
+                    "speed": 80,
+                }
+                at += interval
+
+    def _feed(self, type_name: str) -> _Feed:
+        feed = self._feeds.get(type_name)
+        if feed is None:
+            raise GeotabStandInError("InvalidTypeException", f"Unsupported type {type_name}")
+        return feed
+
+    def stats(self) -> Dict[str, Any]:
+        """Record counts per type and the simulated time"""
+        with self._lock:
+            return {"drivers": len(self.drivers), "now": self.now().isoformat(),
+                    **{type_name: len(feed.records) for type_name, feed in self._feeds.items()}}
+
+# --- JSON-RPC Server ---
+class GeotabStandInError(Exception):
+    """A JSON-RPC error returned to the client, named like Geotab's exceptions"""
+
+    def __init__(self, name: str, message: str):
+        super().__init__(message)
+        self.name = name
+
+class GeotabStandInServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server answering Geotab JSON-RPC calls from a FleetSimulator.
+
+    Args:
+        simulator (FleetSimulator): Source of the served records.
+        address (tuple): (host, port) to listen on; port 0 picks a free port.
+        database (str): Database name to accept; None accepts any.
+        latency (float): Seconds added to every response, to model the
+            round trip to a remote server.
+        error_rate (float): Share of requests answered with HTTP 503.
+        session_ttl (float): Seconds before a session id expires and the
+            client must authenticate again; None never expires.
+        rate_limit (int): Calls per user per second before further calls in
+            that second fail with OverLimitException; None for no limit.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, simulator: FleetSimulator, address: Tuple[str, int] = ("127.0.0.1", 0),
+                 database: Optional[str] = None, latency: float = 0.0, error_rate: float = 0.0,
+                 session_ttl: Optional[float] = None, seed: int = 0,
+                 rate_limit: Optional[int] = None):
+        super().__init__(address, _GeotabRequestHandler)
+        self.simulator = simulator
+        self.database = database
+        self.latency = latency
+        self.error_rate = error_rate
+        self.session_ttl = session_ttl
+        self.rate_limit = rate_limit
+        self._rate_windows: Dict[Any, Tuple[int, int]] = {}
+        self._rng = random.Random(seed)
+        self._sessions: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.calls: Counter = Counter()
+        self.records_served = 0
+        self.over_limit = 0
+
+    @property
+    def url(self) -> str:
+        """Value for GEOTAB_SERVER / GeotabClient(server=...)"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'GeotabStandInServer':
+        """Serve from a daemon thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name="geotab-stand-in",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def __enter__(self):
+        return self.start() if self._thread is None else self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls per method and records served, with the simulator's stats"""
+        with self._lock:
+            return {"calls": dict(self.calls), "records_served": self.records_served,
+                    "over_limit": self.over_limit, "simulator": self.simulator.stats()}
+
+    def fail_request(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def _check_rate(self, params: Dict[str, Any]):
+        """Per-user calls per one-second window, like Geotab's per-user quotas"""
+        if not self.rate_limit:
+            return
+        user = params.get("userName") or (params.get("credentials") or {}).get("userName")
+        second = int(time.monotonic())
+        with self._lock:
+            window, count = self._rate_windows.get(user, (second, 0))
+            if window != second:
+                window, count = second, 0
+            self._rate_windows[user] = (window, count + 1)
+            if count < self.rate_limit:
+                return
+            self.over_limit += 1
+        raise GeotabStandInError("OverLimitException", f"API calls quota exceeded. "
+                                 f"Maximum admitted {self.rate_limit} per 1s.")
+
+    # --- Methods ---
+    def dispatch(self, method: str, params: Dict[str, Any]) -> Any:
+        with self._lock:
+            self.calls[method] += 1
+        self._check_rate(params)
+        if method == "Authenticate":
+            return self.authenticate(params)
+        self._check_session(params.get("credentials"))
+        if method == "ExecuteMultiCall":
+            credentials = params.get("credentials")
+            return [self._call(call.get("method"), {**(call.get("params") or {}),
+                                                     "credentials": credentials})
+                    for call in params.get("calls") or []]
+        return self._call(method, params)
+
+    def _call(self, method: str, params: Dict[str, Any]) -> Any:
+        search = params.get("search") or {}
+        results_limit = params.get("resultsLimit") or MAX_RESULTS
+        if method == "GetFeed":
+            result = self.simulator.get_feed(params.get("typeName"), params.get("fromVersion"),
+                                             search.get("fromDate"), results_limit)
+            served = len(result["data"])
+        elif method == "Get":
+            result = self.simulator.get(params.get("typeName"), search, results_limit)
+            served = len(result)
+        elif method == "GetLogRecords":
+            result = self.simulator.log_records(search, results_limit)
+            served = len(result)
+        else:
+            raise GeotabStandInError("MissingMethodException", f"Unsupported method {method}")
+        with self._lock:
+            self.records_served += served
+        return result
+
+    def authenticate(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        database = params.get("database")
+        if self.database is not None and database != self.database:
+            raise GeotabStandInError("InvalidUserException", f"Unknown database {database}")
+        session_id = os.urandom(12).hex()
+        expires = time.monotonic() + self.session_ttl if self.session_ttl else float('inf')
+        with self._lock:
+            self._sessions[session_id] = expires
+        return {
+            "credentials": {"database": database, "userName": params.get("userName"),
+                            "sessionId": session_id},
+            "path": "ThisServer",
+        }
+
+    def _check_session(self, credentials: Optional[Dict[str, Any]]):
+        session_id = (credentials or {}).get("sessionId")
+        with self._lock:
+            expires = self._sessions.get(session_id)
+            if expires is not None and expires <= time.monotonic():
+                del self._sessions[session_id]
+                expires = None
+        if expires is None:
+            raise GeotabStandInError("InvalidUserException", "Incorrect login credentials")
+
+class _GeotabRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server: GeotabStandInServer = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if server.latency:
+            time.sleep(server.latency)
+        if server.fail_request():
+            self._reply(503, b'{"error": {"message": "Service Unavailable"}}')
+            return
+        try:
+            request = json.loads(body)
+            result = server.dispatch(request.get("method"), request.get("params") or {})
+            response = {"result": result, "jsonrpc": "2.0"}
+        except GeotabStandInError as e:
+            response = _error_response(e.name, str(e))
+        except (ValueError, TypeError, AttributeError) as e:
+            response = _error_response("ArgumentException", str(e))
+        self._reply(200, json.dumps(response, separators=(',', ':')).encode())
+
+    def _reply(self, status: int, payload: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logging.debug("geotab stand-in: " + format, *args)
+
+def _error_response(name: str, message: str) -> Dict[str, Any]:
+    return {"error": {"name": "JSONRPCError", "message": message,
+                      "errors": [{"name": name, "message": message}]},
+            "jsonrpc": "2.0"}
+
+def start_geotab_stand_in(drivers: int = 100, seed: int = 0, host: str = "127.0.0.1",
+                          port: int = 0, **options) -> GeotabStandInServer:
+    """
+    Start a stand-in server for a new FleetSimulator in a background thread.
+
+    Options are passed to FleetSimulator (start, acceleration, history,
+    violation_rate, defect_rate, edit_rate) or to GeotabStandInServer
+    (database, latency, error_rate, session_ttl, rate_limit).
+    """
+    server_options = {key: options.pop(key) for key in
+                      ("database", "latency", "error_rate", "session_ttl", "rate_limit")
+                      if key in options}
+    simulator = FleetSimulator(drivers, seed, **options)
+    return GeotabStandInServer(simulator, (host, port), seed=seed, **server_options).start()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Local Geotab API stand-in backed by a fleet simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--drivers", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", help="Simulated start time, ISO-8601 UTC (default: now)")
+    parser.add_argument("--acceleration", type=float, default=1.0,
+                        help="Simulated seconds per wall-clock second")
+    parser.add_argument("--history-days", type=float, default=HOS_LOOKBACK.days)
+    parser.add_argument("--violation-rate", type=float, default=DEFAULT_VIOLATION_RATE)
+    parser.add_argument("--database", help="Only accept this database name")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--session-ttl", type=float)
+    parser.add_argument("--rate-limit", type=int, help="Calls per user per second")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s %(message)s')
+    start = from_epoch_seconds(to_epoch_seconds(args.start)) if args.start else None
+    simulator = FleetSimulator(args.drivers, args.seed, start, args.acceleration,
+                               timedelta(days=args.history_days), args.violation_rate)
+    server = GeotabStandInServer(simulator, (args.host, args.port), args.database,
+                                 args.latency_ms / 1000, args.error_rate, args.session_ttl,
+                                 args.seed, args.rate_limit)
+    logging.info(f"Geotab stand-in for {args.drivers} drivers at {server.url} "
+                 f"(GEOTAB_SERVER={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
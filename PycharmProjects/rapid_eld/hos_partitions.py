@@ -0,0 +1,98 @@
+"""
+HOS Log Partitioning
+Month arithmetic, partition naming and cold archive export shared by the
+partitioned SQL stores.
+
+HOS logs are split into one partition per calendar month of start_time
+(native range partitions on Postgres, per-month tables behind a view on
+SQLite). Range queries then touch only the months they name, indexes stay
+one month deep, and retention drops whole partitions instead of deleting
+rows: expired months are exported to gzip-compressed NDJSON files first.
+"""
+
+import gzip
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Iterable, Iterator
+
+from eld_serialization import iter_ndjson
+
+# Partitioned HOS log storage (opt-in), online retention and archive location
+HOS_PARTITIONED = os.environ.get("HOS_PARTITIONED", "false").lower() == "true"
+HOS_RETENTION_MONTHS = int(os.environ.get("HOS_RETENTION_MONTHS", "6"))
+HOS_ARCHIVE_DIR = os.environ.get("HOS_ARCHIVE_DIR", "hos_archive")
+
+_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+def month_start(value: datetime) -> datetime:
+    """First instant of the month containing `value`"""
+    return datetime(value.year, value.month, 1)
+
+def add_months(month: datetime, count: int) -> datetime:
+    """Month start `count` months after (or before, if negative) `month`"""
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def iter_months(start: datetime, end: datetime) -> Iterator[datetime]:
+    """Month starts from the month of `start` through the month of `end`"""
+    month = month_start(start)
+    while month <= end:
+        yield month
+        month = add_months(month, 1)
+
+def partition_name(table: str, month: datetime) -> str:
+    """Name of `table`'s partition for `month`, e.g. eld_hos_logs_p202610"""
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+def partition_month(table: str, name: str) -> Optional[datetime]:
+    """Month of a partition named by partition_name, or None for other tables"""
+    if not name.startswith(table):
+        return None
+    match = _SUFFIX.fullmatch(name[len(table):])
+    return datetime(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+def retention_cutoff(now: datetime, months: int = HOS_RETENTION_MONTHS) -> datetime:
+    """
+    Partitions ending at or before this instant have expired. Whole months
+    are dropped, so between `months` and `months` + 1 months stay online.
+    """
+    return add_months(month_start(now), -months)
+
+def expired_months(months: Iterable[datetime], before: datetime) -> List[datetime]:
+    """Months (partition starts) that end at or before `before`, oldest first"""
+    return sorted(month for month in months if add_months(month, 1) <= before)
+
+def archive_path(archive_dir: str, name: str) -> str:
+    """<archive_dir>/<name>.ndjson.gz, numbered (<name>.1.ndjson.gz, ...) if the month was archived before"""
+    path = os.path.join(archive_dir, f"{name}.ndjson.gz")
+    count = 0
+    while os.path.exists(path):
+        count += 1
+        path = os.path.join(archive_dir, f"{name}.{count}.ndjson.gz")
+    return path
+
+def write_archive(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """
+    Write records as gzip-compressed NDJSON and return how many were written.
+    The file is synced and renamed into place, so a partition is only
+    dropped once its complete archive is on disk.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    count = 0
+
+    def counted():
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as raw:
+        with gzip.GzipFile(filename=os.path.basename(path)[:-3], mode='wb', fileobj=raw) as out:
+            for chunk in iter_ndjson(counted()):
+                out.write(chunk)
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(temp_path, path)
+    return count
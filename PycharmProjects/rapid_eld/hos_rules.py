@@ -0,0 +1,603 @@
+"""
+Hours of Service (HOS) Rules Engine
+Computes FMCSA property-carrying HOS limits from duty status logs.
+
+Each log is a duty status change that lasts until the driver's next log (the
+latest log is open until "now"). The engine evaluates:
+
+- 11-hour driving limit after 10 consecutive hours off duty
+- 14-hour on-duty window after 10 consecutive hours off duty
+- 30-minute break after 8 cumulative hours of driving
+- 60-hour/7-day or 70-hour/8-day cycle, reset by a 34-hour restart
+
+Split sleeper berth and adverse driving exceptions are not modeled.
+
+With NumPy installed the whole fleet is evaluated at once with batched
+interval arithmetic; otherwise each driver's logs are folded through
+DriverHOSState.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+# Optional dependencies - only import if available
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# --- Rule Constants ---
+HOUR = 3600.0
+DRIVING_LIMIT = 11 * HOUR
+DUTY_WINDOW = 14 * HOUR
+BREAK_REQUIRED_AFTER = 8 * HOUR
+BREAK_DURATION = 0.5 * HOUR
+SHIFT_RESET_OFF_DUTY = 10 * HOUR
+CYCLE_RESTART_OFF_DUTY = 34 * HOUR
+
+HOS_CYCLE_60_7 = '60_7'
+HOS_CYCLE_70_8 = '70_8'
+HOS_CYCLES = {
+    HOS_CYCLE_60_7: (60 * HOUR, 7 * 24 * HOUR),
+    HOS_CYCLE_70_8: (70 * HOUR, 8 * 24 * HOUR),
+}
+
+# How far back a check must read logs to evaluate the longest cycle
+HOS_LOOKBACK = timedelta(days=9)
+
+# Violation rule identifiers
+RULE_DRIVING_11 = 'driving_11_hour'
+RULE_WINDOW_14 = 'window_14_hour'
+RULE_BREAK_30 = 'break_30_minute'
+RULE_CYCLE = 'cycle'
+
+# Duty status codes used internally
+OFF_DUTY, SLEEPER_BERTH, DRIVING, ON_DUTY = 0, 1, 2, 3
+_STATUS_CODES = {
+    'off_duty': OFF_DUTY,
+    'sleeper_berth': SLEEPER_BERTH,
+    'driving': DRIVING,
+    'on_duty': ON_DUTY,
+}
+_STATUS_NAMES = {code: name for name, code in _STATUS_CODES.items()}
+
+_EPOCH = datetime(1970, 1, 1)
+
+def status_code(log_type: Optional[str]) -> int:
+    """Map a log_type to its duty status code; unknown statuses count as on duty"""
+    return _STATUS_CODES.get(log_type, ON_DUTY)
+
+def to_utc_datetime(value: Any) -> Optional[datetime]:
+    """Normalize a datetime or ISO-8601 string to a naive UTC datetime"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def to_epoch_seconds(value: Any) -> Optional[float]:
+    """Convert a datetime or ISO-8601 string to UTC epoch seconds"""
+    value = to_utc_datetime(value)
+    return None if value is None else (value - _EPOCH).total_seconds()
+
+def from_epoch_seconds(value: float) -> datetime:
+    return _EPOCH + timedelta(seconds=float(value))
+
+def to_epoch_ms(value: Any) -> Optional[int]:
+    """Convert a datetime or ISO-8601 string to whole UTC epoch milliseconds"""
+    value = to_utc_datetime(value)
+    return None if value is None else (value - _EPOCH) // timedelta(milliseconds=1)
+
+def from_epoch_ms(value: Optional[int]) -> Optional[datetime]:
+    return None if value is None else _EPOCH + timedelta(milliseconds=value)
+
+def _violation(driver_id: str, rule: str, occurred_at: float, cycle: str) -> Dict[str, Any]:
+    messages = {
+        RULE_DRIVING_11: "Drove more than 11 hours after 10 consecutive hours off duty",
+        RULE_WINDOW_14: "Drove beyond the 14th hour after coming on duty",
+        RULE_BREAK_30: "Drove more than 8 hours without a 30-minute break",
+        RULE_CYCLE: f"Drove after reaching the {cycle.replace('_', '-hour/')}-day on-duty limit",
+    }
+    occurred = from_epoch_seconds(occurred_at)
+    return {
+        "driver_id": driver_id,
+        "rule": rule,
+        "occurred_at": occurred,
+        "message": f"{messages[rule]} at {occurred.isoformat()}.",
+    }
+
+def _status_entry(driver_id: str, status: int, drive_used: float, window_used: float,
+                  since_break: float, cycle_used: float, cycle: str) -> Dict[str, Any]:
+    cycle_limit = HOS_CYCLES[cycle][0]
+    drive_left = max(0.0, DRIVING_LIMIT - drive_used)
+    window_left = max(0.0, DUTY_WINDOW - window_used)
+    break_left = max(0.0, BREAK_REQUIRED_AFTER - since_break)
+    cycle_left = max(0.0, cycle_limit - cycle_used)
+    return {
+        "driverId": driver_id,
+        "status": _STATUS_NAMES.get(status, 'on_duty'),
+        "hoursRemaining": round(min(drive_left, window_left, cycle_left) / HOUR, 2),
+        "driveHoursRemaining": round(drive_left / HOUR, 2),
+        "windowHoursRemaining": round(window_left / HOUR, 2),
+        "breakHoursRemaining": round(break_left / HOUR, 2),
+        "cycleHoursRemaining": round(cycle_left / HOUR, 2),
+    }
+
+# --- Per-Driver Fold ---
+class DriverHOSState:
+    """
+    Running HOS accumulators for one driver.
+
+    Closed duty status segments are folded in time order with fold(); the
+    driver's open (latest) status is evaluated with status_at(). advance()
+    folds newly arrived logs past the watermark (the start of the latest
+    folded log), so the state can be persisted with to_dict() and resumed
+    between violation checks.
+    """
+
+    _FIELDS = (
+        'driver_id', 'cycle', 'rest_run_start', 'non_driving_run_start', 'window_start',
+        'shift_drive', 'since_break_drive', 'restart_at', 'on_duty_intervals', 'reported',
+        'open_status', 'open_start', 'pending', 'recompute_from', 'provisional',
+    )
+
+    def __init__(self, driver_id: str, cycle: str = HOS_CYCLE_70_8):
+        self.driver_id = driver_id
+        self.cycle = cycle
+        self.rest_run_start: Optional[float] = None
+        self.non_driving_run_start: Optional[float] = None
+        self.window_start: Optional[float] = None
+        self.shift_drive = 0.0
+        self.since_break_drive = 0.0
+        self.restart_at: Optional[float] = None
+        # On-duty intervals since the last restart, trimmed to the cycle span
+        self.on_duty_intervals: List[Tuple[float, float]] = []
+        self.reported: Dict[str, bool] = {}
+        # Violations (rule -> ISO time) found by probing the open segment. Their
+        # reported flags are dropped again before the segment is folded, since
+        # later logs may close it before these violations happen.
+        self.provisional: Dict[str, str] = {}
+        # Latest log, still open until the next one arrives
+        self.open_status: Optional[int] = None
+        self.open_start: Optional[float] = None
+        # Set at ingest: logs newer than the watermark are waiting to be folded
+        self.pending = False
+        # Set at ingest for late or edited logs: rebuild from this time onward
+        self.recompute_from: Optional[float] = None
+
+    @property
+    def watermark(self) -> Optional[float]:
+        return self.open_start
+
+    def to_dict(self) -> Dict[str, Any]:
+        state = {field: getattr(self, field) for field in self._FIELDS}
+        state['on_duty_intervals'] = [list(interval) for interval in self.on_duty_intervals]
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'DriverHOSState':
+        restored = cls(state['driver_id'], state.get('cycle', HOS_CYCLE_70_8))
+        for field in cls._FIELDS:
+            if field in state:
+                setattr(restored, field, state[field])
+        restored.on_duty_intervals = [tuple(interval) for interval in restored.on_duty_intervals]
+        restored.reported = dict(restored.reported)
+        restored.provisional = dict(restored.provisional)
+        return restored
+
+    def advance(self, segments: Iterable[Tuple[int, float]], now: float) -> List[Dict[str, Any]]:
+        """
+        Fold (status, start) logs in time order, skipping those at or before
+        the watermark, then check the open segment up to `now`. Violations
+        already returned by an earlier check are not returned again.
+        """
+        provisional = self.provisional
+        for rule in provisional:
+            self.reported.pop(rule, None)
+        self.provisional = {}
+        violations = []
+        for status, start in segments:
+            if self.open_start is not None:
+                if start <= self.open_start:
+                    continue
+                violations.extend(self.fold(self.open_status, self.open_start, start))
+            self.open_status, self.open_start = status, start
+        self.pending = False
+        if self.open_start is not None and self.open_start <= now:
+            # The open segment can still break a rule before "now". Fold it into
+            # a copy and keep its flags as provisional until the segment closes.
+            probe = self.copy()
+            found = probe.fold(self.open_status, self.open_start, now)
+            self.reported.update(probe.reported)
+            self.provisional = {violation['rule']: violation['occurred_at'].isoformat()
+                                for violation in found}
+            violations.extend(found)
+        if provisional:
+            violations = [violation for violation in violations
+                          if provisional.get(violation['rule']) != violation['occurred_at'].isoformat()]
+        return violations
+
+    def status(self, now: float) -> Optional[Dict[str, Any]]:
+        """Current status, or None before any log has been folded"""
+        if self.open_start is None:
+            return None
+        return self.status_at(self.open_status, self.open_start, now)
+
+    def copy(self) -> 'DriverHOSState':
+        clone = DriverHOSState.__new__(DriverHOSState)
+        clone.__dict__.update(self.__dict__)
+        clone.on_duty_intervals = list(self.on_duty_intervals)
+        clone.reported = dict(self.reported)
+        clone.provisional = dict(self.provisional)
+        return clone
+
+    def fold(self, status: int, start: float, end: float) -> List[Dict[str, Any]]:
+        """Fold one closed segment and return any violations it causes"""
+        violations = []
+        driving = status == DRIVING
+        on_duty = driving or status not in (OFF_DUTY, SLEEPER_BERTH)
+
+        if on_duty:
+            self.rest_run_start = None
+            if self.window_start is None:
+                self.window_start = start
+            self.on_duty_intervals.append((start, end))
+        else:
+            if self.rest_run_start is None:
+                self.rest_run_start = start
+
+        if driving:
+            self.non_driving_run_start = None
+            violations.extend(self._fold_driving(start, end))
+        elif self.non_driving_run_start is None:
+            self.non_driving_run_start = start
+
+        if not driving and end - self.non_driving_run_start >= BREAK_DURATION:
+            self.since_break_drive = 0.0
+            self.reported.pop(RULE_BREAK_30, None)
+        if not on_duty:
+            rest = end - self.rest_run_start
+            if rest >= SHIFT_RESET_OFF_DUTY:
+                self.window_start = None
+                self.shift_drive = 0.0
+                self.reported.pop(RULE_DRIVING_11, None)
+                self.reported.pop(RULE_WINDOW_14, None)
+            if rest >= CYCLE_RESTART_OFF_DUTY:
+                self.restart_at = end
+                self.on_duty_intervals = []
+                self.reported.pop(RULE_CYCLE, None)
+        return violations
+
+    def _fold_driving(self, start: float, end: float) -> List[Dict[str, Any]]:
+        violations = []
+        duration = end - start
+
+        before = self.shift_drive
+        self.shift_drive += duration
+        if self.shift_drive > DRIVING_LIMIT and not self.reported.get(RULE_DRIVING_11):
+            self.reported[RULE_DRIVING_11] = True
+            violations.append(_violation(self.driver_id, RULE_DRIVING_11,
+                                         start + max(0.0, DRIVING_LIMIT - before), self.cycle))
+
+        window_end = self.window_start + DUTY_WINDOW
+        if end > window_end and not self.reported.get(RULE_WINDOW_14):
+            self.reported[RULE_WINDOW_14] = True
+            violations.append(_violation(self.driver_id, RULE_WINDOW_14,
+                                         max(start, window_end), self.cycle))
+
+        before = self.since_break_drive
+        self.since_break_drive += duration
+        if self.since_break_drive > BREAK_REQUIRED_AFTER and not self.reported.get(RULE_BREAK_30):
+            self.reported[RULE_BREAK_30] = True
+            violations.append(_violation(self.driver_id, RULE_BREAK_30,
+                                         start + max(0.0, BREAK_REQUIRED_AFTER - before), self.cycle))
+
+        limit = HOS_CYCLES[self.cycle][0]
+        used = self.cycle_used(end)
+        if used > limit and not self.reported.get(RULE_CYCLE):
+            self.reported[RULE_CYCLE] = True
+            violations.append(_violation(self.driver_id, RULE_CYCLE,
+                                         max(start, end - (used - limit)), self.cycle))
+        return violations
+
+    def cycle_used(self, at: float, open_interval: Optional[Tuple[float, float]] = None) -> float:
+        """On-duty seconds in the cycle window ending at `at`"""
+        window_start = at - HOS_CYCLES[self.cycle][1]
+        if self.restart_at is not None:
+            window_start = max(window_start, self.restart_at)
+        # Intervals are in time order; drop the ones that can no longer count
+        keep = 0
+        while keep < len(self.on_duty_intervals) and self.on_duty_intervals[keep][1] <= window_start:
+            keep += 1
+        if keep:
+            del self.on_duty_intervals[:keep]
+        intervals = self.on_duty_intervals
+        if open_interval is not None:
+            intervals = intervals + [open_interval]
+        return sum(min(end, at) - max(start, window_start)
+                   for start, end in intervals if end > window_start and start < at)
+
+    def status_at(self, status: int, start: float, now: float) -> Dict[str, Any]:
+        """Status with the open segment (status since `start`) running until `now`"""
+        driving = status == DRIVING
+        on_duty = driving or status not in (OFF_DUTY, SLEEPER_BERTH)
+        open_duration = max(0.0, now - start)
+
+        shift_drive = self.shift_drive
+        window_start = self.window_start
+        since_break = self.since_break_drive
+        if on_duty:
+            if window_start is None:
+                window_start = start
+            if driving:
+                shift_drive += open_duration
+                since_break += open_duration
+            elif now - (self.non_driving_run_start if self.non_driving_run_start is not None
+                        else start) >= BREAK_DURATION:
+                since_break = 0.0
+            cycle_used = self.cycle_used(now, (start, now))
+        else:
+            rest = now - (self.rest_run_start if self.rest_run_start is not None else start)
+            non_driving = now - (self.non_driving_run_start if self.non_driving_run_start is not None
+                                 else start)
+            if non_driving >= BREAK_DURATION:
+                since_break = 0.0
+            if rest >= SHIFT_RESET_OFF_DUTY:
+                shift_drive, window_start = 0.0, None
+            cycle_used = 0.0 if rest >= CYCLE_RESTART_OFF_DUTY else self.cycle_used(now)
+
+        window_used = 0.0 if window_start is None else now - window_start
+        return _status_entry(self.driver_id, status, shift_drive, window_used,
+                             since_break, cycle_used, self.cycle)
+
+# --- Incremental Check Units ---
+# One driver's share of an incremental violation check: (driver_id, stored
+# state dict or None, (status, start) segments, report_from). A unit with
+# report_from set rebuilds the driver's state from its lookback segments and
+# only reports violations from that time on. Units are plain data, so chunks
+# of them can be evaluated in worker processes or Celery tasks.
+HOSCheckUnit = Tuple[str, Optional[Dict[str, Any]], List[Tuple[int, float]], Optional[float]]
+
+def advance_hos_states(units: Iterable[HOSCheckUnit], now: float,
+                       cycle: str = HOS_CYCLE_70_8) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]],
+                                                             Dict[str, Dict[str, Any]]]:
+    """
+    Advance each unit's driver state to `now` (epoch seconds).
+
+    Returns:
+        tuple: (changed state dicts keyed by driver id, violations, status
+        at `now` keyed by driver id)
+    """
+    changed: Dict[str, Dict[str, Any]] = {}
+    violations: List[Dict[str, Any]] = []
+    statuses: Dict[str, Dict[str, Any]] = {}
+    for driver_id, stored, segments, report_from in units:
+        if report_from is not None:
+            state = DriverHOSState(driver_id, cycle)
+            # Folding is time ordered, so violations before the first changed
+            # log are unchanged and were already reported.
+            violations.extend(violation for violation in state.advance(segments, now)
+                              if to_epoch_seconds(violation['occurred_at']) >= report_from)
+        else:
+            state = DriverHOSState.from_dict(stored)
+            violations.extend(state.advance(segments, now))
+        state_dict = state.to_dict()
+        if state_dict != stored:
+            changed[driver_id] = state_dict
+        status = state.status(now)
+        if status is not None:
+            statuses[driver_id] = status
+    return changed, violations, statuses
+
+def _evaluate_python(driver_ids: List[str], codes: List[int], statuses: List[int],
+                     starts: List[float], now: float, cycle: str) -> Dict[str, Any]:
+    by_driver: Dict[int, List[Tuple[float, int]]] = {}
+    for code, status, start in zip(codes, statuses, starts):
+        by_driver.setdefault(code, []).append((start, status))
+    violations: List[Dict[str, Any]] = []
+    statuses_out: List[Dict[str, Any]] = []
+    for code in sorted(by_driver):
+        state = DriverHOSState(driver_ids[code], cycle)
+        segments = sorted(by_driver[code])
+        violations.extend(state.advance(((status, start) for start, status in segments), now))
+        statuses_out.append(state.status(now))
+    return {"statuses": statuses_out, "violations": violations}
+
+# --- Batched (NumPy) Evaluation ---
+def _runs(new_driver, cls, starts, ends):
+    """Maximal runs of equal `cls` per driver: (new-run flags, run ids, durations, run class)"""
+    new = new_driver.copy()
+    new[1:] |= cls[1:] != cls[:-1]
+    run_id = np.cumsum(new) - 1
+    first = np.flatnonzero(new)
+    last = np.append(first[1:] - 1, len(starts) - 1)
+    return new, run_id, ends[last] - starts[first], cls[first]
+
+def _grouped_cumsum(values, new_group):
+    total = np.cumsum(values)
+    base = (total - values)[np.flatnonzero(new_group)]
+    return total - base[np.cumsum(new_group) - 1]
+
+def _after_runs(run_id, qualifying_run):
+    """Flag the first segment after each qualifying run"""
+    flag = np.zeros(len(run_id), dtype=bool)
+    flag[1:] = qualifying_run[run_id[:-1]] & (run_id[1:] != run_id[:-1])
+    return flag
+
+def _first_per_group(mask, group_id):
+    idx = np.flatnonzero(mask)
+    _, first = np.unique(group_id[idx], return_index=True)
+    return idx[first]
+
+def _evaluate_numpy(driver_ids: List[str], codes, statuses, starts, now: float,
+                    cycle: str) -> Dict[str, Any]:
+    order = np.lexsort((statuses, starts, codes))
+    d = codes[order]
+    s = starts[order]
+    st = statuses[order]
+    # Of a driver's logs starting at the same time, only the lowest status
+    # code counts, as in DriverHOSState.advance after _evaluate_python's sort
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = (d[1:] != d[:-1]) | (s[1:] != s[:-1])
+    if not keep.all():
+        d, s, st = d[keep], s[keep], st[keep]
+    n = len(s)
+
+    new_driver = np.ones(n, dtype=bool)
+    new_driver[1:] = d[1:] != d[:-1]
+    last_of_driver = np.append(new_driver[1:], True)
+    e = np.empty(n)
+    e[:-1] = s[1:]
+    e[last_of_driver] = now
+    dur = e - s
+
+    driving = st == DRIVING
+    on_duty = driving | ((st != OFF_DUTY) & (st != SLEEPER_BERTH))
+    drive_x = np.where(driving, dur, 0.0)
+    duty_x = np.where(on_duty, dur, 0.0)
+
+    # Rest runs (off duty / sleeper berth) end shifts and cycles
+    _, rest_run, rest_len, rest_cls = _runs(new_driver, ~on_duty, s, e)
+    reset_run = rest_cls & (rest_len >= SHIFT_RESET_OFF_DUTY)
+    restart_run = rest_cls & (rest_len >= CYCLE_RESTART_OFF_DUTY)
+    shift_new = new_driver | _after_runs(rest_run, reset_run)
+    shift_id = np.cumsum(shift_new) - 1
+    shift_drive = _grouped_cumsum(drive_x, shift_new)
+
+    duty_idx = np.flatnonzero(on_duty)
+    shift_with_duty, first_duty = np.unique(shift_id[duty_idx], return_index=True)
+    window_start = np.full(shift_id[-1] + 1, np.nan)
+    window_start[shift_with_duty] = s[duty_idx[first_duty]]
+    seg_window_start = window_start[shift_id]
+
+    # Non-driving runs of 30+ minutes are breaks
+    _, break_run, break_len, break_cls = _runs(new_driver, ~driving, s, e)
+    break_new = new_driver | _after_runs(break_run, break_cls & (break_len >= BREAK_DURATION))
+    break_id = np.cumsum(break_new) - 1
+    since_break = _grouped_cumsum(drive_x, break_new)
+
+    # Cycle: on-duty time in [max(t - span, last restart), t] via per-driver prefix sums
+    limit, span = HOS_CYCLES[cycle]
+    duty_end = _grouped_cumsum(duty_x, new_driver)
+    duty_start = duty_end - duty_x
+    t0 = s.min()
+    stride = (max(e.max(), now) - t0) + span + 1.0
+    base = d.astype(np.float64) * stride
+    keys = base + (s - t0)
+
+    def duty_until(t, seg_driver_base, seg_driver):
+        key = seg_driver_base + (np.maximum(t, t0) - t0)
+        j = np.searchsorted(keys, key, side='right') - 1
+        jj = np.maximum(j, 0)
+        valid = (j >= 0) & (d[jj] == seg_driver)
+        value = duty_start[jj] + np.where(on_duty[jj], np.clip(t - s[jj], 0.0, dur[jj]), 0.0)
+        return np.where(valid, value, 0.0)
+
+    restart_end_seg = restart_run[rest_run] & np.append(rest_run[1:] != rest_run[:-1], True)
+    restart_key = np.maximum.accumulate(np.where(restart_end_seg, base + (e - t0), base))
+    restart_at = restart_key - base + t0
+    cycle_new = new_driver | _after_runs(rest_run, restart_run)
+    cycle_id = np.cumsum(cycle_new) - 1
+
+    violations: List[Dict[str, Any]] = []
+
+    def report(mask, group_id, rule, at):
+        for i in _first_per_group(mask, group_id):
+            violations.append(_violation(driver_ids[d[i]], rule, at[i], cycle))
+
+    report(driving & (shift_drive > DRIVING_LIMIT), shift_id, RULE_DRIVING_11,
+           s + np.maximum(0.0, DRIVING_LIMIT - (shift_drive - dur)))
+    with np.errstate(invalid='ignore'):
+        report(driving & (e > seg_window_start + DUTY_WINDOW), shift_id, RULE_WINDOW_14,
+               np.maximum(s, seg_window_start + DUTY_WINDOW))
+    report(driving & (since_break > BREAK_REQUIRED_AFTER), break_id, RULE_BREAK_30,
+           s + np.maximum(0.0, BREAK_REQUIRED_AFTER - (since_break - dur)))
+
+    drive_idx = np.flatnonzero(driving)
+    cycle_used = np.zeros(n)
+    window_from = np.maximum(e[drive_idx] - span, restart_at[drive_idx])
+    cycle_used[drive_idx] = duty_end[drive_idx] - duty_until(window_from, base[drive_idx], d[drive_idx])
+    report(driving & (cycle_used > limit), cycle_id, RULE_CYCLE,
+           np.maximum(s, e - (cycle_used - limit)))
+
+    # Current status per driver: the open segment runs until now
+    last = np.flatnonzero(last_of_driver)
+    rested = np.where(on_duty[last], 0.0, rest_len[rest_run[last]])
+    fresh_shift = rested >= SHIFT_RESET_OFF_DUTY
+    drive_used = np.where(fresh_shift, 0.0, shift_drive[last])
+    window_used = np.where(fresh_shift | np.isnan(seg_window_start[last]), 0.0,
+                           now - np.nan_to_num(seg_window_start[last]))
+    on_break = ~driving[last] & (break_len[break_run[last]] >= BREAK_DURATION)
+    breakless = np.where(on_break, 0.0, since_break[last])
+    window_from = np.maximum(now - span, restart_at[last])
+    used = duty_end[last] - duty_until(window_from, base[last], d[last])
+    used = np.where(rested >= CYCLE_RESTART_OFF_DUTY, 0.0, used)
+    statuses_out = [
+        _status_entry(driver_ids[d[i]], int(st[i]), float(drive_used[k]), float(window_used[k]),
+                      float(breakless[k]), float(used[k]), cycle)
+        for k, i in enumerate(last)
+    ]
+
+    return {"statuses": statuses_out, "violations": violations}
+
+# --- Public API ---
+def evaluate_hos(logs: Iterable[Dict[str, Any]], now: Optional[datetime] = None,
+                 cycle: str = HOS_CYCLE_70_8) -> Dict[str, Any]:
+    """
+    Evaluate HOS limits for every driver in `logs`.
+
+    Args:
+        logs: HOS log dicts with driver_id, log_type and start_time.
+        now (datetime): Evaluation time (naive UTC); defaults to utcnow.
+        cycle (str): HOS_CYCLE_70_8 or HOS_CYCLE_60_7.
+
+    Returns:
+        dict: {"statuses": [...], "violations": [...]} with one status per
+        driver and violations ordered by time.
+    """
+    if cycle not in HOS_CYCLES:
+        raise ValueError(f"Unknown HOS cycle: {cycle}")
+    now_s = to_epoch_seconds(now or datetime.utcnow())
+
+    driver_codes: Dict[str, int] = {}
+    driver_ids: List[str] = []
+    codes: List[int] = []
+    statuses: List[int] = []
+    starts: List[float] = []
+    for log in logs:
+        start = to_epoch_seconds(log.get('start_time'))
+        if start is None or start > now_s:
+            continue
+        driver_id = log.get('driver_id')
+        code = driver_codes.get(driver_id)
+        if code is None:
+            code = driver_codes[driver_id] = len(driver_ids)
+            driver_ids.append(driver_id)
+        codes.append(code)
+        statuses.append(status_code(log.get('log_type')))
+        starts.append(start)
+
+    return evaluate_hos_columns(driver_ids, codes, statuses, starts, now_s, cycle)
+
+def evaluate_hos_columns(driver_ids: List[str], codes, statuses, starts, now: float,
+                         cycle: str = HOS_CYCLE_70_8) -> Dict[str, Any]:
+    """
+    Evaluate HOS limits from parallel columns.
+
+    `codes` index into `driver_ids`, `statuses` are duty status codes and
+    `starts` are epoch seconds; `now` is epoch seconds. Rows may be in any
+    order and must not start after `now`.
+    """
+    if not len(starts):
+        return {"statuses": [], "violations": []}
+    if NUMPY_AVAILABLE:
+        result = _evaluate_numpy(driver_ids, np.asarray(codes, dtype=np.int64),
+                                 np.asarray(statuses, dtype=np.int16),
+                                 np.asarray(starts, dtype=np.float64), now, cycle)
+    else:
+        result = _evaluate_python(driver_ids, list(codes), list(statuses), list(starts), now, cycle)
+    result["violations"].sort(key=lambda violation: (violation["occurred_at"], violation["driver_id"]))
+    return result
@@ -6,6 +6,8 @@ from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import Index
 
+from eld_serialization import encode_rows
+
 db = SQLAlchemy()
 
 class Driver(db.Model):
@@ -217,3 +219,14 @@ class Company(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+# --- Bulk Serialization ---
+def query_to_json(query) -> bytes:
+    """
+    JSON array of a model query's rows, equal to [row.to_dict() for row in query]
+    but read as column tuples: no model instances are built and dates are
+    encoded without per-value isoformat() calls.
+    """
+    model = query.column_descriptions[0]['entity']
+    columns = list(model.__table__.columns)
+    return encode_rows([column.name for column in columns], query.with_entities(*columns))
@@ -6,29 +6,79 @@ This is a standalone module that can be used independently or integrated with ot
 """
 
 import os
-import requests
+import sys
+import math
+import json
+import base64
+import time
+import queue
 import logging
+import threading
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import count, islice, repeat
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Iterable, Iterator, Set, Tuple
 from abc import ABC, abstractmethod
 
+from duty_timeline import DutyTimeline, get_duty_timeline
+from eld_metrics import (
+    ELD_METRICS, PROMETHEUS_CONTENT_TYPE, instrument_store_operation, phase, render_metrics,
+    traced_phase, write_metrics_snapshot,
+)
+from eld_serialization import (
+    encode_json, encode_page, encode_rows, iter_ndjson, iter_ndjson_rows, rows_to_records,
+)
+from fleet_rollups import (
+    FLEET_NEAR_LIMIT_HOURS, ROLLUP_DRIVER_STATUS, ROLLUP_VEHICLE_DEFECTS, ROLLUP_VIOLATIONS_DAILY,
+    day_keys, driver_status_entries, drivers_near_limit, fleet_overview, vehicle_defect_updates,
+    vehicles_with_defects, violation_day_updates, violation_days, violations_series,
+)
+from eld_tenancy import (
+    ELD_COMPANY_HEADER, UnknownTenantError, company_scope, current_company_id, get_tenant_registry,
+    reset_current_company, routed_company_id, set_current_company,
+)
+from geotab_client import GeotabAPIError, GeotabClient, get_geotab_client
+from hos_partitions import HOS_ARCHIVE_DIR, HOS_RETENTION_MONTHS, retention_cutoff
+from hos_rules import (
+    HOS_CYCLE_70_8, HOS_LOOKBACK, DriverHOSState, HOSCheckUnit, advance_hos_states, evaluate_hos,
+    evaluate_hos_columns, from_epoch_ms, from_epoch_seconds, status_code, to_epoch_ms,
+    to_epoch_seconds, to_utc_datetime,
+)
+
 # Optional dependencies - only import if available
 try:
-    from celery import Celery
+    from celery import Celery, chord
+    from celery.signals import task_postrun
     CELERY_AVAILABLE = True
 except ImportError:
     CELERY_AVAILABLE = False
 
 try:
-    from flask import Blueprint, jsonify, request
+    from flask import Blueprint, Response, current_app, g, jsonify, request, stream_with_context
     FLASK_AVAILABLE = True
 except ImportError:
     FLASK_AVAILABLE = False
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # --- Celery Setup (Optional) ---
 if CELERY_AVAILABLE:
     redis_url = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
     celery_app = Celery('rapid_eld', broker=redis_url, backend=redis_url)
+    
+    @task_postrun.connect
+    def _write_task_metrics(**kwargs):
+        """Share worker metrics with the web app's /metrics (needs ELD_METRICS_DIR)"""
+        write_metrics_snapshot()
 else:
     celery_app = None
 
@@ -38,39 +88,180 @@ def call_geotab_api(method: str, params: dict):
     """
     Makes an authenticated call to the Geotab API.
 
+    Uses the shared GeotabClient, so the HTTP connection and the Geotab
+    session id are reused and calls are rate limited, retried and circuit
+    broken as described in geotab_resilience.
+
     Args:
-        method (str): The name of the Geotab API method to call (e.g., "GetLogs").
+        method (str): The name of the Geotab API method to call (e.g., "Get").
         params (dict): A dictionary of parameters for the API call.
 
     Returns:
-        dict: The JSON response from the API or an error message.
+        The call's result (a list for Get), or {"error": message} once
+        retries are exhausted or the circuit is open. Callers that need to
+        tell the two apart should use GeotabClient.call and catch
+        GeotabAPIError.
     """
-    GEOTAB_API_KEY = os.environ.get("GEOTAB_API_KEY")
-    GEOTAB_USERNAME = os.environ.get("GEOTAB_USERNAME")
-    GEOTAB_DATABASE = os.environ.get("GEOTAB_DATABASE")
-    GEOTAB_BASE_URL = "https://my.geotab.com/apiv1"
-
-    payload = {
-        "credentials": {
-            "database": GEOTAB_DATABASE,
-            "userName": GEOTAB_USERNAME,
-            "password": GEOTAB_API_KEY
-        },
-        "method": method,
-        "params": params
+    try:
+        result = get_geotab_client().call(method, params)
+        return {} if result is None else result
+    except GeotabAPIError as e:
+        logging.error(str(e))
+        return {"error": str(e)}
+
+# Geotab DutyStatusLog statuses that change duty status; other log events
+# (login, certify, exemptions, ...) are not HOS segments and are skipped.
+GEOTAB_DUTY_STATUSES = {
+    "D": "driving",
+    "ON": "on_duty",
+    "YM": "on_duty",
+    "OFF": "off_duty",
+    "PC": "off_duty",
+    "WT": "off_duty",
+    "SB": "sleeper_berth",
+}
+
+GEOTAB_DVIR_TYPES = {
+    "PreTrip": "pre_trip",
+    "PostTrip": "post_trip",
+    "Intermediate": "roadside",
+}
+
+# Feed sync settings
+GEOTAB_SYNC_MODE = os.environ.get("GEOTAB_SYNC_MODE", "window")
+GEOTAB_FEED_RESULTS_LIMIT = int(os.environ.get("GEOTAB_FEED_RESULTS_LIMIT", "5000"))
+
+def _entity_id(value: Any) -> Optional[str]:
+    """Geotab references are either an id string or an object with an id"""
+    if isinstance(value, dict):
+        return value.get('id')
+    return value
+
+def normalize_duty_status_log(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Convert a Geotab DutyStatusLog to the HOS log shape used by the data stores"""
+    log_type = GEOTAB_DUTY_STATUSES.get(record.get('status'))
+    if log_type is None or record.get('state', 'Active') != 'Active':
+        return None
+    return {
+        "driver_id": _entity_id(record.get('driver')),
+        "vehicle_id": _entity_id(record.get('device')),
+        "log_type": log_type,
+        "start_time": to_utc_datetime(record.get('dateTime')),
+        "odometer_reading": record.get('odometer'),
+        "is_edited": bool(record.get('editDateTime')),
+        "source_id": record.get('id'),
+        "source_version": record.get('version'),
+    }
+
+def normalize_dvir_log(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Convert a Geotab DVIRLog to the DVIR report shape used by the data stores"""
+    defects = []
+    for defect in record.get('dVIRDefects') or []:
+        name = defect.get('defect')
+        if isinstance(name, dict):
+            name = name.get('name')
+        if name:
+            defects.append(name)
+    return {
+        "driver_id": _entity_id(record.get('driver')),
+        "vehicle_id": _entity_id(record.get('device')),
+        "inspection_type": GEOTAB_DVIR_TYPES.get(record.get('logType'), 'pre_trip'),
+        "inspection_date": to_utc_datetime(record.get('dateTime')),
+        "defects": defects,
+        "is_safe_to_drive": bool(record.get('isSafeToOperate', not defects)),
+        "source_id": record.get('id'),
+        "source_version": record.get('version'),
     }
 
+def feed_request(type_name: str, version: Optional[str], results_limit: int) -> Tuple[str, Dict[str, Any]]:
+    """GetFeed (method, params) for one entity type, resuming from `version`"""
+    params = {"typeName": type_name, "resultsLimit": results_limit}
+    if version:
+        params["fromVersion"] = version
+    else:
+        params["search"] = {"fromDate": (datetime.utcnow() - HOS_LOOKBACK).isoformat()}
+    return "GetFeed", params
+
+def read_feed_page(result: Optional[Dict[str, Any]], normalize, version: Optional[str],
+                   results_limit: int) -> Tuple[List[Dict[str, Any]], Optional[str], bool]:
+    """
+    Normalize one GetFeed result.
+
+    Returns:
+        tuple: (normalized records, next version token, whether more pages remain)
+    """
+    result = result or {}
+    data = result.get('data', [])
+    records = [record for record in map(normalize, data) if record is not None]
+    return records, result.get('toVersion') or version, len(data) >= results_limit
+
+# --- Keyset Pagination ---
+# A page key is (time field value, id) of the last record returned; the next
+# page starts strictly after it.
+PageKey = Tuple[datetime, Any]
+
+def _keyset_page(records: Iterable[Dict[str, Any]], field: str, after: Optional[PageKey],
+                 limit: int) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+    """
+    Order records by (field, id) and return up to `limit` of them after `after`,
+    with the key to resume from (None on the last page). Records without an
+    id are numbered in stored order within equal `field` values.
+    """
+    occurrences: Dict[datetime, int] = defaultdict(int)
+    keyed = []
+    for record in records:
+        value = to_utc_datetime(record.get(field)) or datetime.min
+        tie = record.get('id')
+        if tie is None:
+            tie = occurrences[value]
+            occurrences[value] += 1
+        keyed.append(((value, tie), record))
+    keyed.sort(key=lambda item: item[0])
+    start = bisect_right([key for key, _ in keyed], after) if after is not None else 0
+    page = keyed[start:start + limit]
+    next_key = page[-1][0] if page and start + limit < len(keyed) else None
+    return [record for _, record in page], next_key
+
+def _alert_page_key(alert: Dict[str, Any]) -> PageKey:
+    return to_utc_datetime(alert.get('created_at')) or datetime.min, alert.get('id')
+
+def encode_page_key(key: PageKey) -> str:
+    """Opaque URL-safe cursor for a page key"""
+    value, last_id = key
+    return base64.urlsafe_b64encode(json.dumps([value.isoformat(), last_id]).encode()).decode()
+
+def decode_page_key(cursor: str) -> PageKey:
+    """Page key from a cursor made by encode_page_key; raises ValueError if malformed"""
     try:
-        response = requests.post(GEOTAB_BASE_URL, json=payload, timeout=30)
-        response.raise_for_status()
-        return response.json().get('result', {})
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Geotab API call failed for method {method}: {e}")
-        return {"error": str(e)}
+        value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(value), last_id
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
 
 # --- Abstract Data Storage Interface ---
 class ELDDataStore(ABC):
-    """Abstract interface for ELD data storage"""
+    """
+    Abstract interface for ELD data storage.
+
+    HOS logs and DVIR reports that carry a `source_id` (the Geotab record id)
+    are upserted: storing a record whose source_id is already stored is a
+    no-op when `source_version` is unchanged and replaces the stored record
+    otherwise.
+    """
+    
+    # Timed into the eld_store_* metrics in every store class (see eld_metrics)
+    INSTRUMENTED_OPERATIONS = (
+        'store_hos_log', 'store_hos_logs', 'get_hos_logs', 'get_hos_logs_page',
+        'store_dvir_report', 'store_dvir_reports', 'get_dvir_reports', 'get_dvir_reports_page',
+        'store_alert', 'store_alerts', 'get_alerts', 'get_alerts_page', 'update_alerts',
+        'delete_alerts', 'get_hos_states', 'store_hos_states', 'get_feed_version',
+        'store_feed_version', 'archive_hos_partitions', 'get_rollups', 'store_rollups',
+        'get_hos_logs_by_source', 'get_hos_log_driver_ids',
+    )
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _instrument_store_class(cls)
     
     @abstractmethod
     def store_hos_log(self, log_data: Dict[str, Any]) -> bool:
@@ -105,8 +296,197 @@ class ELDDataStore(ABC):
                   alert_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """Retrieve alerts with optional filtering"""
         pass
+    
+    # Batch writes. The defaults store one record at a time; stores with a
+    # bulk path (e.g. one multi-row insert per chunk) override these.
+    def store_hos_logs(self, logs: Iterable[Dict[str, Any]]) -> int:
+        """Store many HOS logs; returns the number stored"""
+        return sum(1 for log in logs if self.store_hos_log(log))
+    
+    def store_dvir_reports(self, reports: Iterable[Dict[str, Any]]) -> int:
+        """Store many DVIR reports; returns the number stored"""
+        return sum(1 for report in reports if self.store_dvir_report(report))
+    
+    def store_alerts(self, alerts: Iterable[Dict[str, Any]]) -> int:
+        """Store many alerts; returns the number stored"""
+        return sum(1 for alert in alerts if self.store_alert(alert))
+
+    # Lookups for incremental HOS checks; the defaults scan get_hos_logs
+    def get_hos_logs_by_source(self, source_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Retrieve the stored HOS logs with the given source_ids, keyed by source_id"""
+        source_ids = set(source_ids)
+        return {log['source_id']: log for log in self.get_hos_logs()
+                if log.get('source_id') in source_ids}
+
+    def get_hos_log_driver_ids(self, start_date: Optional[datetime] = None,
+                               end_date: Optional[datetime] = None) -> Set[str]:
+        """Ids of the drivers with HOS logs starting in the date range"""
+        return {log['driver_id'] for log in self.get_hos_logs(None, start_date, end_date)
+                if log.get('driver_id')}
+
+    # HOS log write listeners, called with the driver ids whose logs were
+    # added or replaced (e.g. to invalidate cached HOS statuses)
+    def add_hos_log_listener(self, listener: Callable[[Iterable[str]], None]):
+        """Register a callback for HOS log writes"""
+        if not hasattr(self, '_hos_log_listeners'):
+            self._hos_log_listeners = []
+        if listener not in self._hos_log_listeners:
+            self._hos_log_listeners.append(listener)
+    
+    def _notify_hos_logs(self, driver_ids: Iterable[str]):
+        for listener in getattr(self, '_hos_log_listeners', ()):
+            listener(driver_ids)
+    
+    # Keyset pagination: HOS logs by (start_time, id), DVIRs by
+    # (inspection_date, id), alerts by (created_at, id). The defaults page
+    # over the get_* results; SQL stores override them with range queries.
+    def get_hos_logs_page(self, driver_id: Optional[str] = None,
+                          start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None,
+                          after: Optional[PageKey] = None,
+                          limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+        """Retrieve a page of HOS logs and the key of the next page"""
+        return _keyset_page(self.get_hos_logs(driver_id, start_date, end_date),
+                            'start_time', after, limit)
+    
+    def get_dvir_reports_page(self, driver_id: Optional[str] = None,
+                              vehicle_id: Optional[str] = None,
+                              after: Optional[PageKey] = None,
+                              limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+        """Retrieve a page of DVIR reports and the key of the next page"""
+        return _keyset_page(self.get_dvir_reports(driver_id, vehicle_id),
+                            'inspection_date', after, limit)
+    
+    def get_alerts_page(self, driver_id: Optional[str] = None,
+                        alert_type: Optional[str] = None,
+                        after: Optional[PageKey] = None,
+                        limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+        """Retrieve a page of alerts and the key of the next page"""
+        return _keyset_page(self.get_alerts(driver_id, alert_type), 'created_at', after, limit)
+    
+    # Streaming reads for exports. SQL stores override these to fetch rows in
+    # batches so memory stays flat regardless of result size.
+    def iter_hos_logs(self, driver_id: Optional[str] = None,
+                      start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over HOS logs with optional filtering"""
+        yield from self.get_hos_logs(driver_id, start_date, end_date)
+    
+    def iter_dvir_reports(self, driver_id: Optional[str] = None,
+                          vehicle_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over DVIR reports with optional filtering"""
+        yield from self.get_dvir_reports(driver_id, vehicle_id)
+    
+    def iter_alerts(self, driver_id: Optional[str] = None,
+                    alert_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over alerts with optional filtering"""
+        yield from self.get_alerts(driver_id, alert_type)
+    
+    # Alert lifecycle: coalesced repeats and resolutions update stored alerts,
+    # and retention deletes old resolved ones. The defaults suit stores
+    # whose get_alerts() returns their stored alert list itself.
+    def update_alerts(self, updates: Dict[Any, Dict[str, Any]]) -> int:
+        """Set fields on stored alerts, keyed by alert id; returns the number updated"""
+        updated = 0
+        for alert in self.get_alerts():
+            fields = updates.get(alert.get('id'))
+            if fields:
+                alert.update(fields)
+                updated += 1
+        return updated
+    
+    def delete_alerts(self, alert_ids: Iterable[Any]) -> int:
+        """Delete alerts by id; returns the number deleted"""
+        alert_ids = set(alert_ids)
+        alerts = self.get_alerts()
+        kept = [alert for alert in alerts if alert.get('id') not in alert_ids]
+        deleted = len(alerts) - len(kept)
+        alerts[:] = kept
+        return deleted
+    
+    # Per-driver HOS accumulator state for incremental violation checks.
+    # The default keeps it on the store instance; persistent stores override
+    # these so the state survives worker restarts.
+    def get_hos_states(self, driver_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Retrieve HOS accumulator state keyed by driver id"""
+        states = getattr(self, '_hos_states', {})
+        if driver_ids is None:
+            return dict(states)
+        return {driver_id: states[driver_id] for driver_id in driver_ids if driver_id in states}
+    
+    def store_hos_states(self, states: Dict[str, Dict[str, Any]]) -> bool:
+        """Store HOS accumulator state keyed by driver id"""
+        if not hasattr(self, '_hos_states'):
+            self._hos_states = {}
+        self._hos_states.update(states)
+        return True
+    
+    # Fleet compliance rollups (see fleet_rollups): small JSON entries keyed
+    # by rollup name and entry key, kept on the instance by default
+    def get_rollups(self, rollup: str, keys: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Retrieve a rollup's entries keyed by entry key"""
+        entries = getattr(self, '_rollups', {}).get(rollup, {})
+        if keys is None:
+            return dict(entries)
+        return {key: entries[key] for key in keys if key in entries}
+    
+    def store_rollups(self, rollup: str, entries: Dict[str, Dict[str, Any]],
+                      replace: bool = False) -> bool:
+        """Store rollup entries; replace=True drops the rollup's other entries"""
+        if not hasattr(self, '_rollups'):
+            self._rollups = {}
+        if replace:
+            self._rollups[rollup] = dict(entries)
+        else:
+            self._rollups.setdefault(rollup, {}).update(entries)
+        return True
+    
+    # Geotab GetFeed version tokens, keyed by entity type name
+    def get_feed_version(self, type_name: str) -> Optional[str]:
+        """Retrieve the last synced Geotab feed version for an entity type"""
+        return getattr(self, '_feed_versions', {}).get(type_name)
+    
+    def store_feed_version(self, type_name: str, version: str) -> bool:
+        """Store the Geotab feed version to resume an entity type's sync from"""
+        if not hasattr(self, '_feed_versions'):
+            self._feed_versions = {}
+        self._feed_versions[type_name] = version
+        return True
+
+def _instrument_store_class(cls):
+    """Wrap the store operations a class defines itself, once"""
+    if not ELD_METRICS:
+        return
+    for name in cls.INSTRUMENTED_OPERATIONS:
+        method = cls.__dict__.get(name)
+        if callable(method) and not getattr(method, '__instrumented__', False):
+            setattr(cls, name, instrument_store_operation(method))
+
+_instrument_store_class(ELDDataStore)
 
 # --- In-Memory Data Store (Default) ---
+def _upsert_record(records: List[Dict[str, Any]], by_source: Dict[str, int],
+                   record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Append a record, or replace the stored record with its source_id in place.
+    Returns the replaced record (the record itself if appended), or None if
+    an unchanged version was already stored.
+    """
+    source_id = record.get('source_id')
+    if source_id is None:
+        records.append(record)
+        return record
+    position = by_source.get(source_id)
+    if position is None:
+        by_source[source_id] = len(records)
+        records.append(record)
+        return record
+    previous = records[position]
+    if previous.get('source_version') == record.get('source_version'):
+        return None
+    records[position] = record
+    return previous
+
 class InMemoryELDDataStore(ELDDataStore):
     """In-memory implementation of ELD data storage"""
     
@@ -114,9 +494,17 @@ class InMemoryELDDataStore(ELDDataStore):
         self.hos_logs = []
         self.dvir_reports = []
         self.alerts = []
+        # source_id -> list position, for upserts
+        self._hos_by_source: Dict[str, int] = {}
+        self._dvir_by_source: Dict[str, int] = {}
+        self._alert_ids = count(1)
+        # Alerts by page key, so unfiltered alert pages are bisect slices
+        self._alerts_by_key = _TimeIndex()
     
     def store_hos_log(self, log_data: Dict[str, Any]) -> bool:
-        self.hos_logs.append(log_data)
+        previous = _upsert_record(self.hos_logs, self._hos_by_source, log_data)
+        if previous is not None:
+            self._notify_hos_logs({log_data.get('driver_id'), previous.get('driver_id')})
         return True
     
     def get_hos_logs(self, driver_id: Optional[str] = None, 
@@ -131,8 +519,13 @@ class InMemoryELDDataStore(ELDDataStore):
             logs = [log for log in logs if log.get('start_time', datetime.max) <= end_date]
         return logs
     
+    def get_hos_logs_by_source(self, source_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        positions = self._hos_by_source
+        return {source_id: self.hos_logs[positions[source_id]]
+                for source_id in source_ids if source_id in positions}
+    
     def store_dvir_report(self, dvir_data: Dict[str, Any]) -> bool:
-        self.dvir_reports.append(dvir_data)
+        _upsert_record(self.dvir_reports, self._dvir_by_source, dvir_data)
         return True
     
     def get_dvir_reports(self, driver_id: Optional[str] = None,
@@ -145,9 +538,28 @@ class InMemoryELDDataStore(ELDDataStore):
         return reports
     
     def store_alert(self, alert_data: Dict[str, Any]) -> bool:
+        alert_data.setdefault('id', next(self._alert_ids))
         self.alerts.append(alert_data)
+        self._alerts_by_key.insert(_alert_page_key(alert_data), alert_data)
         return True
     
+    def delete_alerts(self, alert_ids: Iterable[Any]) -> int:
+        alert_ids = set(alert_ids)
+        kept = [alert for alert in self.alerts if alert.get('id') not in alert_ids]
+        deleted = len(self.alerts) - len(kept)
+        if deleted:
+            self.alerts = kept
+            self._alerts_by_key = _index_alerts(kept)
+        return deleted
+    
+    def get_alerts_page(self, driver_id: Optional[str] = None,
+                        alert_type: Optional[str] = None,
+                        after: Optional[PageKey] = None,
+                        limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+        if driver_id or alert_type:
+            return super().get_alerts_page(driver_id, alert_type, after, limit)
+        return self._alerts_by_key.page(after, limit)
+    
     def get_alerts(self, driver_id: Optional[str] = None,
                   alert_type: Optional[str] = None) -> List[Dict[str, Any]]:
         alerts = self.alerts
@@ -157,7 +569,501 @@ class InMemoryELDDataStore(ELDDataStore):
             alerts = [alert for alert in alerts if alert.get('type') == alert_type]
         return alerts
 
+# --- Indexed In-Memory Data Store ---
+def _position(items: List[Dict[str, Any]], item: Dict[str, Any]) -> int:
+    """Position of a stored record, by identity"""
+    return next(i for i, stored in enumerate(items) if stored is item)
+
+class _TimeIndex:
+    """Items kept sorted by timestamp (or page key) for bisect range slicing"""
+
+    __slots__ = ('keys', 'items')
+
+    def __init__(self):
+        self.keys: List[Any] = []
+        self.items: List[Dict[str, Any]] = []
+
+    def insert(self, key: datetime, item: Dict[str, Any]):
+        # Geotab delivers records roughly in time order, so the common case
+        # is a plain append; out-of-order records fall back to a bisect insert.
+        if not self.keys or key >= self.keys[-1]:
+            self.keys.append(key)
+            self.items.append(item)
+        else:
+            i = bisect_right(self.keys, key)
+            self.keys.insert(i, key)
+            self.items.insert(i, item)
+
+    def remove(self, key: datetime, item: Dict[str, Any]):
+        lo = bisect_left(self.keys, key)
+        hi = bisect_right(self.keys, key)
+        i = lo + _position(self.items[lo:hi], item)
+        del self.keys[i]
+        del self.items[i]
+
+    def range(self, start: Optional[datetime] = None,
+              end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        lo = bisect_left(self.keys, start) if start else 0
+        hi = bisect_right(self.keys, end) if end else len(self.keys)
+        return self.items[lo:hi]
+
+    def page(self, after: Optional[PageKey],
+             limit: int) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+        """Up to `limit` items keyed after `after`, as _keyset_page returns them"""
+        start = bisect_right(self.keys, after) if after is not None else 0
+        end = start + limit
+        return self.items[start:end], self.keys[end - 1] if end < len(self.keys) else None
+
+    def __len__(self):
+        return len(self.keys)
+
+def _index_alerts(alerts: Iterable[Dict[str, Any]]) -> _TimeIndex:
+    """Alerts keyed by (created_at, id), the order of alert pages"""
+    index = _TimeIndex()
+    for alert in sorted(alerts, key=_alert_page_key):
+        index.insert(_alert_page_key(alert), alert)
+    return index
+
+class IndexedInMemoryELDDataStore(ELDDataStore):
+    """
+    In-memory ELD data storage with per-driver and per-vehicle indexes.
+
+    HOS logs are kept sorted by start_time, both fleet-wide and per driver,
+    so driver and date range lookups are bisect slices instead of full list
+    scans. Results are returned in start_time order. An edited HOS log is
+    re-indexed at its new start_time.
+    """
+
+    def __init__(self):
+        self._hos_logs = _TimeIndex()
+        self._hos_by_driver: Dict[str, _TimeIndex] = {}
+        # Logs without a start_time only match unfiltered date queries,
+        # the same as InMemoryELDDataStore.
+        self._untimed_hos_logs: List[Dict[str, Any]] = []
+        self._untimed_by_driver: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._dvir_reports: List[Dict[str, Any]] = []
+        self._dvir_by_driver: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._dvir_by_vehicle: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._alerts: List[Dict[str, Any]] = []
+        self._alerts_by_driver: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._alerts_by_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._alerts_by_key = _TimeIndex()
+        # source_id -> stored record, for upserts
+        self._hos_by_source: Dict[str, Dict[str, Any]] = {}
+        self._dvir_by_source: Dict[str, Dict[str, Any]] = {}
+        self._alert_ids = count(1)
+
+    def store_hos_log(self, log_data: Dict[str, Any]) -> bool:
+        driver_ids = {log_data.get('driver_id')}
+        source_id = log_data.get('source_id')
+        if source_id is not None:
+            stored = self._hos_by_source.get(source_id)
+            if stored is not None:
+                if stored.get('source_version') == log_data.get('source_version'):
+                    return True
+                self._unindex_hos_log(stored)
+                driver_ids.add(stored.get('driver_id'))
+            self._hos_by_source[source_id] = log_data
+        self._index_hos_log(log_data)
+        self._notify_hos_logs(driver_ids)
+        return True
+
+    def _index_hos_log(self, log_data: Dict[str, Any]):
+        driver_id = log_data.get('driver_id')
+        start_time = to_utc_datetime(log_data.get('start_time'))
+        if start_time is None:
+            self._untimed_hos_logs.append(log_data)
+            self._untimed_by_driver[driver_id].append(log_data)
+            return
+        self._hos_logs.insert(start_time, log_data)
+        driver_index = self._hos_by_driver.get(driver_id)
+        if driver_index is None:
+            driver_index = self._hos_by_driver[driver_id] = _TimeIndex()
+        driver_index.insert(start_time, log_data)
+
+    def _unindex_hos_log(self, log_data: Dict[str, Any]):
+        driver_id = log_data.get('driver_id')
+        start_time = to_utc_datetime(log_data.get('start_time'))
+        if start_time is None:
+            for logs in (self._untimed_hos_logs, self._untimed_by_driver[driver_id]):
+                del logs[_position(logs, log_data)]
+            return
+        self._hos_logs.remove(start_time, log_data)
+        self._hos_by_driver[driver_id].remove(start_time, log_data)
+
+    def get_hos_logs(self, driver_id: Optional[str] = None,
+                    start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        if driver_id:
+            index = self._hos_by_driver.get(driver_id)
+            untimed = self._untimed_by_driver.get(driver_id, [])
+        else:
+            index = self._hos_logs
+            untimed = self._untimed_hos_logs
+        logs = index.range(to_utc_datetime(start_date), to_utc_datetime(end_date)) if index else []
+        if not start_date and not end_date:
+            logs = logs + untimed
+        return logs
+
+    def get_hos_logs_by_source(self, source_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        stored = self._hos_by_source
+        return {source_id: stored[source_id] for source_id in source_ids if source_id in stored}
+
+    def get_hos_log_driver_ids(self, start_date: Optional[datetime] = None,
+                               end_date: Optional[datetime] = None) -> Set[str]:
+        start, end = to_utc_datetime(start_date), to_utc_datetime(end_date)
+        driver_ids = {driver_id for driver_id, index in self._hos_by_driver.items()
+                      if driver_id and index.range(start, end)}
+        if not start_date and not end_date:
+            driver_ids.update(driver_id for driver_id, logs in self._untimed_by_driver.items()
+                              if driver_id and logs)
+        return driver_ids
+
+    def store_dvir_report(self, dvir_data: Dict[str, Any]) -> bool:
+        source_id = dvir_data.get('source_id')
+        stored = self._dvir_by_source.get(source_id) if source_id is not None else None
+        if stored is None:
+            self._dvir_reports.append(dvir_data)
+        elif stored.get('source_version') == dvir_data.get('source_version'):
+            return True
+        else:
+            self._dvir_reports[_position(self._dvir_reports, stored)] = dvir_data
+            for bucket in (self._dvir_by_driver[stored.get('driver_id')],
+                           self._dvir_by_vehicle[stored.get('vehicle_id')]):
+                del bucket[_position(bucket, stored)]
+        if source_id is not None:
+            self._dvir_by_source[source_id] = dvir_data
+        self._dvir_by_driver[dvir_data.get('driver_id')].append(dvir_data)
+        self._dvir_by_vehicle[dvir_data.get('vehicle_id')].append(dvir_data)
+        return True
+
+    def get_dvir_reports(self, driver_id: Optional[str] = None,
+                        vehicle_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        if driver_id and vehicle_id:
+            by_driver = self._dvir_by_driver.get(driver_id, [])
+            by_vehicle = self._dvir_by_vehicle.get(vehicle_id, [])
+            # Scan whichever index bucket is smaller
+            if len(by_driver) <= len(by_vehicle):
+                return [report for report in by_driver if report.get('vehicle_id') == vehicle_id]
+            return [report for report in by_vehicle if report.get('driver_id') == driver_id]
+        if driver_id:
+            return list(self._dvir_by_driver.get(driver_id, []))
+        if vehicle_id:
+            return list(self._dvir_by_vehicle.get(vehicle_id, []))
+        return list(self._dvir_reports)
+
+    def store_alert(self, alert_data: Dict[str, Any]) -> bool:
+        alert_data.setdefault('id', next(self._alert_ids))
+        self._alerts.append(alert_data)
+        self._alerts_by_driver[alert_data.get('driver_id')].append(alert_data)
+        self._alerts_by_type[alert_data.get('type')].append(alert_data)
+        self._alerts_by_key.insert(_alert_page_key(alert_data), alert_data)
+        return True
+
+    def delete_alerts(self, alert_ids: Iterable[Any]) -> int:
+        alert_ids = set(alert_ids)
+        deleted = [alert for alert in self._alerts if alert.get('id') in alert_ids]
+        if not deleted:
+            return 0
+        self._alerts = [alert for alert in self._alerts if alert.get('id') not in alert_ids]
+        self._alerts_by_key = _index_alerts(self._alerts)
+        for index, key in ((self._alerts_by_driver, 'driver_id'), (self._alerts_by_type, 'type')):
+            for value in {alert.get(key) for alert in deleted}:
+                kept = [alert for alert in index[value] if alert.get('id') not in alert_ids]
+                if kept:
+                    index[value] = kept
+                else:
+                    del index[value]
+        return len(deleted)
+
+    def get_alerts(self, driver_id: Optional[str] = None,
+                  alert_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        if driver_id and alert_type:
+            by_driver = self._alerts_by_driver.get(driver_id, [])
+            by_type = self._alerts_by_type.get(alert_type, [])
+            if len(by_driver) <= len(by_type):
+                return [alert for alert in by_driver if alert.get('type') == alert_type]
+            return [alert for alert in by_type if alert.get('driver_id') == driver_id]
+        if driver_id:
+            return list(self._alerts_by_driver.get(driver_id, []))
+        if alert_type:
+            return list(self._alerts_by_type.get(alert_type, []))
+        return list(self._alerts)
+
+    def get_alerts_page(self, driver_id: Optional[str] = None,
+                        alert_type: Optional[str] = None,
+                        after: Optional[PageKey] = None,
+                        limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+        if driver_id or alert_type:
+            return super().get_alerts_page(driver_id, alert_type, after, limit)
+        return self._alerts_by_key.page(after, limit)
+
+# --- Columnar Data Store ---
+# Standard duty statuses; the uint8 log_type column stores indexes into this
+# table, with unknown statuses appended on first sight.
+HOS_LOG_TYPES = ('off_duty', 'sleeper_berth', 'driving', 'on_duty')
+
+_NULL_TIME = -(2 ** 63)
+_NULL_INT = -1
+_NULL_ODOMETER = float('nan')
+
+def _encode_time(value: Any) -> int:
+    ms = to_epoch_ms(value)
+    return _NULL_TIME if ms is None else ms
+
+def _decode_time(value: int) -> Optional[datetime]:
+    return None if value == _NULL_TIME else from_epoch_ms(value)
+
+def _encode_version(version: Any) -> int:
+    """Geotab versions are 16-digit hex longs; anything else returns _NULL_INT"""
+    if isinstance(version, str) and len(version) == 16:
+        try:
+            value = int(version, 16)
+        except ValueError:
+            return _NULL_INT
+        if value < 2 ** 63 and format(value, '016x') == version:
+            return value
+    return _NULL_INT
+
+class _Interner:
+    """Bidirectional string <-> small int mapping"""
+
+    __slots__ = ('values', 'codes')
+
+    def __init__(self, initial=()):
+        self.values: List[Optional[str]] = []
+        self.codes: Dict[Optional[str], int] = {}
+        for value in initial:
+            self.intern(value)
+
+    def intern(self, value: Optional[str]) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+class ColumnarELDDataStore(IndexedInMemoryELDDataStore):
+    """
+    Columnar in-memory ELD data storage for long HOS log retention.
+
+    HOS log fields are stored as typed arrays instead of one dict per record:
+    interned driver/vehicle ids (int32), start/end times as epoch
+    milliseconds (int64), log_type as a uint8 enum and odometer as float64
+    (NaN when missing), which keeps fractional readings and any int up to
+    2**53 exactly; whole readings read back as ints.
+    Geotab source ids are interned and source versions stored as int64, and
+    an edited log overwrites its row. Fields without a column are kept in a
+    sparse side table. Dicts are only built for the rows a query returns.
+    DVIRs and alerts use the indexed in-memory storage.
+    """
+
+    _COLUMN_FIELDS = frozenset((
+        'driver_id', 'vehicle_id', 'log_type', 'start_time', 'end_time',
+        'odometer_reading', 'is_edited',
+    ))
+
+    def __init__(self):
+        super().__init__()
+        self._drivers = _Interner()
+        self._vehicles = _Interner()
+        self._log_types = _Interner(HOS_LOG_TYPES)
+        self._driver_col = array('i')
+        self._vehicle_col = array('i')
+        self._type_col = array('B')
+        self._start_col = array('q')
+        self._end_col = array('q')
+        self._odometer_col = array('d')
+        self._edited_col = array('B')
+        self._sources = _Interner()
+        self._source_col = array('i')
+        self._version_col = array('q')
+        # Row of each interned source id
+        self._source_rows = array('i')
+        self._extras: Dict[int, Dict[str, Any]] = {}
+
+    def __len__(self):
+        return len(self._start_col)
+
+    def _hos_columns(self):
+        return (self._driver_col, self._vehicle_col, self._type_col, self._start_col,
+                self._end_col, self._odometer_col, self._edited_col, self._source_col,
+                self._version_col)
+
+    def store_hos_log(self, log_data: Dict[str, Any]) -> bool:
+        source_id = log_data.get('source_id')
+        source = _NULL_INT
+        if source_id is not None:
+            source = self._sources.codes.get(source_id, _NULL_INT)
+            if source != _NULL_INT:
+                row = self._source_rows[source]
+                if self._source_version(row) != log_data.get('source_version'):
+                    previous_driver = self._drivers.values[self._driver_col[row]]
+                    self._write_hos_row(row, source, log_data)
+                    self._notify_hos_logs({log_data.get('driver_id'), previous_driver})
+                return True
+            source = self._sources.intern(source_id)
+            self._source_rows.append(len(self._start_col))
+        row = len(self._start_col)
+        for column in self._hos_columns():
+            column.append(0)
+        self._write_hos_row(row, source, log_data)
+        self._notify_hos_logs((log_data.get('driver_id'),))
+        return True
+
+    def _write_hos_row(self, row: int, source: int, log_data: Dict[str, Any]):
+        odometer = log_data.get('odometer_reading')
+        self._driver_col[row] = self._drivers.intern(log_data.get('driver_id'))
+        self._vehicle_col[row] = self._vehicles.intern(log_data.get('vehicle_id'))
+        self._type_col[row] = self._log_types.intern(log_data.get('log_type'))
+        self._start_col[row] = _encode_time(log_data.get('start_time'))
+        self._end_col[row] = _encode_time(log_data.get('end_time'))
+        self._odometer_col[row] = _NULL_ODOMETER if odometer is None else float(odometer)
+        self._edited_col[row] = 1 if log_data.get('is_edited') else 0
+        self._source_col[row] = source
+        version = _NULL_INT
+        skip = self._COLUMN_FIELDS
+        if source != _NULL_INT:
+            version = _encode_version(log_data.get('source_version'))
+            skip = skip | ({'source_id'} if version == _NULL_INT else {'source_id', 'source_version'})
+        self._version_col[row] = version
+        extras = {key: value for key, value in log_data.items() if key not in skip}
+        if extras:
+            self._extras[row] = extras
+        else:
+            self._extras.pop(row, None)
+
+    def _source_version(self, row: int) -> Optional[str]:
+        version = self._version_col[row]
+        if version != _NULL_INT:
+            return format(version, '016x')
+        return self._extras.get(row, {}).get('source_version')
+
+    def get_hos_logs(self, driver_id: Optional[str] = None,
+                    start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        rows = self._select_hos_rows(driver_id, start_date, end_date)
+        if NUMPY_AVAILABLE:
+            rows = rows.tolist()
+        return [self._materialize_hos_log(row) for row in rows]
+
+    def iter_hos_logs(self, driver_id: Optional[str] = None,
+                      start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        rows = self._select_hos_rows(driver_id, start_date, end_date)
+        if NUMPY_AVAILABLE:
+            rows = rows.tolist()
+        for row in rows:
+            yield self._materialize_hos_log(row)
+
+    def get_hos_logs_by_source(self, source_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        codes = self._sources.codes
+        return {source_id: self._materialize_hos_log(self._source_rows[codes[source_id]])
+                for source_id in source_ids if source_id in codes}
+
+    def get_hos_log_driver_ids(self, start_date: Optional[datetime] = None,
+                               end_date: Optional[datetime] = None) -> Set[str]:
+        rows = self._select_hos_rows(None, start_date, end_date)
+        if NUMPY_AVAILABLE:
+            codes = np.unique(np.frombuffer(self._driver_col, dtype=np.int32)[rows]).tolist()
+        else:
+            codes = {self._driver_col[row] for row in rows}
+        return {self._drivers.values[code] for code in codes if self._drivers.values[code]}
+
+    def hos_log_columns(self, driver_id: Optional[str] = None,
+                        start_date: Optional[datetime] = None,
+                        end_date: Optional[datetime] = None):
+        """
+        Matching rows as columns for the HOS rules engine, without building dicts.
+
+        Returns:
+            tuple: (driver id table, driver codes, duty status codes, start
+            times in epoch seconds). Status codes follow HOS_LOG_TYPES.
+        """
+        rows = self._select_hos_rows(driver_id, start_date, end_date)
+        if NUMPY_AVAILABLE:
+            return (self._drivers.values,
+                    np.frombuffer(self._driver_col, dtype=np.int32)[rows],
+                    np.frombuffer(self._type_col, dtype=np.uint8)[rows],
+                    np.frombuffer(self._start_col, dtype=np.int64)[rows] / 1000.0)
+        return (self._drivers.values,
+                [self._driver_col[row] for row in rows],
+                [self._type_col[row] for row in rows],
+                [self._start_col[row] / 1000.0 for row in rows])
+
+    def _select_hos_rows(self, driver_id: Optional[str] = None,
+                         start_date: Optional[datetime] = None,
+                         end_date: Optional[datetime] = None):
+        """Row numbers matching the filters, in insertion order (an ndarray with NumPy)"""
+        driver_code = None
+        if driver_id:
+            driver_code = self._drivers.codes.get(driver_id)
+            if driver_code is None:
+                return np.empty(0, dtype=np.int64) if NUMPY_AVAILABLE else []
+        start_ms = _encode_time(start_date) if start_date else None
+        end_ms = _encode_time(end_date) if end_date else None
+
+        if NUMPY_AVAILABLE:
+            mask = np.ones(len(self._start_col), dtype=bool)
+            if driver_code is not None:
+                mask &= np.frombuffer(self._driver_col, dtype=np.int32) == driver_code
+            if start_ms is not None or end_ms is not None:
+                starts = np.frombuffer(self._start_col, dtype=np.int64)
+                mask &= starts != _NULL_TIME
+                if start_ms is not None:
+                    mask &= starts >= start_ms
+                if end_ms is not None:
+                    mask &= starts <= end_ms
+            return np.flatnonzero(mask)
+
+        rows = range(len(self._start_col))
+        if driver_code is not None:
+            drivers = self._driver_col
+            rows = [row for row in rows if drivers[row] == driver_code]
+        if start_ms is not None or end_ms is not None:
+            starts = self._start_col
+            low = _NULL_TIME + 1 if start_ms is None else start_ms
+            high = 2 ** 63 - 1 if end_ms is None else end_ms
+            rows = [row for row in rows if low <= starts[row] <= high]
+        return rows
+
+    def _materialize_hos_log(self, row: int) -> Dict[str, Any]:
+        odometer = self._odometer_col[row]
+        log = {
+            'driver_id': self._drivers.values[self._driver_col[row]],
+            'vehicle_id': self._vehicles.values[self._vehicle_col[row]],
+            'log_type': self._log_types.values[self._type_col[row]],
+            'start_time': _decode_time(self._start_col[row]),
+            'end_time': _decode_time(self._end_col[row]),
+            'odometer_reading': (None if math.isnan(odometer)
+                                 else int(odometer) if odometer.is_integer() else odometer),
+            'is_edited': bool(self._edited_col[row]),
+        }
+        source = self._source_col[row]
+        if source != _NULL_INT:
+            log['source_id'] = self._sources.values[source]
+            version = self._version_col[row]
+            if version != _NULL_INT:
+                log['source_version'] = format(version, '016x')
+        extras = self._extras.get(row)
+        if extras:
+            log.update(extras)
+        return log
+
+    def memory_footprint(self) -> int:
+        """Approximate bytes held by the HOS log columns and side tables"""
+        columns = self._hos_columns() + (self._source_rows,)
+        size = sum(column.itemsize * len(column) for column in columns)
+        size += sys.getsizeof(self._extras) + sum(sys.getsizeof(extra) for extra in self._extras.values())
+        size += (sys.getsizeof(self._sources.codes) + sys.getsizeof(self._sources.values)
+                 + sum(sys.getsizeof(source_id) for source_id in self._sources.values))
+        return size
+
 # --- Global Data Store Instance ---
+# When set, the default store is journaled to this directory and restored
+# from it on startup (see store_journal.py)
+ELD_JOURNAL_DIR = os.environ.get("ELD_JOURNAL_DIR")
+
 _data_store: Optional[ELDDataStore] = None
 
 def set_data_store(store: ELDDataStore):
@@ -165,108 +1071,989 @@ def set_data_store(store: ELDDataStore):
     global _data_store
     _data_store = store
 
-def get_data_store() -> ELDDataStore:
-    """Get the global data store instance"""
+def get_data_store(company_id: Optional[str] = None) -> ELDDataStore:
+    """
+    Get the data store of `company_id` (default: the current company) when
+    tenant stores are registered (see eld_tenancy), else the global instance.
+    """
     global _data_store
+    registry = get_tenant_registry()
+    if registry.enabled:
+        company_id = company_id if company_id is not None else current_company_id()
+        if company_id is not None:
+            return registry.get(company_id)
     if _data_store is None:
-        _data_store = InMemoryELDDataStore()
+        if ELD_JOURNAL_DIR:
+            from store_journal import JournaledELDDataStore
+            _data_store = JournaledELDDataStore(ELD_JOURNAL_DIR)
+        else:
+            _data_store = InMemoryELDDataStore()
     return _data_store
 
+# --- HOS Status Cache ---
+HOS_STATUS_CACHE_TTL = float(os.environ.get("HOS_STATUS_CACHE_TTL", "15"))
+
+class HOSStatusCache:
+    """
+    Per-driver HOS status cache shared by the ELDService instances of a data store.
+
+    Entries expire after `ttl` seconds, since hours remaining keep counting
+    down while a driver is on duty, and are dropped as soon as the store
+    receives a new or edited HOS log for the driver. Misses are computed one
+    at a time, so concurrent requests for the same driver wait for a single
+    computation and then hit. A fleet-wide request after one driver changed
+    recomputes only that driver.
+    """
+
+    def __init__(self, ttl: float = HOS_STATUS_CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # driver_id -> {hos cycle: (expires at, statuses)}
+        self._entries: Dict[str, Dict[str, Tuple[float, List[Dict[str, Any]]]]] = {}
+        # hos cycle -> (expires at, driver ids) of the last fleet-wide computation
+        self._fleets: Dict[str, Tuple[float, List[str]]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()
+
+    def invalidate(self, driver_ids: Iterable[str]):
+        """Drop the cached statuses of drivers whose HOS logs changed"""
+        with self._lock:
+            self._generation += 1
+            for driver_id in driver_ids:
+                self.invalidations += 1
+                self._entries.pop(driver_id, None)
+                # A driver the fleet list doesn't know yet makes it stale
+                for cycle, (_, drivers) in list(self._fleets.items()):
+                    if driver_id not in drivers:
+                        del self._fleets[cycle]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._fleets.clear()
+
+    def get(self, cycle: str, driver_id: Optional[str],
+            compute: Callable[[Optional[str]], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Cached statuses for one driver, or for every driver when driver_id is
+        None. `compute(driver_id)` evaluates statuses on a miss.
+        """
+        statuses = self._lookup(cycle, driver_id)
+        if statuses is None:
+            with self._compute_lock:
+                # Another request may have filled the entry while we waited
+                statuses = self._lookup(cycle, driver_id, count=False)
+                if statuses is None:
+                    return self._compute(cycle, driver_id, compute)
+        with self._lock:
+            self.hits += 1
+        return statuses
+
+    def _lookup(self, cycle: str, driver_id: Optional[str],
+                count: bool = True) -> Optional[List[Dict[str, Any]]]:
+        now = time.monotonic()
+        with self._lock:
+            if driver_id is not None:
+                entry = self._entries.get(driver_id, {}).get(cycle)
+                return entry[1] if entry and entry[0] > now else None
+            fleet = self._fleets.get(cycle)
+            if fleet is None or fleet[0] <= now:
+                return None
+            statuses = []
+            for fleet_driver in fleet[1]:
+                entry = self._entries.get(fleet_driver, {}).get(cycle)
+                if entry is None or entry[0] <= now:
+                    return None
+                statuses.extend(entry[1])
+            return statuses
+
+    def _compute(self, cycle: str, driver_id: Optional[str],
+                 compute: Callable[[Optional[str]], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            self.misses += 1
+            generation = self._generation
+            fleet = self._fleets.get(cycle) if driver_id is None else None
+            if fleet is not None and fleet[0] <= now:
+                fleet = None
+        if fleet is None:
+            drivers = [driver_id] if driver_id is not None else None
+            statuses = compute(driver_id)
+            by_driver: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for status in statuses:
+                by_driver[status['driverId']].append(status)
+            if driver_id is not None:
+                by_driver.setdefault(driver_id, [])
+        else:
+            # Only some drivers were invalidated: recompute just those
+            drivers = fleet[1]
+            by_driver = {}
+            for fleet_driver in drivers:
+                with self._lock:
+                    entry = self._entries.get(fleet_driver, {}).get(cycle)
+                if entry is not None and entry[0] > now:
+                    by_driver[fleet_driver] = entry[1]
+                else:
+                    by_driver[fleet_driver] = compute(fleet_driver)
+            statuses = [status for driver_statuses in by_driver.values() for status in driver_statuses]
+
+        expires = now + self.ttl
+        with self._lock:
+            # Don't cache results that a concurrent write has already made stale
+            if generation == self._generation:
+                for key, driver_statuses in by_driver.items():
+                    self._entries.setdefault(key, {})[cycle] = (expires, driver_statuses)
+                if driver_id is None:
+                    self._fleets[cycle] = (fleet[0] if fleet else expires,
+                                           drivers if drivers is not None else list(by_driver))
+        return statuses
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "drivers": len(self._entries),
+            }
+
+_status_caches: 'weakref.WeakKeyDictionary[ELDDataStore, HOSStatusCache]' = weakref.WeakKeyDictionary()
+_status_caches_lock = threading.Lock()
+
+def get_hos_status_cache(data_store: ELDDataStore) -> HOSStatusCache:
+    """Get the HOS status cache of a data store, created and subscribed to its writes on first use"""
+    with _status_caches_lock:
+        cache = _status_caches.get(data_store)
+        if cache is None:
+            cache = _status_caches[data_store] = HOSStatusCache()
+            data_store.add_hos_log_listener(cache.invalidate)
+        return cache
+
+# --- Alert Coalescing and Retention ---
+# Repeats of an unresolved alert - same driver, type and rule, occurring
+# within ALERT_COALESCE_WINDOW seconds of it - bump its `occurrences` and
+# `last_seen` instead of storing a new alert. Alerts not seen again for
+# ALERT_RESOLVE_AFTER_HOURS are resolved, and resolved alerts are deleted
+# after ALERT_RETENTION_DAYS, so stored alerts track active issues.
+ALERT_COALESCE_WINDOW = float(os.environ.get("ALERT_COALESCE_WINDOW", str(4 * 3600)))
+ALERT_RESOLVE_AFTER = timedelta(hours=float(os.environ.get("ALERT_RESOLVE_AFTER_HOURS", "24")))
+ALERT_RETENTION = timedelta(days=float(os.environ.get("ALERT_RETENTION_DAYS", "30")))
+
+def alert_fingerprint(alert: Dict[str, Any]) -> Tuple[Any, Any, Any]:
+    """(driver, type, rule) identity of an alert; SQL stores return the type as alert_type"""
+    return (alert.get('driver_id'), alert.get('type', alert.get('alert_type')),
+            alert.get('rule') or alert.get('title'))
+
+def _alert_time(alert: Dict[str, Any]) -> Optional[datetime]:
+    return to_utc_datetime(alert.get('occurred_at') or alert.get('created_at'))
+
+def _is_resolved(alert: Dict[str, Any]) -> bool:
+    return bool(alert.get('resolved_at') or alert.get('is_resolved'))
+
+def coalesce_alerts(data_store: ELDDataStore, alerts: List[Dict[str, Any]],
+                    window: float = ALERT_COALESCE_WINDOW) -> Tuple[List[Dict[str, Any]], Dict[Any, Dict[str, Any]]]:
+    """
+    Split new alerts into the ones to store and updates to unresolved
+    alerts they repeat (keyed by alert id). Repeats within `alerts` are
+    folded into the first of them.
+    """
+    # Fingerprint index of the unresolved alerts of the drivers in this
+    # batch: (time, alert, stored) entries, with copies of stored alerts
+    index: Dict[Tuple[Any, Any, Any], List[Tuple[Optional[datetime], Dict[str, Any], bool]]] = defaultdict(list)
+    for driver_id in {alert.get('driver_id') for alert in alerts}:
+        for stored in data_store.get_alerts(driver_id):
+            if not _is_resolved(stored):
+                index[alert_fingerprint(stored)].append((_alert_time(stored), dict(stored), True))
+
+    new_alerts: List[Dict[str, Any]] = []
+    updates: Dict[Any, Dict[str, Any]] = {}
+    for alert in alerts:
+        seen = alert.get('created_at') or datetime.utcnow()
+        occurred = _alert_time(alert)
+        entries = index[alert_fingerprint(alert)]
+        match = None
+        if occurred is not None:
+            distances = [(abs((time - occurred).total_seconds()), position)
+                         for position, (time, _, _) in enumerate(entries) if time is not None]
+            distance, position = min(distances, default=(None, None))
+            if distance is not None and distance <= window:
+                match = entries[position]
+        if match is None:
+            alert.setdefault('occurrences', 1)
+            alert.setdefault('first_seen', seen)
+            alert.setdefault('last_seen', seen)
+            new_alerts.append(alert)
+            entries.append((occurred, alert, False))
+            continue
+        _, existing, stored = match
+        existing['occurrences'] = (existing.get('occurrences') or 1) + 1
+        existing['last_seen'] = seen
+        if stored:
+            updates[existing['id']] = {"occurrences": existing['occurrences'], "last_seen": seen}
+    return new_alerts, updates
+
 # --- Core ELD Business Logic ---
+def _hos_segments(logs: List[Dict[str, Any]]) -> List[Tuple[int, float]]:
+    """(status code, start epoch seconds) pairs in time order for DriverHOSState.advance"""
+    starts = sorted((to_epoch_seconds(log['start_time']), status_code(log.get('log_type')))
+                    for log in logs if log.get('start_time') is not None)
+    return [(status, start) for start, status in starts]
+
+# Parallel violation checks: drivers per chunk, and where run_hos_violation_check
+# folds them - 'inline', 'process' (a local process pool of HOS_CHECK_WORKERS)
+# or 'celery' (one subtask per chunk, needs a store shared by all workers)
+HOS_CHECK_CHUNK_SIZE = int(os.environ.get("HOS_CHECK_CHUNK_SIZE", "500"))
+HOS_CHECK_EXECUTOR = os.environ.get("HOS_CHECK_EXECUTOR", "inline")
+HOS_CHECK_WORKERS = int(os.environ.get("HOS_CHECK_WORKERS", "0")) or None
+
+def chunk_hos_units(units: List[HOSCheckUnit], chunk_size: Optional[int] = None) -> Iterator[List[HOSCheckUnit]]:
+    """Split check units into chunks of `chunk_size` drivers"""
+    chunk_size = chunk_size or HOS_CHECK_CHUNK_SIZE
+    units = iter(units)
+    while True:
+        chunk = list(islice(units, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+_hos_check_pool: Optional[ProcessPoolExecutor] = None
+
+def get_hos_check_pool() -> ProcessPoolExecutor:
+    """Process pool for violation checks, started on first use and reused"""
+    global _hos_check_pool
+    if _hos_check_pool is None:
+        _hos_check_pool = ProcessPoolExecutor(max_workers=HOS_CHECK_WORKERS)
+    return _hos_check_pool
+
 class ELDService:
     """Core ELD service class with business logic"""
     
-    def __init__(self, data_store: Optional[ELDDataStore] = None):
-        self.data_store = data_store or get_data_store()
+    def __init__(self, data_store: Optional[ELDDataStore] = None,
+                 hos_cycle: str = HOS_CYCLE_70_8,
+                 geotab_client: Optional[GeotabClient] = None,
+                 status_cache: Optional[HOSStatusCache] = None,
+                 duty_timeline: Optional[DutyTimeline] = None):
+        # Stores define __len__, so an empty one is falsy: compare with None
+        self.data_store = data_store if data_store is not None else get_data_store()
+        self.hos_cycle = hos_cycle
+        self.geotab_client = geotab_client or get_geotab_client()
+        self.status_cache = status_cache if status_cache is not None else get_hos_status_cache(self.data_store)
+        self.duty_timeline = duty_timeline if duty_timeline is not None else get_duty_timeline(self.data_store)
     
+    @traced_phase(count=len)
     def fetch_hos_logs(self, start_date: Optional[datetime] = None, 
                       end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
-        """Fetch HOS logs from Geotab API"""
+        """Fetch HOS duty status logs in a time window from Geotab API; [] if the call fails"""
         if not start_date:
             start_date = datetime.utcnow() - timedelta(days=1)
         if not end_date:
             end_date = datetime.utcnow()
         
         params = {
+            "typeName": "DutyStatusLog",
             "search": {
                 "fromDate": start_date.isoformat(),
                 "toDate": end_date.isoformat()
             }
         }
         
-        hos_logs = call_geotab_api("GetLogRecords", params)
-        if not hos_logs.get('error'):
-            for log in hos_logs:
-                self.data_store.store_hos_log(log)
-            logging.info(f"Fetched {len(hos_logs)} HOS records.")
-            return hos_logs
-        return []
-    
-    def fetch_dvir_reports(self) -> List[Dict[str, Any]]:
-        """Fetch DVIR reports from Geotab API"""
-        logging.info("Fetching DVIR data...")
-        # This would be replaced with actual Geotab API call
-        dvir_data = [{"id": "dvir1", "defect": "Flat tire", "vehicleId": "truck_a1"}]
-        for report in dvir_data:
-            self.data_store.store_dvir_report(report)
-        logging.info(f"Fetched {len(dvir_data)} DVIR records.")
-        return dvir_data
-    
-    def check_hos_violations(self) -> List[Dict[str, Any]]:
-        """Check for HOS violations and generate alerts"""
-        logging.info("Running HOS violation checks...")
-        potential_violations = [
-            {"driver_id": "driver_c", "alert": "HOS violation detected on 2025-09-01."}
-        ]
+        try:
+            records = self.geotab_client.call("Get", params) or []
+        except GeotabAPIError as e:
+            logging.error(f"HOS log fetch failed: {e}")
+            return []
+        hos_logs = [log for log in map(normalize_duty_status_log, records) if log is not None]
+        if hos_logs:
+            self.ingest_hos_logs(hos_logs)
+        logging.info(f"Fetched {len(hos_logs)} HOS records.")
+        return hos_logs
+    
+    @traced_phase(count=lambda received: sum(map(len, received.values())))
+    def sync_feeds(self, feeds: Dict[str, Tuple[Any, Any]],
+                   results_limit: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Pull new records for several Geotab entity types with GetFeed.
+
+        Each type resumes from its stored version token. All feeds are
+        requested together in one ExecuteMultiCall round trip per page, and
+        feeds that returned a full page of `results_limit` records are
+        requested again until every feed is caught up. Tokens are stored
+        after every page. The first sync of a type starts HOS_LOOKBACK in
+        the past.
+
+        Args:
+            feeds: Geotab type name (e.g. "DutyStatusLog") mapped to a
+                (normalize, store) pair. normalize maps a Geotab record to a
+                store dict, or None to skip it; store saves one normalized
+                page of normalized records (a batch method such as
+                ELDDataStore.store_hos_logs) and may be None to only return
+                the records.
+            results_limit (int): Records per page; defaults to GEOTAB_FEED_RESULTS_LIMIT.
+
+        Returns:
+            dict: The normalized records received, keyed by type name.
+        """
+        results_limit = results_limit or GEOTAB_FEED_RESULTS_LIMIT
+        versions = {type_name: self.data_store.get_feed_version(type_name) for type_name in feeds}
+        received: Dict[str, List[Dict[str, Any]]] = {type_name: [] for type_name in feeds}
+        pending = list(feeds)
+        while pending:
+            calls = [feed_request(type_name, versions[type_name], results_limit)
+                     for type_name in pending]
+            try:
+                results = self.geotab_client.multi_call(calls)
+            except GeotabAPIError as e:
+                logging.error(str(e))
+                break
+            
+            still_pending = []
+            for type_name, result in zip(pending, results):
+                normalize, store = feeds[type_name]
+                records, version, more = read_feed_page(result, normalize, versions[type_name],
+                                                        results_limit)
+                self.store_feed_page(type_name, records, version, store)
+                received[type_name].extend(records)
+                versions[type_name] = version
+                if more:
+                    still_pending.append(type_name)
+            pending = still_pending
+        for type_name, records in received.items():
+            logging.info(f"Synced {len(records)} {type_name} records from feed.")
+        return received
+    
+    def store_feed_page(self, feed_key: str, records: List[Dict[str, Any]],
+                        version: Optional[str], store=None):
+        """
+        Store one page of normalized feed records, then advance the feed token
+        saved under `feed_key` (the type name, or "<database>:<type name>"
+        when several databases share a store).
+        """
+        if store is not None and records:
+            store(records)
+        if version:
+            self.data_store.store_feed_version(feed_key, version)
+    
+    def sync_feed(self, type_name: str, normalize, store,
+                  results_limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Pull new records for one Geotab entity type with GetFeed (see sync_feeds)"""
+        return self.sync_feeds({type_name: (normalize, store)}, results_limit)[type_name]
+    
+    def sync_eld_data(self, results_limit: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Sync HOS logs, DVIRs, devices and users in one ExecuteMultiCall per page.
+
+        HOS logs and DVIRs are stored; changed devices and users are returned
+        as received from Geotab.
+        """
+        received = self.sync_feeds(self.eld_feeds(), results_limit)
+        self.track_dvir_ingest(received["DVIRLog"])
+        return received
+    
+    def eld_feeds(self) -> Dict[str, Tuple[Any, Any]]:
+        """Feeds synced by sync_eld_data: type name -> (normalize, store)"""
+        return {
+            "DutyStatusLog": (normalize_duty_status_log, self.ingest_hos_logs),
+            "DVIRLog": (normalize_dvir_log, self.data_store.store_dvir_reports),
+            "Device": (dict, None),
+            "User": (dict, None),
+        }
+    
+    def sync_hos_logs(self, results_limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Fetch new HOS duty status logs from the Geotab DutyStatusLog feed"""
+        return self.sync_feed("DutyStatusLog", normalize_duty_status_log,
+                              self.ingest_hos_logs, results_limit)
+    
+    def sync_dvir_reports(self, results_limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Fetch new DVIR reports from the Geotab DVIRLog feed"""
+        reports = self.sync_feed("DVIRLog", normalize_dvir_log,
+                                 self.data_store.store_dvir_reports, results_limit)
+        self.track_dvir_ingest(reports)
+        return reports
+    
+    @traced_phase(count=len)
+    def fetch_dvir_reports(self, start_date: Optional[datetime] = None,
+                           end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Fetch DVIR reports in a time window from Geotab API; [] if the call fails"""
+        if not start_date:
+            start_date = datetime.utcnow() - timedelta(days=1)
+        if not end_date:
+            end_date = datetime.utcnow()
+        
+        params = {
+            "typeName": "DVIRLog",
+            "search": {
+                "fromDate": start_date.isoformat(),
+                "toDate": end_date.isoformat()
+            }
+        }
+        
+        try:
+            records = self.geotab_client.call("Get", params) or []
+        except GeotabAPIError as e:
+            logging.error(f"DVIR fetch failed: {e}")
+            return []
+        reports = [report for report in map(normalize_dvir_log, records) if report is not None]
+        if reports:
+            self.data_store.store_dvir_reports(reports)
+            self.track_dvir_ingest(reports)
+        logging.info(f"Fetched {len(reports)} DVIR records.")
+        return reports
+    
+    def evaluate_hos(self, driver_id: Optional[str] = None,
+                     now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Run the HOS rules engine over the stored logs in the lookback window"""
+        now = now or datetime.utcnow()
+        start_date = now - HOS_LOOKBACK
+        if hasattr(self.data_store, 'hos_log_columns'):
+            driver_ids, codes, statuses, starts = self.data_store.hos_log_columns(
+                driver_id, start_date, now)
+            return evaluate_hos_columns(driver_ids, codes, statuses, starts,
+                                        to_epoch_seconds(now), self.hos_cycle)
+        logs = self.data_store.get_hos_logs(driver_id, start_date, now)
+        return evaluate_hos(logs, now, self.hos_cycle)
+
+    def ingest_hos_logs(self, logs: List[Dict[str, Any]]) -> int:
+        """
+        Store HOS logs and track the ones the store didn't already have (see
+        track_hos_ingest). A log whose source_id is stored with the same
+        source_version is a re-delivery, e.g. from re-fetching a window, and
+        is skipped. Returns the number of new or changed logs.
+        """
+        stored = self.data_store.get_hos_logs_by_source(
+            {log['source_id'] for log in logs if log.get('source_id') is not None})
+        changed, replaced = [], {}
+        for log in logs:
+            previous = stored.get(log.get('source_id'))
+            if previous is not None:
+                if previous.get('source_version') == log.get('source_version'):
+                    continue
+                replaced[log['source_id']] = previous
+            changed.append(log)
+        if changed:
+            self.data_store.store_hos_logs(changed)
+            self.track_hos_ingest(changed, replaced)
+        return len(changed)
+
+    def track_hos_ingest(self, logs: List[Dict[str, Any]],
+                         replaced: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Flag drivers whose HOS state must catch up with newly stored logs.
+
+        `logs` are the new or changed logs only; `replaced` maps the
+        source_id of each changed log to the stored log it replaced
+        (ingest_hos_logs works out both). Logs past a driver's watermark are
+        folded on the next check; late logs (at or before the watermark) and
+        new versions of stored logs schedule a recompute of the driver from
+        the earliest affected start, old or new. Loaded duty timelines are
+        updated with the logs as well.
+        """
+        with phase("track_hos_ingest") as span:
+            span.records = len(logs)
+            self._track_hos_ingest(logs, replaced or {})
+    
+    def _track_hos_ingest(self, logs: List[Dict[str, Any]], replaced: Dict[str, Dict[str, Any]]):
+        self.duty_timeline.apply(logs)
+        starts_by_driver: Dict[str, List[Any]] = defaultdict(list)
+        for log in logs:
+            start = to_epoch_seconds(log.get('start_time'))
+            previous = replaced.get(log.get('source_id'))
+            if previous is not None:
+                # The replaced version may have started earlier, or belonged to another driver
+                previous_start = to_epoch_seconds(previous.get('start_time'))
+                previous_driver = previous.get('driver_id')
+                if previous_start is not None and previous_driver:
+                    starts_by_driver[previous_driver].append((previous_start, True))
+                if previous_driver != log.get('driver_id'):
+                    self.duty_timeline.invalidate([previous_driver])
+            if start is not None and log.get('driver_id'):
+                starts_by_driver[log['driver_id']].append((start, previous is not None))
+        if not starts_by_driver:
+            return
         
-        for violation in potential_violations:
-            alert_data = {
+        states = self.data_store.get_hos_states(list(starts_by_driver))
+        updated = {}
+        for driver_id, starts in starts_by_driver.items():
+            state = states.get(driver_id) or self._new_hos_state(driver_id)
+            watermark = state.get('open_start')
+            late = [start for start, edited in starts
+                    if edited or (watermark is not None and start <= watermark)]
+            if late:
+                earliest = min(late)
+                if state.get('recompute_from') is None or earliest < state['recompute_from']:
+                    state['recompute_from'] = earliest
+            if len(late) < len(starts):
+                state['pending'] = True
+            updated[driver_id] = state
+        self.data_store.store_hos_states(updated)
+        notify_event_publisher()
+
+    def _new_hos_state(self, driver_id: str) -> Dict[str, Any]:
+        """State for a driver seen for the first time, built from the lookback window"""
+        state = DriverHOSState(driver_id, self.hos_cycle).to_dict()
+        state['recompute_from'] = 0.0
+        return state
+    
+    @traced_phase(count=len)
+    def plan_hos_check(self, now: datetime) -> List[HOSCheckUnit]:
+        """
+        Read what an incremental check needs from the store: one unit per
+        driver with stored HOS state (see hos_rules.advance_hos_states).
+        Drivers with logs in the lookback window but no state yet (logs
+        stored without track_hos_ingest: store writes, another app sharing
+        the database, history from before incremental checks) are built
+        from the window.
+        """
+        states = self.data_store.get_hos_states()
+        for driver_id in self.data_store.get_hos_log_driver_ids(now - HOS_LOOKBACK, now) - states.keys():
+            states[driver_id] = self._new_hos_state(driver_id)
+        units: List[HOSCheckUnit] = []
+        for driver_id, stored in states.items():
+            recompute_from = stored.get('recompute_from')
+            if stored.get('cycle', HOS_CYCLE_70_8) != self.hos_cycle and recompute_from is None:
+                recompute_from = 0.0
+            if recompute_from is not None:
+                # Late or edited logs: rebuild from the lookback window
+                logs = self.data_store.get_hos_logs(driver_id, now - HOS_LOOKBACK, now)
+                units.append((driver_id, stored, _hos_segments(logs), recompute_from))
+            elif stored.get('pending'):
+                watermark = stored.get('open_start')
+                since = None if watermark is None else from_epoch_seconds(watermark)
+                logs = self.data_store.get_hos_logs(driver_id, since, now)
+                units.append((driver_id, stored, _hos_segments(logs), None))
+            else:
+                # No new logs, but the open segment may have run past a limit
+                units.append((driver_id, stored, [], None))
+        return units
+    
+    def _check_hos_incremental(self, now: datetime, executor: Optional[Executor] = None,
+                               chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        now_s = to_epoch_seconds(now)
+        units = self.plan_hos_check(now)
+        with phase("advance_hos_states") as span:
+            span.records = len(units)
+            if executor is None:
+                chunk_results = [advance_hos_states(units, now_s, self.hos_cycle)]
+            else:
+                # CPU-bound folds run in the executor's workers; the store is only
+                # touched here, so any executor (including a process pool) works
+                # with any store.
+                chunk_results = list(executor.map(advance_hos_states,
+                                                  chunk_hos_units(units, chunk_size),
+                                                  repeat(now_s), repeat(self.hos_cycle)))
+        return self.merge_hos_check(chunk_results, now)
+    
+    def merge_hos_check(self, chunk_results: Iterable[Tuple[Dict[str, Dict[str, Any]],
+                                                            List[Dict[str, Any]],
+                                                            Dict[str, Dict[str, Any]]]],
+                        now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Store the changed states of all chunks in one batch; returns their
+        violations in time order. With the check time `now`, the statuses
+        the chunks computed are written to the driver_status rollup as well.
+        """
+        updated: Dict[str, Dict[str, Any]] = {}
+        violations: List[Dict[str, Any]] = []
+        statuses: Dict[str, Dict[str, Any]] = {}
+        for changed, found, chunk_statuses in chunk_results:
+            updated.update(changed)
+            violations.extend(found)
+            statuses.update(chunk_statuses)
+        if updated:
+            self.data_store.store_hos_states(updated)
+        if now is not None and statuses:
+            self.data_store.store_rollups(ROLLUP_DRIVER_STATUS,
+                                          driver_status_entries(statuses.values(), now))
+        for violation in violations:
+            violation['occurred_at'] = to_utc_datetime(violation['occurred_at'])
+        violations.sort(key=lambda violation: (violation['occurred_at'], violation['driver_id']))
+        return violations
+    
+    @traced_phase(count=len)
+    def check_hos_violations(self, now: Optional[datetime] = None,
+                             incremental: bool = True,
+                             executor: Optional[Executor] = None,
+                             chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Check for HOS violations and generate alerts.
+
+        Incremental checks fold only logs that arrived since the previous check
+        into each driver's stored accumulator state (see track_hos_ingest).
+        A full check re-evaluates the whole lookback window for every driver.
+
+        Args:
+            executor: concurrent.futures executor (e.g. a ProcessPoolExecutor)
+                to fold incremental checks in, `chunk_size` drivers per task.
+                Without one, drivers are folded in this thread.
+        """
+        logging.info("Running HOS violation checks...")
+        now = now or datetime.utcnow()
+        if incremental:
+            violations = self._check_hos_incremental(now, executor, chunk_size)
+        else:
+            result = self.evaluate_hos(now=now)
+            self.update_driver_status_rollup(now, result["statuses"])
+            violations = result["violations"]
+        self.store_violation_alerts(violations)
+        return violations
+    
+    @traced_phase()
+    def store_violation_alerts(self, violations: List[Dict[str, Any]]):
+        """Record one alert per violation, coalescing repeats of unresolved alerts"""
+        created_at = datetime.utcnow()
+        alerts = []
+        for violation in violations:
+            alerts.append({
                 "driver_id": violation["driver_id"],
                 "type": "HOS Violation",
                 "severity": "high",
                 "title": "HOS Violation Detected",
-                "message": violation["alert"],
-                "created_at": datetime.utcnow()
-            }
-            self.data_store.store_alert(alert_data)
-        
-        if potential_violations:
-            logging.warning(f"Generated {len(potential_violations)} HOS violation alerts.")
+                "message": violation["message"],
+                "rule": violation["rule"],
+                "occurred_at": violation["occurred_at"],
+                "created_at": created_at
+            })
+        new_alerts = self.record_alerts(alerts)
         
-        return potential_violations
+        if new_alerts:
+            self.track_violations(new_alerts)
+            logging.warning(f"Generated {len(new_alerts)} HOS violation alerts.")
+    
+    def record_alerts(self, alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Store alerts in one batch, coalescing repeats of unresolved alerts
+        into their counters (see coalesce_alerts). Returns the new alerts.
+        """
+        new_alerts, updates = coalesce_alerts(self.data_store, alerts)
+        if new_alerts:
+            self.data_store.store_alerts(new_alerts)
+        if updates:
+            self.data_store.update_alerts(updates)
+        if new_alerts or updates:
+            notify_event_publisher()
+        return new_alerts
+    
+    def resolve_alerts(self, alert_ids: Iterable[Any], resolved_by: Optional[str] = None) -> int:
+        """Mark alerts resolved; returns the number updated"""
+        fields = {"resolved_at": datetime.utcnow()}
+        if resolved_by:
+            fields["resolved_by"] = resolved_by
+        return self.data_store.update_alerts({alert_id: dict(fields) for alert_id in alert_ids})
+    
+    def apply_alert_retention(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Resolve alerts not seen for ALERT_RESOLVE_AFTER and delete alerts
+        resolved more than ALERT_RETENTION ago.
+        """
+        now = now or datetime.utcnow()
+        resolve_before = now - ALERT_RESOLVE_AFTER
+        purge_before = now - ALERT_RETENTION
+        to_resolve: Dict[Any, Dict[str, Any]] = {}
+        to_purge: List[Any] = []
+        for alert in self.data_store.iter_alerts():
+            resolved_at = to_utc_datetime(alert.get('resolved_at'))
+            if resolved_at is None:
+                last_seen = to_utc_datetime(alert.get('last_seen') or alert.get('created_at'))
+                if last_seen is not None and last_seen < resolve_before:
+                    to_resolve[alert['id']] = {"resolved_at": now}
+            elif resolved_at < purge_before:
+                to_purge.append(alert['id'])
+        resolved = self.data_store.update_alerts(to_resolve) if to_resolve else 0
+        purged = self.data_store.delete_alerts(to_purge) if to_purge else 0
+        if resolved or purged:
+            logging.info(f"Alert retention: resolved {resolved}, purged {purged}.")
+        return {"resolved": resolved, "purged": purged}
+    
+    def apply_hos_retention(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Export HOS log partitions older than HOS_RETENTION_MONTHS to
+        HOS_ARCHIVE_DIR and drop them. Stores without monthly partitions keep
+        every log; returns one summary per archived month.
+        """
+        archive = getattr(self.data_store, 'archive_hos_partitions', None)
+        if archive is None:
+            return []
+        archived = archive(retention_cutoff(now or datetime.utcnow(), HOS_RETENTION_MONTHS),
+                           HOS_ARCHIVE_DIR)
+        for summary in archived:
+            logging.info(f"HOS retention: archived {summary['rows']} logs of {summary['month']} "
+                         f"to {summary['path']}.")
+        return archived
+    
+    # --- Fleet rollups (see fleet_rollups.py) ---
+    def track_dvir_ingest(self, reports: List[Dict[str, Any]]):
+        """Update the vehicle_defects rollup with newly stored DVIRs"""
+        vehicle_ids = {report['vehicle_id'] for report in reports if report.get('vehicle_id')}
+        if not vehicle_ids:
+            return
+        current = self.data_store.get_rollups(ROLLUP_VEHICLE_DEFECTS, vehicle_ids)
+        changed = vehicle_defect_updates(current, reports)
+        if changed:
+            self.data_store.store_rollups(ROLLUP_VEHICLE_DEFECTS, changed)
+    
+    def track_violations(self, alerts: List[Dict[str, Any]]):
+        """Count newly recorded violation alerts into the violations_daily rollup"""
+        current = self.data_store.get_rollups(ROLLUP_VIOLATIONS_DAILY, violation_days(alerts))
+        changed = violation_day_updates(current, alerts)
+        if changed:
+            self.data_store.store_rollups(ROLLUP_VIOLATIONS_DAILY, changed)
+    
+    def update_driver_status_rollup(self, now: datetime, statuses: List[Dict[str, Any]]):
+        """Replace the driver_status rollup with every driver's status at `now` (full checks)"""
+        self.data_store.store_rollups(ROLLUP_DRIVER_STATUS, driver_status_entries(statuses, now),
+                                      replace=True)
+    
+    @traced_phase()
+    def rebuild_fleet_rollups(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Recompute the fleet rollups from the stored records, e.g. for a store
+        that held history before rollups were maintained. Days whose alerts
+        were purged by retention keep their stored violation counts.
+        Returns the number of entries per rollup.
+        """
+        now = now or datetime.utcnow()
+        vehicles = vehicle_defect_updates({}, self.data_store.iter_dvir_reports())
+        self.data_store.store_rollups(ROLLUP_VEHICLE_DEFECTS, vehicles, replace=True)
+        days = violation_day_updates({}, self.data_store.iter_alerts(alert_type="HOS Violation"))
+        self.data_store.store_rollups(ROLLUP_VIOLATIONS_DAILY, days)
+        statuses = self.evaluate_hos(now=now)["statuses"]
+        self.update_driver_status_rollup(now, statuses)
+        return {ROLLUP_DRIVER_STATUS: len(statuses), ROLLUP_VEHICLE_DEFECTS: len(vehicles),
+                ROLLUP_VIOLATIONS_DAILY: len(days)}
+    
+    def get_fleet_overview(self, days: int = 7, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Fleet dashboard summary over the last `days` days, read from the rollups"""
+        series = self.get_violations_per_day(days, now)
+        return fleet_overview(self.data_store.get_rollups(ROLLUP_DRIVER_STATUS),
+                              self.data_store.get_rollups(ROLLUP_VEHICLE_DEFECTS), series)
+    
+    def get_drivers_near_limit(self, hours: float = FLEET_NEAR_LIMIT_HOURS) -> List[Dict[str, Any]]:
+        """Drivers with at most `hours` left as of the last violation check"""
+        return drivers_near_limit(self.data_store.get_rollups(ROLLUP_DRIVER_STATUS), hours)
+    
+    def get_open_dvir_defects(self) -> List[Dict[str, Any]]:
+        """Vehicles whose latest DVIR reported defects"""
+        return vehicles_with_defects(self.data_store.get_rollups(ROLLUP_VEHICLE_DEFECTS))
+    
+    def get_violations_per_day(self, days: int = 7, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Violation counts for each of the last `days` days (UTC), oldest first"""
+        keys = day_keys((now or datetime.utcnow()).date(), days)
+        return violations_series(self.data_store.get_rollups(ROLLUP_VIOLATIONS_DAILY, keys), keys)
     
     def get_hos_status(self, driver_id: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get real-time HOS status for drivers"""
-        # This would implement actual HOS status calculation
-        status_list = [
-            {"driverId": "driver_a", "status": "Driving", "hoursRemaining": 2.5},
-            {"driverId": "driver_b", "status": "Off-Duty", "hoursRemaining": 0},
-        ]
-        
-        if driver_id:
-            status_list = [status for status in status_list if status["driverId"] == driver_id]
-        
-        return status_list
+        """Get real-time HOS status for drivers, served from the status cache"""
+        return self.status_cache.get(self.hos_cycle, driver_id,
+                                     lambda key: self.evaluate_hos(key)["statuses"])
     
     def get_alerts(self, driver_id: Optional[str] = None, 
                   alert_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get alerts with optional filtering"""
         return self.data_store.get_alerts(driver_id, alert_type)
     
-    def generate_roadside_inspection_report(self, driver_id: str) -> Dict[str, Any]:
-        """Generate roadside inspection report"""
-        report_id = f"{driver_id}-{os.urandom(4).hex()}"
-        report_url = f"/reports/roadside/{report_id}"
-        
+    def generate_roadside_inspection_report(self, driver_id: str,
+                                            now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Generate a roadside inspection report: the driver's duty periods for
+        the current day and the previous 7, as per-day RODS grids, hour
+        totals and CSV (see duty_timeline.py).
+        """
+        report = self.duty_timeline.roadside_report(driver_id, now)
         return {
             "message": "Roadside inspection report generated.",
-            "reportUrl": report_url,
-            "reportId": report_id
+            "reportUrl": f"/api/eld/roadside-inspection/{driver_id}",
+            "reportId": report["reportId"],
+            "report": report,
         }
 
+# --- Live Event Publisher ---
+ELD_EVENT_POLL_INTERVAL = float(os.environ.get("ELD_EVENT_POLL_INTERVAL", "2"))
+SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", "15"))
+
+class EventSubscription:
+    """One subscriber's bounded event queue; the oldest events are dropped if it falls behind"""
+
+    def __init__(self, company_id: Optional[str] = None, queue_size: int = 1000):
+        self.company_id = company_id
+        self.queue: 'queue.Queue[str]' = queue.Queue(maxsize=queue_size)
+
+    def put(self, message: str):
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def messages(self, heartbeat: float = SSE_HEARTBEAT_SECONDS) -> Iterator[str]:
+        """Server-sent event messages, with a comment line after `heartbeat` idle seconds"""
+        while True:
+            try:
+                yield self.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+
+class ELDEventPublisher:
+    """
+    In-process fan-out of live ELD events to server-sent event subscribers.
+
+    One background thread per process polls the data store, publishing
+    `hos_status` events for drivers whose status changed (served from the
+    HOS status cache, so each change costs one computation) and `alert`
+    events for alerts stored since the last poll (an alert page after the
+    last sent alert's key, which every store serves from an index).
+    ELDService wakes the thread right away when it ingests logs or stores
+    alerts in the same process.
+
+    Events carry the record's `company_id`, or `company_resolver(driver_id)`
+    if the record has none; subscribers that ask for a company only receive
+    that company's events.
+    """
+
+    def __init__(self, data_store: Optional[ELDDataStore] = None,
+                 company_resolver: Optional[Callable[[str], Optional[str]]] = None,
+                 interval: float = ELD_EVENT_POLL_INTERVAL):
+        self.data_store = data_store
+        self.company_resolver = company_resolver
+        self.interval = interval
+        self._subscribers: List[EventSubscription] = []
+        self._statuses: Dict[str, Dict[str, Any]] = {}
+        self._alert_key: Optional[PageKey] = None
+        self._event_ids = count(1)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._app = None
+
+    def subscribe(self, company_id: Optional[str] = None, app=None) -> EventSubscription:
+        """
+        Add a subscriber; it first receives the last known status of each
+        driver. Pass the Flask app when the data store needs an app context.
+        """
+        subscription = EventSubscription(company_id)
+        with self._lock:
+            self._app = self._app or app
+            self._subscribers.append(subscription)
+            snapshot = list(self._statuses.values())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='eld-events', daemon=True)
+                self._thread.start()
+        for status in snapshot:
+            self._send(subscription, 'hos_status', status, self._company_of(status, status['driverId']))
+        self.notify()
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def notify(self):
+        """Poll now instead of at the next interval"""
+        self._wake.set()
+
+    def publish(self, event_type: str, data: Dict[str, Any], company_id: Optional[str] = None):
+        """Send an event to every subscriber of its company (and to unfiltered subscribers)"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            self._send(subscription, event_type, data, company_id)
+
+    def _send(self, subscription: EventSubscription, event_type: str, data: Dict[str, Any],
+              company_id: Optional[str]):
+        if subscription.company_id is not None and subscription.company_id != company_id:
+            return
+        payload = encode_json(data).decode()
+        subscription.put(f"id: {next(self._event_ids)}\nevent: {event_type}\ndata: {payload}\n\n")
+
+    def _company_of(self, record: Dict[str, Any], driver_id: Optional[str]) -> Optional[str]:
+        company_id = record.get('company_id')
+        if company_id is None and self.company_resolver and driver_id:
+            company_id = self.company_resolver(driver_id)
+        return company_id
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            with self._lock:
+                if not self._subscribers:
+                    continue
+            try:
+                with self._app.app_context() if self._app else nullcontext():
+                    self.poll()
+            except Exception:
+                logging.exception("ELD event poll failed")
+
+    def poll(self):
+        """Publish status changes and new alerts since the previous poll"""
+        data_store = self.data_store if self.data_store is not None else get_data_store()
+        service = ELDService(data_store)
+        for status in service.get_hos_status():
+            driver_id = status['driverId']
+            with self._lock:
+                changed = self._statuses.get(driver_id) != status
+                self._statuses[driver_id] = status
+            if changed:
+                self.publish('hos_status', status, self._company_of(status, driver_id))
+
+        if self._alert_key is None:
+            # Start from the newest stored alert rather than replaying history
+            self._alert_key = max((_alert_page_key(alert) for alert in data_store.iter_alerts()),
+                                  default=(datetime.min, 0))
+            return
+        while True:
+            alerts, next_key = data_store.get_alerts_page(after=self._alert_key, limit=500)
+            for alert in alerts:
+                self.publish('alert', alert, self._company_of(alert, alert.get('driver_id')))
+            if alerts:
+                self._alert_key = _alert_page_key(alerts[-1])
+            if next_key is None:
+                break
+
+_event_publisher: Optional[ELDEventPublisher] = None
+# Tenant stores get a publisher each, labelling events with their company
+_tenant_publishers: Dict[str, ELDEventPublisher] = {}
+_tenant_publishers_lock = threading.Lock()
+
+def set_event_publisher(publisher: ELDEventPublisher):
+    """Set the process-wide event publisher (e.g. one with a company resolver)"""
+    global _event_publisher
+    _event_publisher = publisher
+
+def get_event_publisher() -> ELDEventPublisher:
+    """Get the current company's event publisher, or the process-wide one; created on first use"""
+    global _event_publisher
+    company_id = routed_company_id()
+    if company_id is not None:
+        with _tenant_publishers_lock:
+            publisher = _tenant_publishers.get(company_id)
+            if publisher is None:
+                publisher = _tenant_publishers[company_id] = ELDEventPublisher(
+                    get_data_store(company_id), company_resolver=lambda driver_id: company_id)
+        return publisher
+    if _event_publisher is None:
+        _event_publisher = ELDEventPublisher()
+    return _event_publisher
+
+def notify_event_publisher():
+    """Wake the event publisher, if this process has one, to push new data immediately"""
+    company_id = current_company_id()
+    publisher = _tenant_publishers.get(company_id) if company_id is not None else None
+    if publisher is None:
+        publisher = _event_publisher
+    if publisher is not None:
+        publisher.notify()
+
 # --- Celery Tasks (Optional) ---
 if CELERY_AVAILABLE and celery_app:
     @celery_app.task(name='rapid_eld.fetch_eld_data')
+    @traced_phase()
     def fetch_eld_data():
         """
         Scheduled task to sync ELD-related data from Geotab.
@@ -275,38 +2062,294 @@ if CELERY_AVAILABLE and celery_app:
         logging.info("Starting ELD data sync with Geotab.")
         
         service = ELDService()
-        service.fetch_hos_logs()
-        service.fetch_dvir_reports()
+        if GEOTAB_SYNC_MODE == "feed":
+            service.sync_eld_data()
+        else:
+            service.fetch_hos_logs()
+            service.fetch_dvir_reports()
         run_hos_violation_check.delay()
         
         logging.info("ELD data sync complete.")
 
+    @celery_app.task(name='rapid_eld.fetch_all_eld_data')
+    @traced_phase()
+    def fetch_all_eld_data():
+        """
+        Sync every Geotab database listed in GEOTAB_DATABASES concurrently
+        with the async ingestion pipeline.
+        """
+        from eld_ingest import load_database_configs, run_ingest
+        
+        configs = load_database_configs()
+        reports = run_ingest(configs)
+        for report in reports:
+            logging.info(f"ELD sync report: {report}")
+        # One check per company store the databases were synced into
+        for company_id in dict.fromkeys(config.company_id for config in configs):
+            run_hos_violation_check.delay(company_id)
+        return reports
+
     @celery_app.task(name='rapid_eld.run_hos_violation_check')
-    def run_hos_violation_check():
+    @traced_phase()
+    def run_hos_violation_check(company_id=None):
         """AI task to check for HOS violations and generate alerts."""
-        service = ELDService()
-        service.check_hos_violations()
+        with company_scope(company_id):
+            service = ELDService()
+            if HOS_CHECK_EXECUTOR == "celery":
+                now = datetime.utcnow()
+                chunks = list(chunk_hos_units(service.plan_hos_check(now)))
+                if not chunks:
+                    return
+                now_s = to_epoch_seconds(now)
+                chord(check_hos_chunk.s(chunk, now_s, service.hos_cycle) for chunk in chunks)(
+                    merge_hos_check.s(company_id=company_id, now_s=now_s))
+            elif HOS_CHECK_EXECUTOR == "process":
+                # Celery's prefork children are daemonic and cannot start a pool
+                # of their own; run this worker with --pool=threads or solo
+                service.check_hos_violations(executor=get_hos_check_pool())
+            else:
+                service.check_hos_violations()
+
+    @celery_app.task(name='rapid_eld.run_alert_retention')
+    def run_alert_retention(company_id=None):
+        """Scheduled task to resolve quiet alerts and delete expired resolved ones"""
+        with company_scope(company_id):
+            return ELDService().apply_alert_retention()
+
+    @celery_app.task(name='rapid_eld.run_hos_retention')
+    def run_hos_retention(company_id=None):
+        """Scheduled task (e.g. daily) to archive and drop expired HOS log partitions"""
+        with company_scope(company_id):
+            return ELDService().apply_hos_retention()
+
+    @celery_app.task(name='rapid_eld.run_for_each_company')
+    def run_for_each_company(task_name):
+        """Queue a company-aware task (e.g. rapid_eld.run_alert_retention) once per registered company"""
+        companies = get_tenant_registry().companies()
+        for company_id in companies:
+            celery_app.send_task(task_name, kwargs={'company_id': company_id})
+        return companies
+
+    @celery_app.task(name='rapid_eld.check_hos_chunk')
+    @traced_phase()
+    def check_hos_chunk(units, now_s, hos_cycle):
+        """Fold one chunk of drivers for run_hos_violation_check"""
+        changed, violations, statuses = advance_hos_states(units, now_s, hos_cycle)
+        for violation in violations:
+            violation['occurred_at'] = violation['occurred_at'].isoformat()
+        return changed, violations, statuses
+
+    @celery_app.task(name='rapid_eld.merge_hos_check')
+    @traced_phase()
+    def merge_hos_check(chunk_results, company_id=None, now_s=None):
+        """Store the states and alerts of all check_hos_chunk results in one batch each"""
+        with company_scope(company_id):
+            service = ELDService()
+            now = from_epoch_seconds(now_s) if now_s is not None else None
+            service.store_violation_alerts(service.merge_hos_check(chunk_results, now))
+
+    @celery_app.task(name='rapid_eld.rebuild_fleet_rollups')
+    def rebuild_fleet_rollups(company_id=None):
+        """Recompute a company's fleet dashboard rollups from its stored records"""
+        with company_scope(company_id):
+            return ELDService().rebuild_fleet_rollups()
 
 # --- Flask Blueprint for ELD API (Optional) ---
 if FLASK_AVAILABLE:
     eld_blueprint = Blueprint('eld_api', __name__, url_prefix='/api/eld')
     
+    MAX_PAGE_SIZE = 1000
+    
+    # Requests run in the context of the company named by the ELD_COMPANY_HEADER
+    # header or `company_id` argument, so get_data_store() and ELDService()
+    # use that company's store when tenant stores are registered.
+    @eld_blueprint.before_request
+    def _enter_company():
+        company_id = request.headers.get(ELD_COMPANY_HEADER) or request.args.get('company_id')
+        g.eld_company_token = set_current_company(company_id)
+    
+    @eld_blueprint.teardown_request
+    def _leave_company(exc):
+        token = g.pop('eld_company_token', None)
+        if token is not None:
+            reset_current_company(token)
+    
+    @eld_blueprint.errorhandler(UnknownTenantError)
+    def _unknown_company(e):
+        return jsonify({"error": f"Unknown company: {e.args[0]}"}), 404
+    
+    def metrics_view():
+        """
+        Prometheus scrape endpoint with this process's metrics and those
+        Celery workers wrote to ELD_METRICS_DIR. Registered on the app (not
+        the blueprint) as /metrics: app.add_url_rule('/metrics', 'eld_metrics', metrics_view).
+        """
+        return Response(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
+    
+    # List endpoints encode with eld_serialization instead of jsonify. Stores
+    # with column-projected readers (hos_log_rows, dvir_report_rows,
+    # alert_rows) hand over row tuples, so no ORM objects or intermediate
+    # isoformat() strings are built.
+    def _json_response(payload: Any, status: int = 200):
+        return Response(encode_json(payload), status=status, mimetype='application/json')
+    
+    def _ndjson_response(iter_records, read_rows=None, **filters):
+        """Stream newline-delimited JSON as it is read from the store: row tuples if the store reads them, else records"""
+        if read_rows is not None:
+            columns, rows, _ = read_rows(**filters)
+            chunks = iter_ndjson_rows(columns, rows)
+        else:
+            chunks = iter_ndjson(iter_records(**filters))
+        return Response(stream_with_context(chunks), mimetype='application/x-ndjson')
+    
+    def _page_response(get_page, read_rows=None, **filters):
+        """One keyset page, selected by the `limit` and `cursor` query arguments"""
+        try:
+            cursor = request.args.get('cursor')
+            after = decode_page_key(cursor) if cursor else None
+            limit = int(request.args.get('limit', 100))
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if read_rows is not None:
+            columns, rows, next_key = read_rows(after=after, limit=limit, **filters)
+            items = rows_to_records(columns, rows)
+        else:
+            items, next_key = get_page(after=after, limit=limit, **filters)
+        body = encode_page(items, encode_page_key(next_key) if next_key else None)
+        return Response(body, mimetype='application/json')
+    
     @eld_blueprint.route('/hos-status', methods=['GET'])
     def get_hos_status():
         """Retrieves real-time Hours of Service status for all drivers."""
         service = ELDService()
         driver_id = request.args.get('driver_id')
         status_list = service.get_hos_status(driver_id)
-        return jsonify(status_list), 200
+        return _json_response(status_list)
     
     @eld_blueprint.route('/alerts', methods=['GET'])
     def get_alerts():
-        """Retrieves a list of all ELD-related alerts."""
-        service = ELDService()
+        """
+        Retrieves ELD-related alerts: all of them, one page (`limit`/`cursor`),
+        or streamed as NDJSON (`format=ndjson`).
+        """
         driver_id = request.args.get('driver_id')
         alert_type = request.args.get('type')
+        data_store = get_data_store()
+        read_rows = getattr(data_store, 'alert_rows', None)
+        if request.args.get('format') == 'ndjson':
+            return _ndjson_response(data_store.iter_alerts, read_rows,
+                                    driver_id=driver_id, alert_type=alert_type)
+        if 'limit' in request.args or 'cursor' in request.args:
+            return _page_response(data_store.get_alerts_page, read_rows,
+                                  driver_id=driver_id, alert_type=alert_type)
+        if read_rows is not None:
+            columns, rows, _ = read_rows(driver_id, alert_type)
+            return Response(encode_rows(columns, rows), mimetype='application/json')
+        service = ELDService()
         alerts = service.get_alerts(driver_id, alert_type)
-        return jsonify(alerts), 200
+        return _json_response(alerts)
+    
+    @eld_blueprint.route('/alerts/<int:alert_id>/resolve', methods=['POST'])
+    def resolve_alert(alert_id):
+        """Marks an alert resolved; resolved alerts age out after the retention period."""
+        data = request.get_json(silent=True) or {}
+        if not ELDService().resolve_alerts([alert_id], data.get('resolvedBy')):
+            return jsonify({"error": "Alert not found"}), 404
+        return jsonify({"id": alert_id, "resolved": True}), 200
+    
+    @eld_blueprint.route('/hos-logs', methods=['GET'])
+    def get_hos_logs():
+        """Retrieves HOS logs one page at a time (`limit`/`cursor`) or streamed as NDJSON."""
+        try:
+            filters = {
+                "driver_id": request.args.get('driver_id'),
+                "start_date": to_utc_datetime(request.args.get('start_date')),
+                "end_date": to_utc_datetime(request.args.get('end_date')),
+            }
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        data_store = get_data_store()
+        read_rows = getattr(data_store, 'hos_log_rows', None)
+        if request.args.get('format') == 'ndjson':
+            return _ndjson_response(data_store.iter_hos_logs, read_rows, **filters)
+        return _page_response(data_store.get_hos_logs_page, read_rows, **filters)
+    
+    @eld_blueprint.route('/dvir-reports', methods=['GET'])
+    def get_dvir_reports():
+        """Retrieves DVIR reports one page at a time (`limit`/`cursor`) or streamed as NDJSON."""
+        filters = {
+            "driver_id": request.args.get('driver_id'),
+            "vehicle_id": request.args.get('vehicle_id'),
+        }
+        data_store = get_data_store()
+        read_rows = getattr(data_store, 'dvir_report_rows', None)
+        if request.args.get('format') == 'ndjson':
+            return _ndjson_response(data_store.iter_dvir_reports, read_rows, **filters)
+        return _page_response(data_store.get_dvir_reports_page, read_rows, **filters)
+    
+    # Fleet dashboard: served from the fleet rollups, so the cost follows
+    # the fleet size rather than the length of the stored history
+    MAX_ROLLUP_DAYS = 366
+    
+    def _rollup_days() -> int:
+        days = int(request.args.get('days', 7))
+        if not 1 <= days <= MAX_ROLLUP_DAYS:
+            raise ValueError(f"days must be between 1 and {MAX_ROLLUP_DAYS}")
+        return days
+    
+    @eld_blueprint.route('/fleet/overview', methods=['GET'])
+    def get_fleet_overview():
+        """Fleet compliance summary: drivers near limit, open defects, violations over `days`."""
+        try:
+            days = _rollup_days()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return _json_response(ELDService().get_fleet_overview(days))
+    
+    @eld_blueprint.route('/fleet/drivers-near-limit', methods=['GET'])
+    def get_drivers_near_limit():
+        """Drivers with at most `hours` (default FLEET_NEAR_LIMIT_HOURS) left, tightest first."""
+        try:
+            hours = float(request.args.get('hours', FLEET_NEAR_LIMIT_HOURS))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return _json_response(ELDService().get_drivers_near_limit(hours))
+    
+    @eld_blueprint.route('/fleet/dvir-defects', methods=['GET'])
+    def get_dvir_defects():
+        """Open DVIR defects by vehicle, from each vehicle's latest inspection."""
+        return _json_response(ELDService().get_open_dvir_defects())
+    
+    @eld_blueprint.route('/fleet/violations-per-day', methods=['GET'])
+    def get_violations_per_day():
+        """HOS violations detected per day (UTC) over the last `days` days, by rule."""
+        try:
+            days = _rollup_days()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return _json_response(ELDService().get_violations_per_day(days))
+    
+    @eld_blueprint.route('/stream', methods=['GET'])
+    def stream_events():
+        """
+        Server-sent events: `hos_status` when a driver's status changes and
+        `alert` for new alerts, optionally only for one `company_id`.
+        """
+        publisher = get_event_publisher()
+        subscription = publisher.subscribe(request.args.get('company_id'),
+                                           app=current_app._get_current_object())
+        
+        def generate():
+            try:
+                yield "retry: 5000\n\n"
+                yield from subscription.messages()
+            finally:
+                publisher.unsubscribe(subscription)
+        
+        return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
     
     @eld_blueprint.route('/roadside-inspection', methods=['POST'])
     def start_roadside_inspection():
@@ -319,5 +2362,19 @@ if FLASK_AVAILABLE:
         service = ELDService()
         result = service.generate_roadside_inspection_report(driver_id)
         return jsonify(result), 200
+    
+    @eld_blueprint.route('/roadside-inspection/<driver_id>', methods=['GET'])
+    def get_roadside_inspection(driver_id):
+        """Roadside inspection report as JSON, CSV (?format=csv) or a text RODS grid (?format=grid)."""
+        report = ELDService().generate_roadside_inspection_report(driver_id)["report"]
+        output = request.args.get('format', 'json')
+        if output == 'csv':
+            return Response(report["csv"], mimetype='text/csv', headers={
+                'Content-Disposition': f'attachment; filename="rods-{driver_id}.csv"'})
+        if output == 'grid':
+            return Response(report["grid"], mimetype='text/plain')
+        if output != 'json':
+            return jsonify({"error": "format must be json, csv or grid"}), 400
+        return _json_response(report)
 else:
     eld_blueprint = None
@@ -0,0 +1,701 @@
+"""
+SQLite ELD Data Store
+Persistent, single-file ELDDataStore built on the standard library sqlite3
+module, for deployments without Flask-SQLAlchemy (edge devices, single-node
+installs).
+
+The database runs in WAL mode with pragmas tuned for write throughput. Batch
+writes are one executemany per table in a single transaction, and every
+statement is a constant SQL string, so sqlite3's per-connection statement
+cache reuses the compiled statements. Indexes cover the get_hos_logs and
+get_alerts filter shapes, and the HOS rules engine reads its columns straight
+from an index. HOS logs can optionally be split into monthly tables (see
+hos_partitions).
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Set, Tuple
+
+from hos_partitions import (
+    HOS_PARTITIONED, add_months, archive_path, expired_months, iter_months, month_start,
+    partition_month, partition_name, write_archive,
+)
+from hos_rules import from_epoch_ms, status_code, to_epoch_ms
+from rapid_eld import ELDDataStore, PageKey
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    # With WAL, NORMAL only syncs at checkpoints and the file stays consistent on power loss
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS eld_dvir_reports (
+    id INTEGER PRIMARY KEY,
+    driver_id TEXT,
+    vehicle_id TEXT,
+    inspection_type TEXT,
+    inspection_date INTEGER,
+    defects TEXT,
+    is_safe_to_drive INTEGER,
+    source_id TEXT UNIQUE,
+    source_version TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_eld_dvir_reports_driver_vehicle
+    ON eld_dvir_reports (driver_id, vehicle_id);
+CREATE INDEX IF NOT EXISTS ix_eld_dvir_reports_vehicle
+    ON eld_dvir_reports (vehicle_id);
+CREATE INDEX IF NOT EXISTS ix_eld_dvir_reports_inspection_date
+    ON eld_dvir_reports (inspection_date);
+
+CREATE TABLE IF NOT EXISTS eld_alerts (
+    id INTEGER PRIMARY KEY,
+    driver_id TEXT,
+    type TEXT,
+    severity TEXT,
+    title TEXT,
+    message TEXT,
+    rule TEXT,
+    occurred_at INTEGER,
+    created_at INTEGER,
+    occurrences INTEGER,
+    first_seen INTEGER,
+    last_seen INTEGER,
+    resolved_at INTEGER,
+    resolved_by TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_eld_alerts_driver_type_created
+    ON eld_alerts (driver_id, type, created_at);
+CREATE INDEX IF NOT EXISTS ix_eld_alerts_type_created
+    ON eld_alerts (type, created_at);
+CREATE INDEX IF NOT EXISTS ix_eld_alerts_created
+    ON eld_alerts (created_at);
+
+CREATE TABLE IF NOT EXISTS eld_hos_states (
+    driver_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS eld_feed_versions (
+    type_name TEXT PRIMARY KEY,
+    version TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS eld_rollups (
+    rollup TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (rollup, key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS eld_sequences (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# HOS logs: one table, or with partitioning one table per month of
+# start_time (eld_hos_logs_pYYYYMM) and a UNION ALL view named eld_hos_logs
+HOS_LOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {name} (
+    id INTEGER PRIMARY KEY,
+    driver_id TEXT,
+    vehicle_id TEXT,
+    log_type TEXT,
+    start_time INTEGER{bounds},
+    end_time INTEGER,
+    odometer_reading INTEGER,
+    is_edited INTEGER,
+    source_id TEXT UNIQUE,
+    source_version TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_{name}_driver_start
+    ON {name} (driver_id, start_time, log_type);
+CREATE INDEX IF NOT EXISTS ix_{name}_start
+    ON {name} (start_time, driver_id, log_type);
+"""
+
+_TIME_FIELDS = frozenset((
+    'start_time', 'end_time', 'inspection_date', 'occurred_at', 'created_at', 'first_seen',
+    'last_seen', 'resolved_at',
+))
+_BOOL_FIELDS = frozenset(('is_edited', 'is_safe_to_drive'))
+_JSON_FIELDS = frozenset(('defects',))
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+class _Table:
+    """Column layout of one record table and its constant SQL statements"""
+
+    def __init__(self, name: str, fields: Tuple[str, ...], time_field: str, upsert: bool,
+                 explicit_id: bool = False):
+        self.name = name
+        self.fields = fields
+        self.time_field = time_field
+        self.upsert = upsert
+        self.select = f"SELECT id, {', '.join(fields)}, extra FROM {name}"
+        # Partitions take ids from eld_sequences, so rows are (id, *encode(record))
+        columns = ('id',) * explicit_id + fields + ('extra',)
+        placeholders = ', '.join('?' * len(columns))
+        insert = f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({placeholders})"
+        if upsert:
+            changed = ', '.join(f"{field} = excluded.{field}" for field in fields + ('extra',)
+                                if field != 'source_id')
+            insert += (f" ON CONFLICT (source_id) DO UPDATE SET {changed}"
+                       f" WHERE {name}.source_version IS NOT excluded.source_version")
+        self.insert = insert
+
+    def partition(self, name: str) -> '_Table':
+        """Same layout stored in another table, inserting explicit ids"""
+        return _Table(name, self.fields, self.time_field, self.upsert, explicit_id=True)
+
+    def encode(self, record: Dict[str, Any]) -> Tuple[Any, ...]:
+        values = []
+        for field in self.fields:
+            value = record.get(field)
+            if field in _TIME_FIELDS:
+                value = to_epoch_ms(value)
+            elif field in _BOOL_FIELDS:
+                value = None if value is None else int(bool(value))
+            elif field in _JSON_FIELDS:
+                value = None if value is None else json.dumps(value)
+            values.append(value)
+        extra = {key: value for key, value in record.items()
+                 if key not in self.fields and key != 'id'}
+        values.append(json.dumps(extra, default=_json_default) if extra else None)
+        return tuple(values)
+
+    def decode(self, row: Tuple[Any, ...]) -> Dict[str, Any]:
+        record = {'id': row[0]}
+        for field, value in zip(self.fields, row[1:]):
+            if field in _TIME_FIELDS:
+                value = from_epoch_ms(value)
+            elif field in _BOOL_FIELDS:
+                value = None if value is None else bool(value)
+            elif field in _JSON_FIELDS:
+                value = None if value is None else json.loads(value)
+            record[field] = value
+        if row[-1]:
+            record.update(json.loads(row[-1]))
+        return record
+
+_HOS_LOGS = _Table('eld_hos_logs', (
+    'driver_id', 'vehicle_id', 'log_type', 'start_time', 'end_time', 'odometer_reading',
+    'is_edited', 'source_id', 'source_version',
+), 'start_time', upsert=True)
+_DVIR_REPORTS = _Table('eld_dvir_reports', (
+    'driver_id', 'vehicle_id', 'inspection_type', 'inspection_date', 'defects',
+    'is_safe_to_drive', 'source_id', 'source_version',
+), 'inspection_date', upsert=True)
+_ALERTS = _Table('eld_alerts', (
+    'driver_id', 'type', 'severity', 'title', 'message', 'rule', 'occurred_at', 'created_at',
+    'occurrences', 'first_seen', 'last_seen', 'resolved_at', 'resolved_by',
+), 'created_at', upsert=False)
+_HOS_START = _HOS_LOGS.fields.index('start_time')
+
+class SQLiteELDDataStore(ELDDataStore):
+    """
+    SQLite implementation of ELD data storage.
+
+    Records are returned in the same shape as the in-memory stores (datetime
+    values, alert 'type'), plus their row id. HOS logs and DVIRs with a
+    source_id are upserted. One connection is shared by all threads behind a
+    lock; other processes can read the same file concurrently thanks to WAL.
+
+    With `partitioned`, HOS logs go to one table per month of start_time and
+    eld_hos_logs becomes a view over them. Queries with a date range read
+    only the months it covers, and archive_hos_partitions exports and drops
+    expired months. An existing unpartitioned eld_hos_logs table is split
+    into monthly tables on open.
+
+    Args:
+        path (str): Database file, or ":memory:".
+        chunk_size (int): Rows fetched per query by the iter_* methods.
+        partitioned (bool): Store HOS logs in monthly tables.
+    """
+
+    def __init__(self, path: str = 'eld.db', chunk_size: int = 1000,
+                 partitioned: bool = HOS_PARTITIONED):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.partitioned = partitioned
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None,
+                                    cached_statements=256)
+        for pragma in PRAGMAS:
+            self.conn.execute(pragma)
+        self.conn.executescript(SCHEMA)
+        # Month start -> partition table, oldest first
+        self._partitions: Dict[datetime, _Table] = {}
+        if partitioned:
+            self._open_partitions()
+        else:
+            self.conn.executescript(HOS_LOG_SCHEMA.format(name=_HOS_LOGS.name, bounds=''))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def _write(self, table: _Table, records: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """executemany in one transaction; returns (records written, rows changed)"""
+        records = list(records)
+        if not records:
+            return 0, 0
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(table.insert, map(table.encode, records))
+            return len(records), conn.total_changes - before
+
+    def _query(self, table: _Table, where: List[Tuple[str, Any]], suffix: str = '',
+               extra_params: Tuple[Any, ...] = ()) -> List[Dict[str, Any]]:
+        sql = table.select
+        if where:
+            sql += " WHERE " + " AND ".join(clause for clause, _ in where)
+        with self._lock:
+            rows = self.conn.execute(sql + suffix, tuple(value for _, value in where) + extra_params).fetchall()
+        return [table.decode(row) for row in rows]
+
+    # --- HOS logs ---
+    def store_hos_log(self, log_data: Dict[str, Any]) -> bool:
+        return self.store_hos_logs([log_data]) == 1
+
+    def store_hos_logs(self, logs: Iterable[Dict[str, Any]]) -> int:
+        logs = list(logs)
+        if self.partitioned:
+            stored, changed = self._write_partitions(logs)
+        else:
+            stored, changed = self._write(_HOS_LOGS, logs)
+        if changed:
+            self._notify_hos_logs({log.get('driver_id') for log in logs})
+        return stored
+
+    def _hos_where(self, driver_id, start_date, end_date) -> List[Tuple[str, Any]]:
+        where = []
+        if driver_id:
+            where.append(("driver_id = ?", driver_id))
+        if start_date:
+            where.append(("start_time >= ?", to_epoch_ms(start_date)))
+        if end_date:
+            where.append(("start_time <= ?", to_epoch_ms(end_date)))
+        return where
+
+    def _hos_tables(self, start_date, end_date) -> List[_Table]:
+        """Tables holding HOS logs in the date range: the monthly partitions it overlaps, oldest first"""
+        if not self.partitioned:
+            return [_HOS_LOGS]
+        start = from_epoch_ms(to_epoch_ms(start_date)) if start_date else None
+        end = from_epoch_ms(to_epoch_ms(end_date)) if end_date else None
+        with self._lock:
+            return [table for month, table in self._partitions.items()
+                    if (start is None or add_months(month, 1) > start)
+                    and (end is None or month <= end)]
+
+    def get_hos_logs(self, driver_id: Optional[str] = None,
+                    start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        where = self._hos_where(driver_id, start_date, end_date)
+        # Partitions cover disjoint months, so concatenating them keeps (start_time, id) order
+        with self._lock:
+            return [log for table in self._hos_tables(start_date, end_date)
+                    for log in self._query(table, where, " ORDER BY start_time, id")]
+
+    def get_hos_logs_page(self, driver_id: Optional[str] = None,
+                          start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None,
+                          after: Optional[PageKey] = None,
+                          limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+        where = self._hos_where(driver_id, start_date, end_date)
+        records: List[Dict[str, Any]] = []
+        with self._lock:
+            tables = self._hos_tables(start_date, end_date)
+            for index, table in enumerate(tables):
+                if len(records) == limit:
+                    # Page filled at a partition boundary: it's the last page unless later ones match
+                    if any(self._query(rest, where, " LIMIT 1") for rest in tables[index:]):
+                        return records, (records[-1]['start_time'], records[-1]['id'])
+                    break
+                page, next_key = self._page(table, where, after, limit - len(records))
+                records += page
+                if next_key is not None:
+                    return records, next_key
+        return records, None
+
+    def iter_hos_logs(self, driver_id: Optional[str] = None,
+                      start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        where = self._hos_where(driver_id, start_date, end_date)
+        for table in self._hos_tables(start_date, end_date):
+            yield from self._iter(table, where)
+
+    def get_hos_logs_by_source(self, source_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        where = [("source_id IN (SELECT value FROM json_each(?))", json.dumps(list(source_ids)))]
+        with self._lock:
+            return {log['source_id']: log for table in self._hos_tables(None, None)
+                    for log in self._query(table, where)}
+
+    def get_hos_log_driver_ids(self, start_date: Optional[datetime] = None,
+                               end_date: Optional[datetime] = None) -> Set[str]:
+        where = self._hos_where(None, start_date, end_date)
+        params = tuple(value for _, value in where)
+        driver_ids = set()
+        with self._lock:
+            for table in self._hos_tables(start_date, end_date):
+                sql = f"SELECT DISTINCT driver_id FROM {table.name} WHERE driver_id IS NOT NULL"
+                for clause, _ in where:
+                    sql += " AND " + clause
+                driver_ids.update(driver_id for driver_id, in self.conn.execute(sql, params))
+        return driver_ids
+
+    def hos_log_columns(self, driver_id: Optional[str] = None,
+                        start_date: Optional[datetime] = None,
+                        end_date: Optional[datetime] = None):
+        """
+        Matching rows as columns for the HOS rules engine, read from the
+        covering (driver_id/start_time, log_type) indexes without touching
+        the table. Same shape as ColumnarELDDataStore.hos_log_columns.
+        """
+        where = self._hos_where(driver_id, start_date, end_date)
+        params = tuple(value for _, value in where)
+        rows = []
+        with self._lock:
+            for table in self._hos_tables(start_date, end_date):
+                sql = f"SELECT driver_id, log_type, start_time FROM {table.name} WHERE start_time IS NOT NULL"
+                for clause, _ in where:
+                    sql += " AND " + clause
+                rows += self.conn.execute(sql, params).fetchall()
+        drivers: Dict[str, int] = {}
+        codes, statuses, starts = [], [], []
+        for driver, log_type, start in rows:
+            code = drivers.get(driver)
+            if code is None:
+                code = drivers[driver] = len(drivers)
+            codes.append(code)
+            statuses.append(status_code(log_type))
+            starts.append(start / 1000.0)
+        return list(drivers), codes, statuses, starts
+
+    # --- HOS log partitions ---
+    def _open_partitions(self):
+        """Load the monthly tables, splitting an unpartitioned eld_hos_logs table first"""
+        with self._transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO eld_sequences (name, value) VALUES (?, 0)",
+                         (_HOS_LOGS.name,))
+            kind = conn.execute("SELECT type FROM sqlite_master WHERE name = ?",
+                                (_HOS_LOGS.name,)).fetchone()
+            names = [name for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?",
+                (_HOS_LOGS.name + '_p%',))]
+            partitions = {}
+            for name in names:
+                month = partition_month(_HOS_LOGS.name, name)
+                if month is not None:
+                    partitions[month] = _HOS_LOGS.partition(name)
+            if kind and kind[0] == 'table':
+                partitions = self._split_hos_table(conn, partitions)
+            self._create_hos_view(conn, partitions)
+        self._partitions = dict(sorted(partitions.items()))
+
+    def _split_hos_table(self, conn, partitions: Dict[datetime, _Table]) -> Dict[datetime, _Table]:
+        """Move the rows of an unpartitioned eld_hos_logs table into monthly tables and drop it"""
+        name = _HOS_LOGS.name
+        if conn.execute(f"SELECT 1 FROM {name} WHERE start_time IS NULL LIMIT 1").fetchone():
+            raise ValueError(f"{name} has rows without a start_time; they can't be partitioned")
+        first, last, max_id = conn.execute(f"SELECT min(start_time), max(start_time), max(id) FROM {name}").fetchone()
+        partitions = dict(partitions)
+        if first is not None:
+            columns = ', '.join(('id',) + _HOS_LOGS.fields + ('extra',))
+            for month in iter_months(from_epoch_ms(first), from_epoch_ms(last)):
+                table = partitions.get(month) or self._create_partition(conn, month)
+                partitions[month] = table
+                conn.execute(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {name}"
+                             f" WHERE start_time >= ? AND start_time < ?",
+                             (to_epoch_ms(month), to_epoch_ms(add_months(month, 1))))
+            conn.execute("UPDATE eld_sequences SET value = max(value, ?) WHERE name = ?", (max_id, name))
+        conn.execute(f"DROP TABLE {name}")
+        return partitions
+
+    def _create_partition(self, conn, month: datetime) -> _Table:
+        name = partition_name(_HOS_LOGS.name, month)
+        bounds = (f" CHECK (start_time >= {to_epoch_ms(month)}"
+                  f" AND start_time < {to_epoch_ms(add_months(month, 1))})")
+        # executescript would commit the open transaction, so run the statements one by one
+        for statement in HOS_LOG_SCHEMA.format(name=name, bounds=bounds).split(';'):
+            if statement.strip():
+                conn.execute(statement)
+        return _HOS_LOGS.partition(name)
+
+    def _create_hos_view(self, conn, partitions: Dict[datetime, _Table]):
+        """(Re)create the eld_hos_logs view as the UNION ALL of the partitions"""
+        columns = ('id',) + _HOS_LOGS.fields + ('extra',)
+        selects = [f"SELECT {', '.join(columns)} FROM {partitions[month].name}"
+                   for month in sorted(partitions)]
+        if not selects:
+            selects = [f"SELECT {', '.join(f'NULL AS {column}' for column in columns)} WHERE 0"]
+        conn.execute(f"DROP VIEW IF EXISTS {_HOS_LOGS.name}")
+        conn.execute(f"CREATE VIEW {_HOS_LOGS.name} AS {' UNION ALL '.join(selects)}")
+
+    def _write_partitions(self, logs: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Upsert logs into their months' tables, creating missing ones, in one
+        transaction. A log whose start_time moved to another month is deleted
+        from the month it was in. Returns (records written, rows changed).
+        """
+        if not logs:
+            return 0, 0
+        by_month: Dict[datetime, List[Tuple[Any, ...]]] = {}
+        for log in logs:
+            row = _HOS_LOGS.encode(log)
+            if row[_HOS_START] is None:
+                raise ValueError("Partitioned HOS logs need a start_time")
+            by_month.setdefault(month_start(from_epoch_ms(row[_HOS_START])), []).append(row)
+        source_index = _HOS_LOGS.fields.index('source_id')
+        with self._transaction() as conn:
+            partitions = dict(self._partitions)
+            for month in by_month:
+                if month not in partitions:
+                    partitions[month] = self._create_partition(conn, month)
+            if len(partitions) != len(self._partitions):
+                self._create_hos_view(conn, partitions)
+            before = conn.total_changes
+            conn.execute("UPDATE eld_sequences SET value = value + ? WHERE name = ?",
+                         (len(logs), _HOS_LOGS.name))
+            next_id = conn.execute("SELECT value FROM eld_sequences WHERE name = ?",
+                                   (_HOS_LOGS.name,)).fetchone()[0] - len(logs) + 1
+            for month, rows in by_month.items():
+                table = partitions[month]
+                source_ids = [row[source_index] for row in rows if row[source_index] is not None]
+                if source_ids:
+                    moved = json.dumps(source_ids)
+                    for other in partitions.values():
+                        if other is not table:
+                            conn.execute(f"DELETE FROM {other.name} WHERE source_id IN (SELECT value FROM json_each(?))",
+                                         (moved,))
+                conn.executemany(table.insert, [(next_id + offset,) + row for offset, row in enumerate(rows)])
+                next_id += len(rows)
+            changed = conn.total_changes - before - 1
+        self._partitions = dict(sorted(partitions.items()))
+        return len(logs), changed
+
+    def archive_hos_partitions(self, before: datetime, archive_dir: str) -> List[Dict[str, Any]]:
+        """
+        Export each monthly partition ending at or before `before` to
+        <archive_dir>/<table>.ndjson.gz and drop it. Returns one summary per
+        archived month. Unpartitioned stores keep all logs and archive nothing.
+        """
+        archived = []
+        if not self.partitioned:
+            return archived
+        for month in expired_months(list(self._partitions), before):
+            # Held across export and drop so no write lands in between
+            with self._lock:
+                table = self._partitions[month]
+                path = archive_path(archive_dir, table.name)
+                rows = write_archive(path, self._iter(table, []))
+                remaining = {key: value for key, value in self._partitions.items() if key != month}
+                with self._transaction() as conn:
+                    conn.execute(f"DROP TABLE {table.name}")
+                    self._create_hos_view(conn, remaining)
+                self._partitions = remaining
+            archived.append({"partition": table.name, "month": month.strftime('%Y-%m'),
+                             "rows": rows, "path": path})
+        return archived
+
+    # --- DVIR reports ---
+    def store_dvir_report(self, dvir_data: Dict[str, Any]) -> bool:
+        return self.store_dvir_reports([dvir_data]) == 1
+
+    def store_dvir_reports(self, reports: Iterable[Dict[str, Any]]) -> int:
+        return self._write(_DVIR_REPORTS, reports)[0]
+
+    def _dvir_where(self, driver_id, vehicle_id) -> List[Tuple[str, Any]]:
+        where = []
+        if driver_id:
+            where.append(("driver_id = ?", driver_id))
+        if vehicle_id:
+            where.append(("vehicle_id = ?", vehicle_id))
+        return where
+
+    def get_dvir_reports(self, driver_id: Optional[str] = None,
+                        vehicle_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self._query(_DVIR_REPORTS, self._dvir_where(driver_id, vehicle_id), " ORDER BY id")
+
+    def get_dvir_reports_page(self, driver_id: Optional[str] = None,
+                              vehicle_id: Optional[str] = None,
+                              after: Optional[PageKey] = None,
+                              limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+        return self._page(_DVIR_REPORTS, self._dvir_where(driver_id, vehicle_id), after, limit)
+
+    def iter_dvir_reports(self, driver_id: Optional[str] = None,
+                          vehicle_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        return self._iter(_DVIR_REPORTS, self._dvir_where(driver_id, vehicle_id))
+
+    # --- Alerts ---
+    def store_alert(self, alert_data: Dict[str, Any]) -> bool:
+        return self.store_alerts([alert_data]) == 1
+
+    def store_alerts(self, alerts: Iterable[Dict[str, Any]]) -> int:
+        return self._write(_ALERTS, alerts)[0]
+
+    def _alert_where(self, driver_id, alert_type) -> List[Tuple[str, Any]]:
+        where = []
+        if driver_id:
+            where.append(("driver_id = ?", driver_id))
+        if alert_type:
+            where.append(("type = ?", alert_type))
+        return where
+
+    def get_alerts(self, driver_id: Optional[str] = None,
+                  alert_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self._query(_ALERTS, self._alert_where(driver_id, alert_type), " ORDER BY id")
+
+    def get_alerts_page(self, driver_id: Optional[str] = None,
+                        alert_type: Optional[str] = None,
+                        after: Optional[PageKey] = None,
+                        limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+        return self._page(_ALERTS, self._alert_where(driver_id, alert_type), after, limit)
+
+    def iter_alerts(self, driver_id: Optional[str] = None,
+                    alert_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        return self._iter(_ALERTS, self._alert_where(driver_id, alert_type))
+
+    def update_alerts(self, updates: Dict[Any, Dict[str, Any]]) -> int:
+        """Column fields are set in place; other fields are merged into the extra JSON"""
+        updated = 0
+        with self._transaction() as conn:
+            for alert_id, fields in updates.items():
+                encoded = _ALERTS.encode(fields)
+                values = dict(zip(_ALERTS.fields, encoded))
+                assignments = [f"{field} = ?" for field in _ALERTS.fields if field in fields]
+                params = [values[field] for field in _ALERTS.fields if field in fields]
+                extra = encoded[-1]
+                if extra:
+                    assignments.append("extra = json_patch(coalesce(extra, '{}'), ?)")
+                    params.append(extra)
+                if not assignments:
+                    continue
+                cursor = conn.execute(f"UPDATE eld_alerts SET {', '.join(assignments)} WHERE id = ?",
+                                      params + [alert_id])
+                updated += cursor.rowcount
+        return updated
+
+    def delete_alerts(self, alert_ids: Iterable[Any]) -> int:
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany("DELETE FROM eld_alerts WHERE id = ?", ((alert_id,) for alert_id in alert_ids))
+            return conn.total_changes - before
+
+    # --- Paging ---
+    def _page(self, table: _Table, where: List[Tuple[str, Any]], after: Optional[PageKey],
+              limit: int) -> Tuple[List[Dict[str, Any]], Optional[PageKey]]:
+        """Rows ordered by (time field, id) after `after`; one extra row detects the last page"""
+        field = table.time_field
+        clauses = [clause for clause, _ in where]
+        params = [value for _, value in where]
+        if after is not None:
+            clauses.append(f"({field}, id) > (?, ?)")
+            params += [to_epoch_ms(after[0]), after[1]]
+        sql = table.select
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {field}, id LIMIT ?"
+        params.append(limit + 1)
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        records = [table.decode(row) for row in rows[:limit]]
+        next_key = None
+        if len(rows) > limit:
+            next_key = (records[-1][field], records[-1]['id'])
+        return records, next_key
+
+    def _iter(self, table: _Table, where: List[Tuple[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Stream rows in id order, `chunk_size` per query so no lock is held between batches"""
+        last_id = 0
+        while True:
+            batch = self._query(table, where + [("id > ?", last_id)], " ORDER BY id LIMIT ?",
+                                (self.chunk_size,))
+            yield from batch
+            if len(batch) < self.chunk_size:
+                return
+            last_id = batch[-1]['id']
+
+    # --- Incremental state ---
+    def get_hos_states(self, driver_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            if driver_ids is None:
+                rows = self.conn.execute("SELECT driver_id, state FROM eld_hos_states").fetchall()
+            else:
+                # The ids go in as one JSON array parameter, so any number fits in one query
+                rows = self.conn.execute(
+                    "SELECT driver_id, state FROM eld_hos_states"
+                    " WHERE driver_id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(list(driver_ids)),)).fetchall()
+        return {driver_id: json.loads(state) for driver_id, state in rows}
+
+    def store_hos_states(self, states: Dict[str, Dict[str, Any]]) -> bool:
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO eld_hos_states (driver_id, state) VALUES (?, ?)"
+                " ON CONFLICT (driver_id) DO UPDATE SET state = excluded.state",
+                [(driver_id, json.dumps(state)) for driver_id, state in states.items()])
+        return True
+
+    def get_rollups(self, rollup: str, keys: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            if keys is None:
+                rows = self.conn.execute("SELECT key, value FROM eld_rollups WHERE rollup = ?",
+                                         (rollup,)).fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT key, value FROM eld_rollups"
+                    " WHERE rollup = ? AND key IN (SELECT value FROM json_each(?))",
+                    (rollup, json.dumps(list(keys)))).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def store_rollups(self, rollup: str, entries: Dict[str, Dict[str, Any]],
+                      replace: bool = False) -> bool:
+        with self._transaction() as conn:
+            if replace:
+                conn.execute("DELETE FROM eld_rollups WHERE rollup = ?", (rollup,))
+            conn.executemany(
+                "INSERT INTO eld_rollups (rollup, key, value) VALUES (?, ?, ?)"
+                " ON CONFLICT (rollup, key) DO UPDATE SET value = excluded.value",
+                [(rollup, key, json.dumps(value)) for key, value in entries.items()])
+        return True
+
+    def get_feed_version(self, type_name: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute("SELECT version FROM eld_feed_versions WHERE type_name = ?",
+                                    (type_name,)).fetchone()
+        return row[0] if row else None
+
+    def store_feed_version(self, type_name: str, version: str) -> bool:
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO eld_feed_versions (type_name, version) VALUES (?, ?)"
+                         " ON CONFLICT (type_name) DO UPDATE SET version = excluded.version",
+                         (type_name, version))
+        return True
@@ -0,0 +1,441 @@
+"""
+ELD Store Journal
+Append-only journal and compacted snapshots for the in-memory data stores,
+so a restarted worker comes back warm without a Geotab re-sync.
+
+JournaledELDDataStore wraps any ELDDataStore. Each write call is applied to
+the wrapped store and then appended to the journal as one checksummed
+frame. Once the journal grows past a threshold, writes move on to a new
+journal and the store contents as of that point are written to a new
+snapshot. Only copying the lists of stored records holds up writes; the
+snapshot is pickled and written outside the write lock. On open, the latest
+snapshot is memory-mapped and loaded, and then the journals are replayed. A
+torn frame at the end of the journal (a crash mid-write) is truncated.
+
+Directory layout:
+    snapshot.bin      header, then one pickle per section
+    journal.bin       header, then frames of (length, crc32, pickle)
+    journal.<N>.bin   a journal of generation N that a snapshot in progress
+                      (or interrupted) has moved aside
+Every header carries a generation number. A snapshot of generation N holds
+everything written to journals before generation N, so journals older than
+the snapshot are skipped (and removed).
+"""
+
+import os
+import re
+import mmap
+import pickle
+import struct
+import logging
+import threading
+import zlib
+from datetime import datetime
+from itertools import count
+from typing import Dict, List, Optional, Any, Callable, Iterable, Set, Tuple
+
+from rapid_eld import ELDDataStore, InMemoryELDDataStore
+from fleet_rollups import FLEET_ROLLUPS
+
+# Journal size that triggers a compacted snapshot
+ELD_JOURNAL_SNAPSHOT_BYTES = int(os.environ.get("ELD_JOURNAL_SNAPSHOT_BYTES", str(256 * 1024 * 1024)))
+
+_MAGIC = b"RELDJ1"
+_HEADER = struct.Struct("<6sQ")     # magic, generation
+_FRAME = struct.Struct("<II")       # payload length, crc32
+_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+SNAPSHOT_FILE = "snapshot.bin"
+JOURNAL_FILE = "journal.bin"
+_ROTATED_JOURNAL = re.compile(r"journal\.(\d+)\.bin$")
+
+class JournalError(Exception):
+    """Raised when a snapshot or journal file is not a store journal"""
+
+def _read_header(data, path: str) -> int:
+    if len(data) < _HEADER.size:
+        raise JournalError(f"{path} is truncated")
+    magic, generation = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise JournalError(f"{path} is not an ELD store journal")
+    return generation
+
+def read_frames(data, offset: int = _HEADER.size) -> Tuple[List[Tuple[str, Any]], int]:
+    """
+    Decode journal frames from `offset`; returns (operations, end of the last
+    complete frame). Stops at the first short or corrupt frame.
+    """
+    operations = []
+    while offset + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, offset)
+        start = offset + _FRAME.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        operations.append(pickle.loads(payload))
+        offset = start + length
+    return operations, offset
+
+class JournaledELDDataStore(ELDDataStore):
+    """
+    Journaling wrapper around an in-memory ELD data store.
+
+    Reads go straight to the wrapped store, and so do store-specific
+    methods such as hos_log_columns. Alert ids are assigned here instead of
+    by the wrapped store, so they survive restarts.
+
+    Args:
+        directory (str): Directory holding snapshot.bin and journal.bin.
+        store: Empty store to restore into (InMemoryELDDataStore by default).
+        snapshot_bytes (int): Journal size that triggers a snapshot.
+        fsync (bool): fsync the journal after every write call. Without it,
+            a power loss (but not a process crash) can lose the last writes,
+            which the next Geotab feed sync fetches again.
+    """
+
+    def __init__(self, directory: str, store: Optional[ELDDataStore] = None,
+                 snapshot_bytes: int = ELD_JOURNAL_SNAPSHOT_BYTES, fsync: bool = False):
+        self.directory = directory
+        self.store = store if store is not None else InMemoryELDDataStore()
+        self.snapshot_bytes = snapshot_bytes
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        # Held while a snapshot is written, which happens outside _lock
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_due = False
+        self._feed_versions: Dict[str, str] = {}
+        self._alert_ids = count(1)
+        self._generation = 0
+        self._journal = None
+        os.makedirs(directory, exist_ok=True)
+        self.restore()
+
+    def __getattr__(self, name):
+        # Only called for attributes not found on the wrapper
+        if name == 'store':
+            raise AttributeError(name)
+        return getattr(self.store, name)
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, SNAPSHOT_FILE)
+
+    @property
+    def journal_path(self) -> str:
+        return os.path.join(self.directory, JOURNAL_FILE)
+
+    def _rotated_journal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"journal.{generation}.bin")
+
+    def _rotated_journals(self) -> List[Tuple[int, str]]:
+        """(generation, path) of the journals moved aside by snapshots, oldest first"""
+        journals = []
+        for name in os.listdir(self.directory):
+            match = _ROTATED_JOURNAL.match(name)
+            if match:
+                journals.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(journals)
+
+    # --- Restore ---
+    def restore(self):
+        """Load the latest snapshot and replay the journal tail into the wrapped store"""
+        with self._lock:
+            snapshot_records = self._load_snapshot()
+            replayed = 0
+            # Journals moved aside by a snapshot that didn't finish
+            for generation, path in self._rotated_journals():
+                if generation < self._generation:
+                    os.remove(path)
+                    continue
+                writes, _ = self._replay_journal(path)
+                replayed += writes
+                # The current journal is newer than every rotated one
+                self._generation = generation + 1
+            writes, end = self._replay_journal(self.journal_path)
+            replayed += writes
+            self._open_journal(end)
+            logging.info(f"Restored ELD store from {self.directory}: {snapshot_records} snapshot "
+                         f"records, {replayed} journal writes")
+
+    def _load_snapshot(self) -> int:
+        if not os.path.exists(self.snapshot_path):
+            return 0
+        with open(self.snapshot_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            self._generation = _read_header(data, self.snapshot_path)
+            view = memoryview(data)
+            try:
+                sections, _ = read_frames(view)
+                sections = dict(sections)
+            finally:
+                view.release()
+        if 'end' not in sections:
+            raise JournalError(f"{self.snapshot_path} is incomplete")
+        self.store.store_hos_logs(sections['hos_logs'])
+        self.store.store_dvir_reports(sections['dvir_reports'])
+        self.store.store_alerts(sections['alerts'])
+        self.store.store_hos_states(sections['hos_states'])
+        # Snapshots written before rollups were journalled have no rollups section
+        for rollup, entries in sections.get('rollups', {}).items():
+            self.store.store_rollups(rollup, entries, replace=True)
+        for type_name, version in sections['feed_versions'].items():
+            self.store.store_feed_version(type_name, version)
+        self._feed_versions = dict(sections['feed_versions'])
+        self._alert_ids = count(sections['next_alert_id'])
+        return len(sections['hos_logs']) + len(sections['dvir_reports']) + len(sections['alerts'])
+
+    def _replay_journal(self, path: str) -> Tuple[int, int]:
+        """Apply a journal if the loaded snapshot doesn't include it; returns (writes, valid length)"""
+        if not os.path.exists(path) or os.path.getsize(path) < _HEADER.size:
+            return 0, 0
+        with open(path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            generation = _read_header(data, path)
+            if generation < self._generation:
+                # Written before the snapshot, which already includes it
+                return 0, 0
+            self._generation = generation
+            view = memoryview(data)
+            try:
+                operations, end = read_frames(view)
+            finally:
+                view.release()
+            if end < len(data):
+                logging.warning(f"Truncating {len(data) - end} bytes of torn journal tail")
+        for operation, payload in operations:
+            self._apply(operation, payload)
+        return len(operations), end
+
+    def _apply(self, operation: str, payload: Any):
+        if operation == 'hos_logs':
+            self.store.store_hos_logs(payload)
+        elif operation == 'dvir_reports':
+            self.store.store_dvir_reports(payload)
+        elif operation == 'alerts':
+            self.store.store_alerts(payload)
+            last_id = max((alert['id'] for alert in payload), default=0)
+            self._alert_ids = count(max(next(self._alert_ids), last_id + 1))
+        elif operation == 'hos_states':
+            self.store.store_hos_states(payload)
+        elif operation == 'rollups':
+            rollup, entries, replace = payload
+            self.store.store_rollups(rollup, entries, replace)
+        elif operation == 'feed_version':
+            type_name, version = payload
+            self.store.store_feed_version(type_name, version)
+            self._feed_versions[type_name] = version
+        elif operation == 'update_alerts':
+            self.store.update_alerts(payload)
+        elif operation == 'delete_alerts':
+            self.store.delete_alerts(payload)
+        else:
+            raise JournalError(f"Unknown journal operation {operation!r}")
+
+    def _open_journal(self, end: int):
+        if end:
+            self._journal = open(self.journal_path, 'r+b')
+            self._journal.truncate(end)
+            self._journal.seek(end)
+        else:
+            self._journal = open(self.journal_path, 'wb')
+            self._journal.write(_HEADER.pack(_MAGIC, self._generation))
+            self._sync()
+
+    # --- Journal ---
+    def _sync(self):
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    def _append(self, operation: str, payload: Any):
+        data = pickle.dumps((operation, payload), protocol=_PROTOCOL)
+        self._journal.write(_FRAME.pack(len(data), zlib.crc32(data)))
+        self._journal.write(data)
+        self._sync()
+        if self._journal.tell() >= self.snapshot_bytes:
+            # Taken by the write call once it has released the lock
+            self._snapshot_due = True
+
+    def _snapshot_if_due(self):
+        if self._snapshot_due:
+            # A snapshot already being written will be followed by another
+            # once the new journal grows past the threshold
+            self.snapshot(wait=False)
+
+    def snapshot(self, wait: bool = True) -> bool:
+        """
+        Write the store contents to a new snapshot and start an empty journal.
+        Writes only wait while the stored records are listed; the snapshot is
+        pickled and written after the lock is released. Returns False without
+        a snapshot if `wait` is off and another snapshot is being written.
+        """
+        if not self._snapshot_lock.acquire(blocking=wait):
+            return False
+        try:
+            with self._lock:
+                generation = self._generation + 1
+                next_alert_id = next(self._alert_ids)
+                self._alert_ids = count(next_alert_id)
+                sections = (
+                    # New lists of the stored records. Stores replace records
+                    # rather than edit them, except alerts, so those are copied.
+                    ('hos_logs', list(self.store.get_hos_logs())),
+                    ('dvir_reports', list(self.store.get_dvir_reports())),
+                    ('alerts', [dict(alert) for alert in self.store.get_alerts()]),
+                    ('hos_states', self.store.get_hos_states()),
+                    ('rollups', {rollup: self.store.get_rollups(rollup) for rollup in FLEET_ROLLUPS}),
+                    ('feed_versions', dict(self._feed_versions)),
+                    ('next_alert_id', next_alert_id),
+                    ('end', None),
+                )
+                # Later writes go to a new journal. Until the snapshot is in
+                # place, the one it replaces stays on disk for restore.
+                self._journal.close()
+                os.replace(self.journal_path, self._rotated_journal_path(self._generation))
+                self._generation = generation
+                self._open_journal(0)
+                self._snapshot_due = False
+            temp_path = self.snapshot_path + '.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, generation))
+                for section in sections:
+                    data = pickle.dumps(section, protocol=_PROTOCOL)
+                    f.write(_FRAME.pack(len(data), zlib.crc32(data)))
+                    f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.snapshot_path)
+            # The snapshot includes every older journal
+            for rotated_generation, path in self._rotated_journals():
+                if rotated_generation < generation:
+                    os.remove(path)
+            return True
+        finally:
+            self._snapshot_lock.release()
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    # --- Writes ---
+    def _write(self, operation: str, records: Iterable[Dict[str, Any]],
+               store: Callable[[List[Dict[str, Any]]], int]) -> int:
+        records = list(records)
+        with self._lock:
+            if operation == 'alerts':
+                for record in records:
+                    record.setdefault('id', next(self._alert_ids))
+            stored = store(records)
+            self._append(operation, records)
+        self._snapshot_if_due()
+        return stored
+
+    def store_hos_log(self, log_data: Dict[str, Any]) -> bool:
+        return self.store_hos_logs([log_data]) == 1
+
+    def store_hos_logs(self, logs: Iterable[Dict[str, Any]]) -> int:
+        return self._write('hos_logs', logs, self.store.store_hos_logs)
+
+    def store_dvir_report(self, dvir_data: Dict[str, Any]) -> bool:
+        return self.store_dvir_reports([dvir_data]) == 1
+
+    def store_dvir_reports(self, reports: Iterable[Dict[str, Any]]) -> int:
+        return self._write('dvir_reports', reports, self.store.store_dvir_reports)
+
+    def store_alert(self, alert_data: Dict[str, Any]) -> bool:
+        return self.store_alerts([alert_data]) == 1
+
+    def store_alerts(self, alerts: Iterable[Dict[str, Any]]) -> int:
+        return self._write('alerts', alerts, self.store.store_alerts)
+
+    def store_hos_states(self, states: Dict[str, Dict[str, Any]]) -> bool:
+        with self._lock:
+            stored = self.store.store_hos_states(states)
+            self._append('hos_states', dict(states))
+        self._snapshot_if_due()
+        return stored
+
+    def store_rollups(self, rollup: str, entries: Dict[str, Dict[str, Any]],
+                      replace: bool = False) -> bool:
+        with self._lock:
+            stored = self.store.store_rollups(rollup, entries, replace)
+            self._append('rollups', (rollup, dict(entries), replace))
+        self._snapshot_if_due()
+        return stored
+
+    def store_feed_version(self, type_name: str, version: str) -> bool:
+        with self._lock:
+            stored = self.store.store_feed_version(type_name, version)
+            self._feed_versions[type_name] = version
+            self._append('feed_version', (type_name, version))
+        self._snapshot_if_due()
+        return stored
+
+    def update_alerts(self, updates: Dict[Any, Dict[str, Any]]) -> int:
+        with self._lock:
+            updated = self.store.update_alerts(updates)
+            self._append('update_alerts', updates)
+        self._snapshot_if_due()
+        return updated
+
+    def delete_alerts(self, alert_ids: Iterable[Any]) -> int:
+        alert_ids = list(alert_ids)
+        with self._lock:
+            deleted = self.store.delete_alerts(alert_ids)
+            self._append('delete_alerts', alert_ids)
+        self._snapshot_if_due()
+        return deleted
+
+    # --- Reads ---
+    def get_hos_logs(self, driver_id: Optional[str] = None,
+                    start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        return self.store.get_hos_logs(driver_id, start_date, end_date)
+
+    def get_dvir_reports(self, driver_id: Optional[str] = None,
+                        vehicle_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.store.get_dvir_reports(driver_id, vehicle_id)
+
+    def get_alerts(self, driver_id: Optional[str] = None,
+                  alert_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.store.get_alerts(driver_id, alert_type)
+
+    def get_hos_logs_page(self, *args, **kwargs):
+        return self.store.get_hos_logs_page(*args, **kwargs)
+
+    def get_dvir_reports_page(self, *args, **kwargs):
+        return self.store.get_dvir_reports_page(*args, **kwargs)
+
+    def get_alerts_page(self, *args, **kwargs):
+        return self.store.get_alerts_page(*args, **kwargs)
+
+    def iter_hos_logs(self, *args, **kwargs):
+        return self.store.iter_hos_logs(*args, **kwargs)
+
+    def iter_dvir_reports(self, *args, **kwargs):
+        return self.store.iter_dvir_reports(*args, **kwargs)
+
+    def iter_alerts(self, *args, **kwargs):
+        return self.store.iter_alerts(*args, **kwargs)
+
+    def get_hos_logs_by_source(self, source_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        return self.store.get_hos_logs_by_source(source_ids)
+
+    def get_hos_log_driver_ids(self, start_date: Optional[datetime] = None,
+                               end_date: Optional[datetime] = None) -> Set[str]:
+        return self.store.get_hos_log_driver_ids(start_date, end_date)
+
+    def get_hos_states(self, driver_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        return self.store.get_hos_states(driver_ids)
+
+    def get_rollups(self, rollup: str, keys: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        return self.store.get_rollups(rollup, keys)
+
+    def get_feed_version(self, type_name: str) -> Optional[str]:
+        return self.store.get_feed_version(type_name)
+
+    # HOS log notifications come from the wrapped store
+    def add_hos_log_listener(self, listener: Callable[[Iterable[str]], None]):
+        self.store.add_hos_log_listener(listener)
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+# The modules are flat files next to this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rapid_eld import ColumnarELDDataStore, IndexedInMemoryELDDataStore, InMemoryELDDataStore  # noqa: E402
+from sqlite_store import SQLiteELDDataStore  # noqa: E402
+
+STORES = ["memory", "indexed", "columnar", "sqlite", "sqlite_partitioned", "flask"]
+
+@pytest.fixture(params=STORES)
+def store(request, tmp_path):
+    """Each data store implementation, empty"""
+    kind = request.param
+    if kind == "memory":
+        yield InMemoryELDDataStore()
+    elif kind == "indexed":
+        yield IndexedInMemoryELDDataStore()
+    elif kind == "columnar":
+        yield ColumnarELDDataStore()
+    elif kind.startswith("sqlite"):
+        store = SQLiteELDDataStore(str(tmp_path / "eld.db"), partitioned=kind == "sqlite_partitioned")
+        yield store
+        store.conn.close()
+    else:
+        flask = pytest.importorskip("flask")
+        flask_sqlalchemy = pytest.importorskip("flask_sqlalchemy")
+        from eld_integration import Base, FlaskELDDataStore
+        app = flask.Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'flask.db'}"
+        db = flask_sqlalchemy.SQLAlchemy(app)
+        with app.app_context():
+            store = FlaskELDDataStore(db)
+            Base.metadata.create_all(db.engine)
+            yield store
+            store.remove_session()
@@ -0,0 +1,90 @@
+"""Alert coalescing and retention"""
+
+from datetime import datetime, timedelta
+
+from rapid_eld import ALERT_COALESCE_WINDOW, ALERT_RESOLVE_AFTER, ALERT_RETENTION, ELDDataStore, ELDService
+
+NOW = datetime(2026, 10, 1, 12)
+
+def violation_alert(occurred_at, driver_id="d1", rule="driving_11_hour", created_at=NOW):
+    return {"driver_id": driver_id, "type": "HOS Violation", "severity": "high",
+            "title": "HOS Violation Detected", "message": "m", "rule": rule,
+            "occurred_at": occurred_at, "created_at": created_at}
+
+class ListAlertStore(ELDDataStore):
+    """Minimal custom store relying on the ELDDataStore defaults"""
+
+    def __init__(self):
+        self.alerts = []
+
+    def store_hos_log(self, log_data):
+        return True
+
+    def get_hos_logs(self, driver_id=None, start_date=None, end_date=None):
+        return []
+
+    def store_dvir_report(self, dvir_data):
+        return True
+
+    def get_dvir_reports(self, driver_id=None, vehicle_id=None):
+        return []
+
+    def store_alert(self, alert_data):
+        alert_data.setdefault('id', len(self.alerts) + 1)
+        self.alerts.append(alert_data)
+        return True
+
+    def get_alerts(self, driver_id=None, alert_type=None):
+        if driver_id is None and alert_type is None:
+            return self.alerts
+        return [alert for alert in self.alerts
+                if driver_id in (None, alert['driver_id']) and alert_type in (None, alert['type'])]
+
+def test_repeats_within_the_window_are_coalesced(store):
+    service = ELDService(data_store=store)
+    assert len(service.record_alerts([violation_alert(NOW)])) == 1
+    repeat = NOW + timedelta(seconds=ALERT_COALESCE_WINDOW / 2)
+    assert service.record_alerts([violation_alert(repeat, created_at=repeat)]) == []
+
+    alert, = store.get_alerts("d1")
+    assert alert["occurrences"] == 2
+
+def test_repeats_outside_the_window_or_of_other_rules_are_new(store):
+    service = ELDService(data_store=store)
+    service.record_alerts([violation_alert(NOW)])
+    later = NOW + timedelta(seconds=ALERT_COALESCE_WINDOW + 60)
+    assert len(service.record_alerts([violation_alert(later)])) == 1
+    assert len(service.record_alerts([violation_alert(NOW, rule="cycle")])) == 1
+    assert len(service.record_alerts([violation_alert(NOW, driver_id="d2")])) == 1
+    assert len(store.get_alerts()) == 4
+
+def test_resolved_alerts_do_not_absorb_repeats(store):
+    service = ELDService(data_store=store)
+    service.record_alerts([violation_alert(NOW)])
+    assert service.resolve_alerts([store.get_alerts("d1")[0]["id"]], "dispatcher") == 1
+    assert len(service.record_alerts([violation_alert(NOW)])) == 1
+    assert len(store.get_alerts("d1")) == 2
+
+def test_retention_resolves_quiet_alerts_then_deletes_them(store):
+    service = ELDService(data_store=store)
+    service.record_alerts([violation_alert(NOW)])
+    service.record_alerts([violation_alert(NOW, driver_id="d2",
+                                           created_at=NOW + ALERT_RESOLVE_AFTER)])
+
+    check = NOW + ALERT_RESOLVE_AFTER + timedelta(hours=1)
+    assert service.apply_alert_retention(check) == {"resolved": 1, "purged": 0}
+    assert service.apply_alert_retention(check) == {"resolved": 0, "purged": 0}
+
+    purge = check + ALERT_RETENTION + timedelta(hours=1)
+    assert service.apply_alert_retention(purge) == {"resolved": 1, "purged": 1}
+    assert [alert["driver_id"] for alert in store.get_alerts()] == ["d2"]
+
+def test_default_lifecycle_methods_work_on_custom_stores():
+    store = ListAlertStore()
+    service = ELDService(data_store=store)
+    service.record_alerts([violation_alert(NOW), violation_alert(NOW, driver_id="d2")])
+
+    purge = NOW + ALERT_RESOLVE_AFTER + ALERT_RETENTION + timedelta(days=1)
+    assert service.apply_alert_retention(NOW + ALERT_RESOLVE_AFTER + timedelta(hours=1))["resolved"] == 2
+    assert service.apply_alert_retention(purge) == {"resolved": 0, "purged": 2}
+    assert store.get_alerts() == []
@@ -0,0 +1,49 @@
+"""Alert pages and the live event publisher"""
+
+from datetime import datetime, timedelta
+
+from rapid_eld import ELDDataStore, ELDEventPublisher, EventSubscription
+
+NOW = datetime(2026, 10, 1, 12)
+
+def alert(driver_id, created_at):
+    return {"driver_id": driver_id, "type": "HOS Violation", "severity": "high",
+            "title": "t", "message": "m", "created_at": created_at}
+
+def all_pages(store, limit, **filters):
+    alerts, after = [], None
+    while True:
+        page, after = store.get_alerts_page(after=after, limit=limit, **filters)
+        alerts.extend(page)
+        if after is None:
+            return alerts
+
+def test_alert_pages_follow_created_at_order(store):
+    # Stored out of created_at order, with ties
+    offsets = [5, 1, 3, 1, 0, 4, 2, 5]
+    store.store_alerts([alert(f"d{i % 2}", NOW + timedelta(minutes=offset))
+                        for i, offset in enumerate(offsets)])
+    expected, _ = ELDDataStore.get_alerts_page(store, limit=len(offsets))
+    for limit in (1, 3, len(offsets)):
+        assert [a['id'] for a in all_pages(store, limit)] == [a['id'] for a in expected]
+    assert [a['driver_id'] for a in all_pages(store, 2, driver_id="d1")] == ["d1"] * 4
+    store.delete_alerts([expected[0]['id'], expected[3]['id']])
+    assert [a['id'] for a in all_pages(store, 2)] == [a['id'] for i, a in enumerate(expected)
+                                                      if i not in (0, 3)]
+
+def test_publisher_sends_each_new_alert_once(store):
+    store.store_alerts([alert("d1", NOW)])
+    publisher = ELDEventPublisher(store)
+    # Added directly, so no background poll thread races the polls below
+    subscription = EventSubscription()
+    publisher._subscribers.append(subscription)
+    publisher.poll()   # starts after the stored alerts
+    store.store_alerts([alert("d1", NOW + timedelta(minutes=1)), alert("d2", NOW + timedelta(minutes=2))])
+    publisher.poll()
+    publisher.poll()
+    messages = []
+    while not subscription.queue.empty():
+        messages.append(subscription.queue.get_nowait())
+    alerts = [message for message in messages if "event: alert" in message]
+    assert len(alerts) == 2
+    assert '"d1"' in alerts[0] and '"d2"' in alerts[1]
@@ -0,0 +1,51 @@
+"""GetFeed sync of HOS logs and DVIRs: feed-token resume and paging"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("requests")
+
+from geotab_client import GeotabClient
+from geotab_simulator import start_geotab_stand_in
+from rapid_eld import ELDService, InMemoryELDDataStore
+
+# The first sync reads HOS_LOOKBACK back from the real clock
+START = datetime.utcnow().replace(second=0, microsecond=0)
+
+@pytest.fixture
+def stand_in():
+    with start_geotab_stand_in(drivers=10, seed=7, start=START, acceleration=0) as server:
+        yield server
+
+def service_for(server, store):
+    return ELDService(data_store=store,
+                      geotab_client=GeotabClient("db", "user", "password", server=server.url))
+
+def test_sync_resumes_from_the_stored_feed_tokens(stand_in, store):
+    service = service_for(stand_in, store)
+    first = service.sync_eld_data(results_limit=100)
+    assert len(first["DutyStatusLog"]) > 100   # more than one page
+    assert store.get_feed_version("DutyStatusLog") is not None
+    assert len(store.get_hos_logs()) == len({log["source_id"] for log in first["DutyStatusLog"]})
+
+    again = service.sync_eld_data(results_limit=100)
+    assert again["DutyStatusLog"] == [] and again["DVIRLog"] == []
+
+    stand_in.simulator.advance(timedelta(hours=12))
+    # A new service (e.g. another worker) resumes from the tokens in the store
+    later = service_for(stand_in, store).sync_eld_data(results_limit=100)
+    assert later["DutyStatusLog"]
+    logs = store.get_hos_logs()
+    assert len(logs) == len({log["source_id"] for log in logs})
+    assert {log["source_id"] for log in later["DutyStatusLog"]} <= {log["source_id"] for log in logs}
+
+def test_page_size_does_not_change_what_is_stored(stand_in):
+    paged, whole = InMemoryELDDataStore(), InMemoryELDDataStore()
+    service_for(stand_in, paged).sync_eld_data(results_limit=25)
+    service_for(stand_in, whole).sync_eld_data()
+    key = lambda log: log["source_id"]
+    assert sorted(map(key, paged.get_hos_logs())) == sorted(map(key, whole.get_hos_logs()))
+    assert sorted(map(key, paged.get_dvir_reports())) == sorted(map(key, whole.get_dvir_reports()))
+    # The HOS states track every ingested driver
+    assert set(paged.get_hos_states()) == {log["driver_id"] for log in whole.get_hos_logs()}
@@ -0,0 +1,134 @@
+"""Fleet compliance rollups and the dashboard endpoints"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from fleet_rollups import (
+    ROLLUP_DRIVER_STATUS, ROLLUP_VEHICLE_DEFECTS, ROLLUP_VIOLATIONS_DAILY, vehicle_defect_updates,
+)
+from rapid_eld import ELDService, InMemoryELDDataStore
+
+NOW = datetime(2026, 10, 1, 12)
+
+def at(hours):
+    return NOW + timedelta(hours=hours)
+
+def dvir(source_id, vehicle_id, hours, defects, version="1"):
+    return {"source_id": source_id, "source_version": version, "driver_id": "d1",
+            "vehicle_id": vehicle_id, "inspection_type": "pre_trip", "inspection_date": at(hours),
+            "defects": defects, "is_safe_to_drive": not defects}
+
+def ingest_logs(service, logs):
+    service.data_store.store_hos_logs(logs)
+    service.track_hos_ingest(logs)
+
+def ingest_dvirs(service, reports):
+    service.data_store.store_dvir_reports(reports)
+    service.track_dvir_ingest(reports)
+
+def fleet(service):
+    ingest_logs(service, [
+        {"driver_id": "d1", "log_type": "off_duty", "start_time": at(-24)},
+        {"driver_id": "d1", "log_type": "driving", "start_time": at(-10.5)},
+        {"driver_id": "d2", "log_type": "off_duty", "start_time": at(-24)},
+        {"driver_id": "d2", "log_type": "driving", "start_time": at(-2)},
+    ])
+    ingest_dvirs(service, [dvir("a", "v1", -5, ["Flat tire", "Lights"]), dvir("b", "v2", -5, [])])
+
+def test_latest_inspection_wins():
+    entries = vehicle_defect_updates({}, [dvir("a", "v1", -5, ["Brakes"])])
+    assert vehicle_defect_updates(entries, [dvir("c", "v1", -9, [])]) == {}
+    assert vehicle_defect_updates(entries, [dvir("c", "v1", -1, [])])["v1"]["defectCount"] == 0
+    # A new version of the same report replaces it even if its time moves back
+    assert vehicle_defect_updates(entries, [dvir("a", "v1", -6, [], "2")])["v1"]["defectCount"] == 0
+
+def test_checks_keep_the_rollups_current(store):
+    service = ELDService(data_store=store)
+    fleet(service)
+    service.check_hos_violations(now=NOW)
+
+    statuses = {status["driverId"]: status for status in service.evaluate_hos(now=NOW)["statuses"]}
+    drivers = store.get_rollups(ROLLUP_DRIVER_STATUS)
+    assert {driver_id: {key: value for key, value in entry.items() if key != "asOf"}
+            for driver_id, entry in drivers.items()} == statuses
+    assert [entry["driverId"] for entry in service.get_drivers_near_limit(1)] == ["d1"]
+    assert [(entry["vehicleId"], entry["defectCount"]) for entry in service.get_open_dvir_defects()] == [("v1", 2)]
+
+    day = service.get_violations_per_day(2, NOW)
+    assert [entry["total"] for entry in day] == [0, 1]
+    assert day[-1]["byRule"] == {"break_30_minute": 1}
+
+    overview = service.get_fleet_overview(7, NOW)
+    assert overview["driversNearLimit"] == 1
+    assert overview["openDefects"] == 2
+    assert overview["violationsToday"] == 1
+
+def test_repeated_violations_are_counted_once(store):
+    service = ELDService(data_store=store)
+    fleet(service)
+    service.check_hos_violations(now=NOW)
+    service.check_hos_violations(now=NOW, incremental=False)
+    assert store.get_rollups(ROLLUP_VIOLATIONS_DAILY)[NOW.date().isoformat()]["total"] == 1
+
+def test_incremental_check_writes_only_the_statuses_it_computed(store):
+    service = ELDService(data_store=store)
+    fleet(service)
+    service.check_hos_violations(now=NOW)
+
+    reads = []
+    get_hos_states = store.get_hos_states
+    store.get_hos_states = lambda driver_ids=None: reads.append(driver_ids) or get_hos_states(driver_ids)
+    service.check_hos_violations(now=at(1))
+    # plan_hos_check reads the states once; the rollup comes from the check itself
+    assert reads == [None]
+    assert {entry["asOf"] for entry in store.get_rollups(ROLLUP_DRIVER_STATUS).values()} == {at(1).isoformat()}
+
+def test_rebuild_reproduces_the_maintained_rollups(store):
+    service = ELDService(data_store=store)
+    fleet(service)
+    service.check_hos_violations(now=NOW, incremental=False)
+    maintained = {rollup: store.get_rollups(rollup)
+                  for rollup in (ROLLUP_DRIVER_STATUS, ROLLUP_VEHICLE_DEFECTS, ROLLUP_VIOLATIONS_DAILY)}
+
+    for rollup in maintained:
+        store.store_rollups(rollup, {}, replace=True)
+    service.rebuild_fleet_rollups(NOW)
+
+    assert {rollup: store.get_rollups(rollup) for rollup in maintained} == maintained
+
+def test_window_fetch_updates_vehicle_defects():
+    pytest.importorskip("requests")
+    from geotab_client import GeotabClient
+    from geotab_simulator import start_geotab_stand_in
+
+    start = datetime.utcnow().replace(second=0, microsecond=0)
+    with start_geotab_stand_in(drivers=20, seed=5, start=start, acceleration=0,
+                               defect_rate=0.5) as server:
+        service = ELDService(data_store=InMemoryELDDataStore(),
+                             geotab_client=GeotabClient("db", "user", "password", server=server.url))
+        reports = service.fetch_dvir_reports(start - timedelta(days=2), start)
+
+    assert reports
+    vehicles = service.data_store.get_rollups(ROLLUP_VEHICLE_DEFECTS)
+    assert set(vehicles) == {report["vehicle_id"] for report in reports}
+    assert service.get_open_dvir_defects()
+
+def test_dashboard_endpoints():
+    flask = pytest.importorskip("flask")
+    import rapid_eld
+
+    store = InMemoryELDDataStore()
+    service = ELDService(data_store=store)
+    fleet(service)
+    service.check_hos_violations(now=NOW)
+    rapid_eld.set_data_store(store)
+    app = flask.Flask(__name__)
+    app.register_blueprint(rapid_eld.eld_blueprint)
+    client = app.test_client()
+
+    assert client.get('/api/eld/fleet/overview').json["openDefects"] == 2
+    assert client.get('/api/eld/fleet/dvir-defects').json[0]["vehicleId"] == "v1"
+    assert [entry["driverId"] for entry in client.get('/api/eld/fleet/drivers-near-limit?hours=24').json] == ["d1", "d2"]
+    assert len(client.get('/api/eld/fleet/violations-per-day?days=3').json) == 3
+    assert client.get('/api/eld/fleet/violations-per-day?days=0').status_code == 400
@@ -0,0 +1,57 @@
+"""Python and NumPy HOS engines give the same results"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+import hos_rules
+from hos_rules import HOS_CYCLE_60_7, HOS_CYCLE_70_8, evaluate_hos, to_epoch_seconds
+
+pytest.importorskip("numpy")
+
+NOW = datetime(2026, 10, 1, 12)
+LOG_TYPES = ['off_duty', 'sleeper_berth', 'driving', 'on_duty', 'yard_move']
+
+def random_columns(seed, drivers=30):
+    rng = random.Random(seed)
+    driver_ids, codes, statuses, starts = [], [], [], []
+    for code in range(drivers):
+        driver_ids.append(f"d{code}")
+        t = NOW - timedelta(days=rng.randint(1, 10))
+        while t <= NOW:
+            codes.append(code)
+            statuses.append(hos_rules.status_code(rng.choice(LOG_TYPES)))
+            starts.append(to_epoch_seconds(t))
+            # Short and long segments, and occasional duplicate start times
+            t += timedelta(minutes=rng.choice([0, 15, 30, 90, 240, 600]))
+    # Rows may arrive in any order
+    rows = list(zip(codes, statuses, starts))
+    rng.shuffle(rows)
+    codes, statuses, starts = (list(column) for column in zip(*rows))
+    return driver_ids, codes, statuses, starts
+
+def sorted_result(result):
+    return (sorted(result["statuses"], key=lambda status: status["driverId"]),
+            sorted(result["violations"], key=lambda v: (v["occurred_at"], v["driver_id"], v["rule"])))
+
+@pytest.mark.parametrize("cycle", [HOS_CYCLE_70_8, HOS_CYCLE_60_7])
+@pytest.mark.parametrize("seed", range(10))
+def test_numpy_engine_matches_python(seed, cycle):
+    driver_ids, codes, statuses, starts = random_columns(seed)
+    now = to_epoch_seconds(NOW)
+    numpy_result = hos_rules._evaluate_numpy(driver_ids, hos_rules.np.asarray(codes, dtype=hos_rules.np.int64),
+                                             hos_rules.np.asarray(statuses, dtype=hos_rules.np.int16),
+                                             hos_rules.np.asarray(starts, dtype=hos_rules.np.float64),
+                                             now, cycle)
+    python_result = hos_rules._evaluate_python(driver_ids, codes, statuses, starts, now, cycle)
+    assert sorted_result(numpy_result) == sorted_result(python_result)
+
+def test_evaluate_hos_without_numpy(monkeypatch):
+    logs = [{"driver_id": "d1", "log_type": "off_duty", "start_time": NOW - timedelta(hours=20)},
+            {"driver_id": "d1", "log_type": "driving", "start_time": NOW - timedelta(hours=10)},
+            {"driver_id": "d2", "log_type": "on_duty", "start_time": NOW - timedelta(hours=3)}]
+    with_numpy = evaluate_hos(logs, now=NOW)
+    monkeypatch.setattr(hos_rules, "NUMPY_AVAILABLE", False)
+    assert evaluate_hos(logs, now=NOW) == with_numpy
+    assert [v["rule"] for v in with_numpy["violations"]] == ["break_30_minute"]
@@ -0,0 +1,135 @@
+"""Incremental violation checks against a full evaluation of the same logs"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from hos_rules import DriverHOSState, to_epoch_seconds
+from rapid_eld import ELDService, InMemoryELDDataStore
+
+DAY = datetime(2026, 10, 1)
+
+def at(hours):
+    return DAY + timedelta(hours=hours)
+
+def found(violations):
+    return [(violation['rule'], violation['occurred_at']) for violation in violations]
+
+@pytest.fixture
+def service():
+    return ELDService(data_store=InMemoryELDDataStore())
+
+def ingest(service, logs):
+    service.ingest_hos_logs(logs)
+
+def log(driver_id, log_type, hours, **fields):
+    return {"driver_id": driver_id, "log_type": log_type, "start_time": at(hours), **fields}
+
+def incremental_statuses(service, now):
+    now_s = to_epoch_seconds(now)
+    return {driver_id: DriverHOSState.from_dict(state).status(now_s)
+            for driver_id, state in service.data_store.get_hos_states().items()}
+
+def full_statuses(service, now):
+    return {status['driverId']: status for status in service.evaluate_hos(now=now)["statuses"]}
+
+def test_logs_closing_a_probed_segment_early_replace_its_violations(service):
+    ingest(service, [log("d1", "driving", 0)])
+    assert found(service.check_hos_violations(now=at(12))) == [
+        ("break_30_minute", at(8)), ("driving_11_hour", at(11))]
+
+    # The open driving segment actually ended at 06:00
+    ingest(service, [log("d1", "on_duty", 6), log("d1", "driving", 7), log("d1", "off_duty", 13)])
+    violations = service.check_hos_violations(now=at(14))
+
+    assert found(violations) == [("driving_11_hour", at(12))]
+    assert found(violations) == found(service.evaluate_hos(now=at(14))["violations"])
+
+def test_closing_a_probed_segment_does_not_repeat_its_violations(service):
+    ingest(service, [log("d1", "off_duty", -12), log("d1", "driving", 0)])
+    assert found(service.check_hos_violations(now=at(12))) == [
+        ("break_30_minute", at(8)), ("driving_11_hour", at(11))]
+
+    ingest(service, [log("d1", "off_duty", 13)])
+    assert service.check_hos_violations(now=at(14)) == []
+    assert service.check_hos_violations(now=at(30)) == []
+
+def test_late_log_recomputes_from_its_time(service):
+    ingest(service, [log("d1", "off_duty", -12), log("d1", "driving", 0),
+                     log("d1", "off_duty", 7), log("d1", "on_duty", 9)])
+    assert service.check_hos_violations(now=at(10)) == []
+
+    # A driving log before the watermark shortens the 07:00 break to 15 minutes
+    ingest(service, [log("d1", "driving", 7.25)])
+    now = at(10)
+    violations = service.check_hos_violations(now=now)
+
+    assert found(violations) == [("break_30_minute", at(8.25))]
+    assert found(violations) == found(service.evaluate_hos(now=now)["violations"])
+    assert incremental_statuses(service, now) == full_statuses(service, now)
+
+def test_edited_log_recomputes_the_driver(service):
+    ingest(service, [log("d1", "off_duty", -12, source_id="a", source_version="1"),
+                     log("d1", "driving", 0, source_id="b", source_version="1"),
+                     log("d1", "off_duty", 6, source_id="c", source_version="1")])
+    assert service.check_hos_violations(now=at(7)) == []
+
+    # The 06:00 off-duty log is edited to driving
+    ingest(service, [log("d1", "driving", 6, source_id="c", source_version="2")])
+    now = at(12)
+    violations = service.check_hos_violations(now=now)
+
+    assert found(violations) == found(service.evaluate_hos(now=now)["violations"])
+    assert incremental_statuses(service, now) == full_statuses(service, now)
+
+def test_redelivered_logs_do_not_schedule_recomputes(store):
+    service = ELDService(data_store=store)
+    logs = [log("d1", "off_duty", -12, source_id="a", source_version="0000000000000001",
+                is_edited=True),
+            log("d1", "driving", 0, source_id="b", source_version="0000000000000001")]
+    ingest(service, logs)
+    service.check_hos_violations(now=at(1))
+
+    # Re-fetching the same window stores nothing new
+    assert service.ingest_hos_logs([dict(entry) for entry in logs]) == 0
+    state = store.get_hos_states(["d1"])["d1"]
+    assert state.get('recompute_from') is None and not state.get('pending')
+
+def test_logs_stored_without_tracking_are_checked(store):
+    service = ELDService(data_store=store)
+    store.store_hos_logs([log("d1", "off_duty", -12), log("d1", "driving", 0),
+                          log("d2", "driving", 1)])
+    store.store_hos_log(log("d3", "driving", 2))
+    now = at(14)
+    violations = service.check_hos_violations(now=now)
+
+    assert found(violations) == found(service.evaluate_hos(now=now)["violations"])
+    assert {violation['driver_id'] for violation in violations} == {"d1", "d2", "d3"}
+    assert set(store.get_hos_states()) == {"d1", "d2", "d3"}
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_schedules_match_a_full_evaluation(service, seed):
+    rng = random.Random(seed)
+    log_types = ["driving", "driving", "on_duty", "off_duty", "sleeper_berth"]
+    logs, hours = [], -40.0
+    for driver in range(3):
+        hours = -40.0
+        for _ in range(rng.randint(5, 40)):
+            logs.append(log(f"d{driver}", rng.choice(log_types), hours))
+            hours += rng.choice([0.25, 0.5, 1, 2, 3, 5, 8, 11])
+    logs.sort(key=lambda entry: entry["start_time"])
+
+    reported = set()
+    checks = sorted(rng.sample(range(len(logs)), min(len(logs), 8)))
+    delivered = 0
+    for check in checks + [len(logs)]:
+        batch = logs[delivered:check]
+        delivered = check
+        if batch:
+            ingest(service, batch)
+        now = max(entry["start_time"] for entry in logs[:max(delivered, 1)]) + timedelta(minutes=1)
+        reported |= set(found(service.check_hos_violations(now=now)))
+
+    assert set(found(service.evaluate_hos(now=now)["violations"])) <= reported
+    assert incremental_statuses(service, now) == full_statuses(service, now)
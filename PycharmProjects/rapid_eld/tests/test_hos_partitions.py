@@ -0,0 +1,95 @@
+"""Monthly HOS log partitions: routing, retention and cold archives"""
+
+import gzip
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+import rapid_eld
+from hos_partitions import add_months, expired_months, partition_month, partition_name, retention_cutoff
+from rapid_eld import ELDService
+from sqlite_store import SQLiteELDDataStore
+
+def hos_log(source_id, start_time, version="1", driver_id="d1"):
+    return {"driver_id": driver_id, "log_type": "driving", "start_time": start_time,
+            "source_id": source_id, "source_version": version}
+
+# Two logs in each month from June through October 2026
+LOGS = [hos_log(f"s{month}-{day}", datetime(2026, month, day, 8))
+        for month in range(6, 11) for day in (1, 28)]
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteELDDataStore(str(tmp_path / "eld.db"), partitioned=True)
+    store.store_hos_logs(LOGS)
+    yield store
+    store.conn.close()
+
+def read_archive(path):
+    with gzip.open(path, 'rt') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def test_month_helpers():
+    assert add_months(datetime(2026, 11, 1), 3) == datetime(2027, 2, 1)
+    assert add_months(datetime(2026, 1, 1), -1) == datetime(2025, 12, 1)
+    assert partition_name("eld_hos_logs", datetime(2026, 10, 1)) == "eld_hos_logs_p202610"
+    assert partition_month("eld_hos_logs", "eld_hos_logs_p202610") == datetime(2026, 10, 1)
+    assert partition_month("eld_hos_logs", "eld_dvir_reports") is None
+    assert retention_cutoff(datetime(2026, 10, 17), 2) == datetime(2026, 8, 1)
+    months = [datetime(2026, month, 1) for month in (9, 7, 8)]
+    assert expired_months(months, datetime(2026, 9, 1)) == [datetime(2026, 7, 1), datetime(2026, 8, 1)]
+
+def test_range_queries_span_partitions(store):
+    logs = store.get_hos_logs(start_date=datetime(2026, 7, 15), end_date=datetime(2026, 9, 2))
+    assert sorted(log['source_id'] for log in logs) == ["s7-28", "s8-1", "s8-28", "s9-1"]
+    assert len(store.get_hos_logs()) == len(LOGS)
+
+def test_a_log_moved_to_another_month_is_stored_once(store):
+    store.store_hos_logs([hos_log("s6-1", datetime(2026, 10, 5), version="2")])
+    logs = [log for log in store.get_hos_logs() if log['source_id'] == "s6-1"]
+    assert len(logs) == 1
+    assert logs[0]['start_time'] == datetime(2026, 10, 5)
+    assert len(store.get_hos_logs()) == len(LOGS)
+
+def test_archive_exports_then_drops_expired_months(store, tmp_path):
+    archive_dir = str(tmp_path / "archive")
+    archived = store.archive_hos_partitions(datetime(2026, 8, 1), archive_dir)
+    assert [(summary['month'], summary['rows']) for summary in archived] == [("2026-06", 2), ("2026-07", 2)]
+    for summary in archived:
+        rows = read_archive(summary['path'])
+        assert len(rows) == 2
+        assert all(row['start_time'].startswith(summary['month']) for row in rows)
+    assert sorted(os.listdir(archive_dir)) == ["eld_hos_logs_p202606.ndjson.gz",
+                                               "eld_hos_logs_p202607.ndjson.gz"]
+    remaining = store.get_hos_logs()
+    assert len(remaining) == len(LOGS) - 4
+    assert min(log['start_time'] for log in remaining) == datetime(2026, 8, 1, 8)
+    # Nothing left to archive; a late log for an archived month gets a new partition
+    assert store.archive_hos_partitions(datetime(2026, 8, 1), archive_dir) == []
+    store.store_hos_logs([hos_log("late", datetime(2026, 6, 15))])
+    again, = store.archive_hos_partitions(datetime(2026, 8, 1), archive_dir)
+    assert again['path'].endswith("eld_hos_logs_p202606.1.ndjson.gz")
+    assert [row['source_id'] for row in read_archive(again['path'])] == ["late"]
+
+def test_partitioned_store_survives_a_reopen(store, tmp_path):
+    store.archive_hos_partitions(datetime(2026, 7, 1), str(tmp_path / "archive"))
+    reopened = SQLiteELDDataStore(str(tmp_path / "eld.db"), partitioned=True)
+    assert len(reopened.get_hos_logs()) == len(LOGS) - 2
+    reopened.store_hos_logs([hos_log("new", datetime(2026, 11, 2))])
+    assert len(reopened.get_hos_logs(start_date=datetime(2026, 11, 1))) == 1
+    reopened.conn.close()
+
+def test_service_retention(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(rapid_eld, "HOS_ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(rapid_eld, "HOS_RETENTION_MONTHS", 2)
+    archived = ELDService(data_store=store).apply_hos_retention(now=datetime(2026, 10, 17))
+    assert [summary['month'] for summary in archived] == ["2026-06", "2026-07"]
+    # Unpartitioned stores keep every log
+    unpartitioned = SQLiteELDDataStore(str(tmp_path / "flat.db"))
+    unpartitioned.store_hos_logs(LOGS)
+    assert ELDService(data_store=unpartitioned).apply_hos_retention(now=datetime(2026, 10, 17)) == []
+    assert len(unpartitioned.get_hos_logs()) == len(LOGS)
+    unpartitioned.conn.close()
+    assert ELDService(data_store=rapid_eld.InMemoryELDDataStore()).apply_hos_retention() == []
@@ -0,0 +1,96 @@
+"""Multi-database ingestion: feed-token resume and write failures"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from eld_ingest import GeotabDatabaseConfig, run_ingest
+from geotab_simulator import start_geotab_stand_in
+from rapid_eld import InMemoryELDDataStore
+
+# The first sync reads HOS_LOOKBACK back from the real clock
+START = datetime.utcnow().replace(second=0, microsecond=0)
+
+@pytest.fixture
+def stand_in():
+    with start_geotab_stand_in(drivers=10, seed=3, start=START, acceleration=0) as server:
+        yield server
+
+def config(server, store, database="db0"):
+    return GeotabDatabaseConfig(database, "user", "password", server=server.url, data_store=store)
+
+class FailingDVIRStore(InMemoryELDDataStore):
+    """Fails the DVIR page write after `pages` successful ones"""
+
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+
+    def store_dvir_reports(self, reports):
+        if self.pages == 0:
+            raise RuntimeError("disk full")
+        self.pages -= 1
+        return super().store_dvir_reports(reports)
+
+class BrokenVersionStore(InMemoryELDDataStore):
+    def get_feed_version(self, type_name):
+        raise RuntimeError("store offline")
+
+def test_second_sync_resumes_from_the_stored_feed_tokens(stand_in):
+    store = InMemoryELDDataStore()
+    first, = run_ingest([config(stand_in, store)])
+    assert first["error"] is None
+    assert first["records"]["DutyStatusLog"] > 0
+
+    again, = run_ingest([config(stand_in, store)])
+    assert again["records"]["DutyStatusLog"] == 0
+    assert again["records"]["DVIRLog"] == 0
+
+    stand_in.simulator.advance(timedelta(hours=12))
+    later, = run_ingest([config(stand_in, store)])
+    assert later["records"]["DutyStatusLog"] > 0
+    logs = store.get_hos_logs()
+    assert len(logs) == len({log["source_id"] for log in logs})
+
+def test_failed_page_write_stops_the_database_at_the_last_stored_page(stand_in):
+    store = FailingDVIRStore(pages=1)
+    report, = run_ingest([config(stand_in, store)], results_limit=50)
+
+    assert "disk full" in report["error"]
+    stored = len(store.get_dvir_reports())
+    assert report["records"]["DVIRLog"] == stored == 50
+
+    # The next sync picks up the page that failed
+    store.pages = -1
+    rest, = run_ingest([config(stand_in, store)], results_limit=50)
+    assert rest["error"] is None
+    complete = InMemoryELDDataStore()
+    run_ingest([config(stand_in, complete)])
+    assert len(store.get_dvir_reports()) == len(complete.get_dvir_reports()) > stored
+
+def test_store_error_in_one_database_does_not_stop_the_others(stand_in):
+    healthy = InMemoryELDDataStore()
+    broken, ok = run_ingest([config(stand_in, BrokenVersionStore(), "db0"),
+                             config(stand_in, healthy, "db1")])
+
+    assert "store offline" in broken["error"]
+    assert ok["error"] is None
+    assert len(healthy.get_hos_logs()) > 0
+
+def test_databases_sharing_a_store_keep_their_drivers_apart(stand_in):
+    store = InMemoryELDDataStore()
+    reports = run_ingest([config(stand_in, store, "db0"), config(stand_in, store, "db1")])
+    assert [report["error"] for report in reports] == [None, None]
+
+    # Both databases report the same Geotab ids
+    drivers = {log["driver_id"] for log in store.get_hos_logs()}
+    by_database = {database: {driver.split(":", 1)[1] for driver in drivers
+                              if driver.startswith(f"{database}:")}
+                   for database in ("db0", "db1")}
+    assert by_database["db0"] and by_database["db0"] == by_database["db1"]
+    assert len(drivers) == 2 * len(by_database["db0"])
+    for report in store.get_dvir_reports():
+        assert report["driver_id"].split(":")[0] == report["vehicle_id"].split(":")[0] \
+            == report["source_id"].split(":")[0]
@@ -0,0 +1,105 @@
+"""Keyset paging of HOS logs, DVIRs and alerts"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import rapid_eld
+from rapid_eld import InMemoryELDDataStore, decode_page_key, encode_page_key
+from sqlite_store import SQLiteELDDataStore
+
+NOW = datetime(2026, 10, 1, 12)
+
+def at(minutes):
+    return NOW + timedelta(minutes=minutes)
+
+# Stored out of time order, with several records per timestamp
+MINUTES = [30, 0, 10, 10, 50, 0, 20, 10, 40, 30, 5]
+
+def fill(store):
+    store.store_hos_logs([{"driver_id": f"d{i % 2}", "log_type": "driving", "start_time": at(m),
+                           "source_id": f"s{i}", "source_version": "1"}
+                          for i, m in enumerate(MINUTES)])
+    store.store_dvir_reports([{"driver_id": f"d{i % 2}", "vehicle_id": f"v{i % 3}",
+                               "inspection_type": "pre_trip", "inspection_date": at(m),
+                               "defects": [], "is_safe_to_drive": True, "source_id": f"r{i}",
+                               "source_version": "1"} for i, m in enumerate(MINUTES)])
+    store.store_alerts([{"driver_id": f"d{i % 2}", "type": "HOS Violation", "severity": "high",
+                         "title": "t", "message": "m", "created_at": at(m)}
+                        for i, m in enumerate(MINUTES)])
+
+def walk(get_page, limit, **filters):
+    """Every record, one page at a time; also checks no page is empty but the only one"""
+    records, after, pages = [], None, 0
+    while True:
+        page, after = get_page(after=after, limit=limit, **filters)
+        pages += 1
+        assert len(page) <= limit
+        assert page or pages == 1
+        records.extend(page)
+        if after is None:
+            return records
+
+def times(records, field):
+    return [rapid_eld.to_utc_datetime(record[field]) for record in records]
+
+@pytest.mark.parametrize("limit", [1, 3, 4, 100])
+def test_pages_cover_every_record_once_in_order(store, limit):
+    fill(store)
+    for get_page, field, key in ((store.get_hos_logs_page, 'start_time', 'source_id'),
+                                 (store.get_dvir_reports_page, 'inspection_date', 'source_id'),
+                                 (store.get_alerts_page, 'created_at', 'id')):
+        records = walk(get_page, limit)
+        assert len(records) == len(MINUTES)
+        assert len({record[key] for record in records}) == len(MINUTES)
+        assert times(records, field) == sorted(at(m) for m in MINUTES)
+
+def test_filtered_pages(store):
+    fill(store)
+    logs = walk(store.get_hos_logs_page, 2, driver_id="d1", start_date=at(10), end_date=at(30))
+    expected = sorted(at(m) for i, m in enumerate(MINUTES) if i % 2 == 1 and 10 <= m <= 30)
+    assert times(logs, 'start_time') == expected
+    reports = walk(store.get_dvir_reports_page, 2, vehicle_id="v0")
+    assert {report['vehicle_id'] for report in reports} == {"v0"}
+    assert len(reports) == len(MINUTES[::3])
+    alerts = walk(store.get_alerts_page, 2, driver_id="d0", alert_type="HOS Violation")
+    assert len(alerts) == len(MINUTES[::2])
+
+def test_records_stored_between_pages_are_not_skipped(store):
+    fill(store)
+    logs, after = store.get_hos_logs_page(limit=4)
+    store.store_hos_logs([{"driver_id": "d9", "log_type": "on_duty", "start_time": at(60),
+                           "source_id": "late", "source_version": "1"}])
+    while after is not None:
+        page, after = store.get_hos_logs_page(after=after, limit=4)
+        logs.extend(page)
+    assert len(logs) == len(MINUTES) + 1
+    assert logs[-1]['source_id'] == "late"
+
+def test_page_key_cursor_round_trip():
+    key = (at(5), 42)
+    assert decode_page_key(encode_page_key(key)) == key
+    with pytest.raises(ValueError):
+        decode_page_key("not a cursor")
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_paged_endpoints(kind, tmp_path, monkeypatch):
+    flask = pytest.importorskip("flask")
+    store = InMemoryELDDataStore() if kind == "memory" else SQLiteELDDataStore(str(tmp_path / "eld.db"))
+    fill(store)
+    monkeypatch.setattr(rapid_eld, "_data_store", store)
+    app = flask.Flask(__name__)
+    app.register_blueprint(rapid_eld.eld_blueprint)
+    client = app.test_client()
+    for path in ('/api/eld/hos-logs', '/api/eld/dvir-reports', '/api/eld/alerts'):
+        items, cursor = [], None
+        while True:
+            response = client.get(path, query_string={"limit": 3, **({"cursor": cursor} if cursor else {})})
+            assert response.status_code == 200
+            items.extend(response.json["items"])
+            cursor = response.json["next_cursor"]
+            if cursor is None:
+                break
+        assert len(items) == len(MINUTES)
+    assert client.get('/api/eld/hos-logs?limit=0').status_code == 400
+    assert client.get('/api/eld/hos-logs?cursor=garbage').status_code == 400
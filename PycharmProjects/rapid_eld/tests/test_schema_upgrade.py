@@ -0,0 +1,92 @@
+"""Upgrading ELD tables created by earlier versions of the Flask store"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+flask = pytest.importorskip("flask")
+flask_sqlalchemy = pytest.importorskip("flask_sqlalchemy")
+
+from sqlalchemy import inspect, text
+
+from eld_integration import Base, FlaskELDDataStore
+from rapid_eld import ALERT_COALESCE_WINDOW, ELDService
+
+NOW = datetime(2026, 10, 1, 12)
+
+# The tables as the first FlaskELDDataStore created them
+OLD_SCHEMA = (
+    """CREATE TABLE eld_hos_logs (
+        id INTEGER PRIMARY KEY, driver_id VARCHAR(50) NOT NULL, vehicle_id VARCHAR(50),
+        log_type VARCHAR(20) NOT NULL, start_time DATETIME NOT NULL, end_time DATETIME,
+        location VARCHAR(200), odometer_reading INTEGER, is_edited BOOLEAN, edit_reason TEXT,
+        created_at DATETIME, updated_at DATETIME)""",
+    """CREATE TABLE eld_dvir_reports (
+        id INTEGER PRIMARY KEY, driver_id VARCHAR(50) NOT NULL, vehicle_id VARCHAR(50) NOT NULL,
+        inspection_type VARCHAR(20) NOT NULL, inspection_date DATETIME NOT NULL, defects JSON,
+        is_safe_to_drive BOOLEAN NOT NULL, signature TEXT, created_at DATETIME,
+        updated_at DATETIME)""",
+    """CREATE TABLE eld_alerts (
+        id INTEGER PRIMARY KEY, driver_id VARCHAR(50) NOT NULL, alert_type VARCHAR(50) NOT NULL,
+        severity VARCHAR(20) NOT NULL, title VARCHAR(200) NOT NULL, message TEXT NOT NULL,
+        is_read BOOLEAN, is_resolved BOOLEAN, resolved_at DATETIME, resolved_by VARCHAR(50),
+        created_at DATETIME, updated_at DATETIME)""",
+    """INSERT INTO eld_hos_logs (driver_id, log_type, start_time)
+        VALUES ('d0', 'off_duty', '2026-09-30 00:00:00.000000')""",
+    """INSERT INTO eld_alerts (driver_id, alert_type, severity, title, message, created_at)
+        VALUES ('d0', 'HOS Violation', 'high', 't', 'm', '2026-09-30 00:00:00.000000')""",
+)
+
+@pytest.fixture
+def old_app(tmp_path):
+    app = flask.Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'old.db'}"
+    db = flask_sqlalchemy.SQLAlchemy(app)
+    with app.app_context():
+        with db.engine.begin() as conn:
+            for statement in OLD_SCHEMA:
+                conn.execute(text(statement))
+        yield db
+
+def hos_log(source_id, version, log_type="driving"):
+    return {"driver_id": "d1", "log_type": log_type, "start_time": NOW,
+            "source_id": source_id, "source_version": version}
+
+def test_upgrade_adds_upsert_columns_to_old_tables(old_app):
+    store = FlaskELDDataStore(old_app)
+    assert store.upgrade_schema()
+    assert store.upgrade_schema() == []
+    Base.metadata.create_all(old_app.engine)
+
+    columns = {column['name'] for column in inspect(old_app.engine).get_columns('eld_hos_logs')}
+    assert {'source_id', 'source_version'} <= columns
+    store.store_hos_logs([hos_log("s1", "1"), hos_log("s2", "1")])
+    store.store_hos_logs([hos_log("s1", "1"), hos_log("s2", "2", "on_duty")])
+    logs = store.get_hos_logs()
+    assert sorted(log['source_id'] or "" for log in logs) == ["", "s1", "s2"]
+    assert {log['source_id']: log['log_type'] for log in logs}["s2"] == "on_duty"
+
+    dvir = {"driver_id": "d1", "vehicle_id": "v1", "inspection_type": "pre_trip",
+            "inspection_date": NOW, "defects": [], "is_safe_to_drive": True,
+            "source_id": "r1", "source_version": "1"}
+    store.store_dvir_reports([dvir, dict(dvir)])
+    assert len(store.get_dvir_reports()) == 1
+    store.remove_session()
+
+def test_upgrade_adds_coalescing_columns_to_old_alerts(old_app):
+    store = FlaskELDDataStore(old_app)
+    store.upgrade_schema()
+
+    # Rows stored before the upgrade count one occurrence
+    old, = store.get_alerts()
+    assert old['occurrences'] == 1 and old['rule'] is None
+    service = ELDService(data_store=store)
+    alert = {"driver_id": "d1", "type": "HOS Violation", "severity": "high", "title": "t",
+             "message": "m", "rule": "driving_11_hour", "occurred_at": NOW, "created_at": NOW}
+    assert len(service.record_alerts([alert])) == 1
+    repeat = NOW + timedelta(seconds=ALERT_COALESCE_WINDOW / 2)
+    assert service.record_alerts([{**alert, "occurred_at": repeat, "created_at": repeat}]) == []
+    new, = store.get_alerts("d1")
+    assert new['occurrences'] == 2 and new['rule'] == "driving_11_hour"
+    assert new['first_seen'] is not None and new['last_seen'] is not None
+    store.remove_session()
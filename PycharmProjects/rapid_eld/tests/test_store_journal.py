@@ -0,0 +1,141 @@
+"""Journal and snapshot restarts of JournaledELDDataStore"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import store_journal
+from rapid_eld import IndexedInMemoryELDDataStore
+from store_journal import JOURNAL_FILE, JournaledELDDataStore
+
+NOW = datetime(2026, 10, 1, 12)
+
+def hos_log(i):
+    return {"driver_id": f"d{i % 3}", "log_type": "driving", "start_time": NOW + timedelta(minutes=i),
+            "source_id": f"s{i}", "source_version": "0000000000000001"}
+
+def alert(driver_id):
+    return {"driver_id": driver_id, "type": "HOS Violation", "severity": "high", "title": "t",
+            "message": "m", "created_at": NOW}
+
+def contents(store):
+    return {
+        "hos_logs": sorted(log['source_id'] for log in store.get_hos_logs()),
+        "alerts": sorted((alert['id'], alert.get('occurrences')) for alert in store.get_alerts()),
+        "states": store.get_hos_states(),
+        "rollups": store.get_rollups("driver_status"),
+        "feed": store.get_feed_version("db:DutyStatusLog"),
+    }
+
+def write_some(store, start, count=10):
+    store.store_hos_logs([hos_log(i) for i in range(start, start + count)])
+    store.store_alerts([alert(f"d{start}"), alert(f"d{start + 1}")])
+    store.store_hos_states({f"d{start}": {"at": start}})
+    store.store_rollups("driver_status", {f"d{start}": {"at": start}})
+    store.store_feed_version("db:DutyStatusLog", f"{start:016x}")
+
+def reopen(store, directory):
+    store.close()
+    return JournaledELDDataStore(directory, IndexedInMemoryELDDataStore())
+
+def test_restart_replays_journal(tmp_path):
+    directory = str(tmp_path)
+    store = JournaledELDDataStore(directory, IndexedInMemoryELDDataStore())
+    write_some(store, 0)
+    first = store.get_alerts()[0]['id']
+    store.update_alerts({first: {"occurrences": 4}})
+    store.delete_alerts([store.get_alerts()[1]['id']])
+    expected = contents(store)
+    store = reopen(store, directory)
+    assert contents(store) == expected
+    # Alert ids keep counting up after a restart
+    store.store_alert(alert("d9"))
+    assert max(a['id'] for a in store.get_alerts()) == 3
+
+def test_restart_from_snapshot_and_journal_tail(tmp_path):
+    directory = str(tmp_path)
+    store = JournaledELDDataStore(directory, IndexedInMemoryELDDataStore())
+    write_some(store, 0)
+    assert store.snapshot()
+    write_some(store, 10)
+    expected = contents(store)
+    store = reopen(store, directory)
+    assert contents(store) == expected
+    assert sorted(os.listdir(directory)) == [JOURNAL_FILE, store_journal.SNAPSHOT_FILE]
+
+def test_threshold_snapshots_keep_every_write(tmp_path):
+    directory = str(tmp_path)
+    store = JournaledELDDataStore(directory, IndexedInMemoryELDDataStore(), snapshot_bytes=2048)
+    for start in range(0, 200, 10):
+        write_some(store, start)
+    assert os.path.exists(os.path.join(directory, store_journal.SNAPSHOT_FILE))
+    expected = contents(store)
+    assert len(expected["hos_logs"]) == 200
+    store = reopen(store, directory)
+    assert contents(store) == expected
+
+def test_torn_journal_tail_is_truncated(tmp_path):
+    directory = str(tmp_path)
+    store = JournaledELDDataStore(directory, IndexedInMemoryELDDataStore())
+    write_some(store, 0)
+    expected = contents(store)
+    store.close()
+    with open(os.path.join(directory, JOURNAL_FILE), 'ab') as f:
+        f.write(b"\x40\x00\x00\x00\x01\x02")
+    store = JournaledELDDataStore(directory, IndexedInMemoryELDDataStore())
+    assert contents(store) == expected
+    write_some(store, 10)
+    expected = contents(store)
+    store = reopen(store, directory)
+    assert contents(store) == expected
+
+def test_interrupted_snapshot_keeps_the_rotated_journal(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    store = JournaledELDDataStore(directory, IndexedInMemoryELDDataStore())
+    write_some(store, 0)
+    assert store.snapshot()
+    write_some(store, 10)
+
+    def crash(fd):
+        raise OSError("disk full")
+    monkeypatch.setattr(store_journal.os, "fsync", crash)
+    with pytest.raises(OSError):
+        store.snapshot()
+    monkeypatch.undo()
+    # Writes after the rotation went to the new journal
+    write_some(store, 20)
+    expected = contents(store)
+    store = reopen(store, directory)
+    assert contents(store) == expected
+    # The next snapshot folds in and removes the rotated journal
+    assert store.snapshot()
+    assert sorted(os.listdir(directory)) == [JOURNAL_FILE, store_journal.SNAPSHOT_FILE]
+    store = reopen(store, directory)
+    assert contents(store) == expected
+
+def test_writes_go_on_while_a_snapshot_is_written(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    store = JournaledELDDataStore(directory, IndexedInMemoryELDDataStore())
+    write_some(store, 0)
+    writing, release = threading.Event(), threading.Event()
+    fsync = os.fsync
+
+    def slow_fsync(fd):
+        # Only the snapshot file is fsynced (the journal has fsync off)
+        writing.set()
+        release.wait(5)
+        fsync(fd)
+    monkeypatch.setattr(store_journal.os, "fsync", slow_fsync)
+    snapshot = threading.Thread(target=store.snapshot)
+    snapshot.start()
+    assert writing.wait(5)
+    write_some(store, 10)   # would deadlock if the snapshot held the write lock
+    assert not store.snapshot(wait=False)
+    release.set()
+    snapshot.join()
+    monkeypatch.undo()
+    expected = contents(store)
+    store = reopen(store, directory)
+    assert contents(store) == expected
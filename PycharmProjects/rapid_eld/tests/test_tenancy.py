@@ -0,0 +1,129 @@
+"""Per-company data store routing"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import eld_tenancy
+import rapid_eld
+from eld_tenancy import (
+    ELD_COMPANY_HEADER, TenantStoreRegistry, UnknownTenantError, company_scope, register_tenant_store,
+    set_tenant_store_factory,
+)
+from rapid_eld import ELDService, InMemoryELDDataStore, get_data_store
+
+NOW = datetime(2026, 10, 1, 12)
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    """A fresh tenant registry and process-wide store for each test"""
+    registry = TenantStoreRegistry()
+    monkeypatch.setattr(eld_tenancy, "_registry", registry)
+    monkeypatch.setattr(rapid_eld, "_data_store", InMemoryELDDataStore())
+    monkeypatch.setattr(rapid_eld, "_tenant_publishers", {})
+    return registry
+
+def driving_logs(driver_id):
+    return [{"driver_id": driver_id, "log_type": "off_duty", "start_time": NOW - timedelta(hours=24)},
+            {"driver_id": driver_id, "log_type": "driving", "start_time": NOW - timedelta(hours=9)}]
+
+def test_stores_follow_the_company_scope():
+    acme, globex = InMemoryELDDataStore(), InMemoryELDDataStore()
+    register_tenant_store("acme", acme)
+    register_tenant_store("globex", globex)
+    with company_scope("acme"):
+        assert get_data_store() is acme
+        with company_scope("globex"):
+            assert get_data_store() is globex
+        assert get_data_store() is acme
+        assert get_data_store("globex") is globex
+    # Outside a company the process-wide store serves
+    assert get_data_store() is rapid_eld._data_store
+    with company_scope("initech"), pytest.raises(UnknownTenantError):
+        get_data_store()
+
+def test_factory_creates_one_store_per_company(registry):
+    created = []
+
+    def factory(company_id):
+        if company_id == "unknown":
+            return None
+        created.append(company_id)
+        return InMemoryELDDataStore()
+    set_tenant_store_factory(factory)
+    with company_scope("acme"):
+        first = get_data_store()
+    assert get_data_store("acme") is first
+    assert get_data_store("globex") is not first
+    assert created == ["acme", "globex"]
+    with pytest.raises(UnknownTenantError):
+        get_data_store("unknown")
+    assert sorted(registry.companies()) == ["acme", "globex"]
+
+def test_services_and_checks_stay_within_their_company():
+    acme, globex = InMemoryELDDataStore(), InMemoryELDDataStore()
+    register_tenant_store("acme", acme)
+    register_tenant_store("globex", globex)
+    for company_id, driver_id in (("acme", "a1"), ("globex", "g1")):
+        with company_scope(company_id):
+            service = ELDService()
+            service.data_store.store_hos_logs(driving_logs(driver_id))
+            service.track_hos_ingest(driving_logs(driver_id))
+            service.check_hos_violations(now=NOW)
+    assert {alert['driver_id'] for alert in acme.get_alerts()} == {"a1"}
+    assert {alert['driver_id'] for alert in globex.get_alerts()} == {"g1"}
+    assert set(acme.get_hos_states()) == {"a1"}
+    assert rapid_eld._data_store.get_alerts() == []
+
+def test_requests_are_routed_by_header_or_argument():
+    flask = pytest.importorskip("flask")
+    acme, globex = InMemoryELDDataStore(), InMemoryELDDataStore()
+    register_tenant_store("acme", acme)
+    register_tenant_store("globex", globex)
+    acme.store_hos_logs(driving_logs("a1"))
+    globex.store_hos_logs(driving_logs("g1"))
+    app = flask.Flask(__name__)
+    app.register_blueprint(rapid_eld.eld_blueprint)
+    client = app.test_client()
+
+    def drivers(response):
+        assert response.status_code == 200
+        return {log['driver_id'] for log in response.json["items"]}
+    assert drivers(client.get('/api/eld/hos-logs', headers={ELD_COMPANY_HEADER: "acme"})) == {"a1"}
+    assert drivers(client.get('/api/eld/hos-logs?company_id=globex')) == {"g1"}
+    assert drivers(client.get('/api/eld/hos-logs')) == set()
+    response = client.get('/api/eld/hos-logs', headers={ELD_COMPANY_HEADER: "initech"})
+    assert response.status_code == 404
+    # The company context ends with the request
+    assert eld_tenancy.current_company_id() is None
+
+def test_flask_tenant_binds(tmp_path):
+    flask = pytest.importorskip("flask")
+    flask_sqlalchemy = pytest.importorskip("flask_sqlalchemy")
+    from eld_integration import Base, setup_flask_tenants
+    app = flask.Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'default.db'}"
+    app.config['SQLALCHEMY_BINDS'] = {company: f"sqlite:///{tmp_path / company}.db"
+                                      for company in ("acme", "globex")}
+    db = flask_sqlalchemy.SQLAlchemy(app)
+    with pytest.raises(ValueError):
+        setup_flask_tenants(app, db, {"acme": "acme", "globex": "acme"})
+    with app.app_context():
+        stores = setup_flask_tenants(app, db, {"acme": "acme", "globex": "globex"})
+        for bind_key in ("acme", "globex"):
+            Base.metadata.create_all(db.engines[bind_key])
+        stores["acme"].store_hos_logs(driving_logs("a1"))
+        with company_scope("globex"):
+            get_data_store().store_hos_logs(driving_logs("g1"))
+        assert {log['driver_id'] for log in stores["acme"].get_hos_logs()} == {"a1"}
+        assert {log['driver_id'] for log in stores["globex"].get_hos_logs()} == {"g1"}
+
+def test_event_publishers_are_per_company():
+    register_tenant_store("acme", InMemoryELDDataStore())
+    register_tenant_store("globex", InMemoryELDDataStore())
+    with company_scope("acme"):
+        acme = rapid_eld.get_event_publisher()
+        assert rapid_eld.get_event_publisher() is acme
+    with company_scope("globex"):
+        assert rapid_eld.get_event_publisher() is not acme
+    assert acme.data_store is get_data_store("acme")
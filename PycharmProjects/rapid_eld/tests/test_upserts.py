@@ -0,0 +1,110 @@
+"""Upserts by source_id, and batched upserts of HOS states, rollups and alert updates"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+NOW = datetime(2026, 10, 1, 12)
+
+def hos_log(source_id, version, hours=0, log_type="driving"):
+    return {"driver_id": "d1", "log_type": log_type, "start_time": NOW + timedelta(hours=hours),
+            "source_id": source_id, "source_version": version}
+
+def dvir(source_id, version, defects=()):
+    return {"driver_id": "d1", "vehicle_id": "v1", "inspection_type": "pre_trip",
+            "inspection_date": NOW, "defects": list(defects), "is_safe_to_drive": not defects,
+            "source_id": source_id, "source_version": version}
+
+def test_hos_log_upsert_is_idempotent(store):
+    logs = [hos_log(f"s{i}", "0000000000000001", hours=i) for i in range(3)]
+    store.store_hos_logs(logs)
+    store.store_hos_logs(logs)
+    store.store_hos_log(hos_log("s0", "0000000000000001", hours=0))
+    assert len(store.get_hos_logs()) == 3
+    # A new version replaces the stored log, even when its start time moves
+    store.store_hos_logs([hos_log("s1", "0000000000000002", hours=5, log_type="on_duty")])
+    logs = sorted(store.get_hos_logs(), key=lambda log: log['source_id'])
+    assert [log['source_id'] for log in logs] == ["s0", "s1", "s2"]
+    assert logs[1]['log_type'] == "on_duty"
+    assert logs[1]['source_version'] == "0000000000000002"
+    # Logs without a source_id are always appended
+    store.store_hos_logs([hos_log(None, None), hos_log(None, None)])
+    assert len(store.get_hos_logs()) == 5
+
+def test_odometer_readings_round_trip(store):
+    readings = [None, 0, 1234.5, 2 ** 31, 9_000_000_000]
+    store.store_hos_logs([{**hos_log(f"s{i}", "0000000000000001", hours=i), "odometer_reading": reading}
+                          for i, reading in enumerate(readings)])
+    logs = sorted(store.get_hos_logs(), key=lambda log: log['start_time'])
+    assert [log.get('odometer_reading') for log in logs] == readings
+
+def test_dvir_upsert_is_idempotent(store):
+    store.store_dvir_reports([dvir("r1", "0000000000000001"), dvir("r2", "0000000000000001")])
+    store.store_dvir_reports([dvir("r1", "0000000000000001")])
+    assert len(store.get_dvir_reports()) == 2
+    store.store_dvir_report(dvir("r1", "0000000000000002", defects=["brakes"]))
+    reports = {report['source_id']: report for report in store.get_dvir_reports()}
+    assert len(reports) == 2
+    assert reports["r1"]['defects'] == ["brakes"]
+    assert reports["r2"]['defects'] == []
+
+def state(hours):
+    return {"driverId": "x", "hours": hours}
+
+def test_hos_states_upsert(store):
+    assert store.store_hos_states({"d1": state(1), "d2": state(2)})
+    assert store.store_hos_states({"d2": state(3), "d3": state(4)})
+    assert store.get_hos_states() == {"d1": state(1), "d2": state(3), "d3": state(4)}
+    assert store.get_hos_states(["d2", "d9"]) == {"d2": state(3)}
+
+def test_rollups_upsert_and_replace(store):
+    assert store.store_rollups("r", {"a": {"n": 1}, "b": {"n": 2}})
+    assert store.store_rollups("other", {"a": {"n": 9}})
+    assert store.store_rollups("r", {"b": {"n": 3}, "c": {"n": 4}})
+    assert store.get_rollups("r") == {"a": {"n": 1}, "b": {"n": 3}, "c": {"n": 4}}
+    assert store.get_rollups("r", ["a", "c", "z"]) == {"a": {"n": 1}, "c": {"n": 4}}
+    assert store.store_rollups("r", {"d": {"n": 5}}, replace=True)
+    assert store.get_rollups("r") == {"d": {"n": 5}}
+    assert store.get_rollups("other") == {"a": {"n": 9}}
+
+def test_update_alerts(store):
+    alerts = [{"driver_id": f"d{i}", "type": "HOS Violation", "severity": "high", "title": "t",
+               "message": "m", "created_at": NOW} for i in range(5)]
+    store.store_alerts(alerts)
+    ids = sorted(alert['id'] for alert in store.get_alerts())
+    updated = store.update_alerts({ids[0]: {"occurrences": 3}, ids[1]: {"occurrences": 2},
+                                   ids[2]: {"resolved_at": NOW}})
+    assert updated == 3
+    by_id = {alert['id']: alert for alert in store.get_alerts()}
+    assert by_id[ids[0]]['occurrences'] == 3
+    assert by_id[ids[1]]['occurrences'] == 2
+    assert by_id[ids[2]]['resolved_at'] is not None
+    assert not by_id[ids[3]].get('resolved_at')
+
+@pytest.fixture
+def flask_store(tmp_path):
+    flask = pytest.importorskip("flask")
+    flask_sqlalchemy = pytest.importorskip("flask_sqlalchemy")
+    from eld_integration import Base, FlaskELDDataStore
+    app = flask.Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'flask.db'}"
+    db = flask_sqlalchemy.SQLAlchemy(app)
+    with app.app_context():
+        store = FlaskELDDataStore(db, chunk_size=2)
+        Base.metadata.create_all(db.engine)
+        yield store
+        store.remove_session()
+
+@pytest.mark.parametrize("dialect_upsert", [True, False])
+def test_flask_keyed_upserts_in_chunks(flask_store, monkeypatch, dialect_upsert):
+    import eld_integration
+    if not dialect_upsert:
+        # Dialects without ON CONFLICT take the select/insert/update path
+        monkeypatch.setattr(eld_integration, "_UPSERT_INSERTS", {})
+    states = {f"d{i}": state(i) for i in range(5)}
+    assert flask_store.store_hos_states(states)
+    assert flask_store.store_hos_states({"d1": state(10), "d7": state(7)})
+    assert flask_store.get_hos_states() == {**states, "d1": state(10), "d7": state(7)}
+    assert flask_store.store_rollups("r", {"a": {"n": 1}, "b": {"n": 2}, "c": {"n": 3}})
+    assert flask_store.store_rollups("r", {"c": {"n": 4}, "d": {"n": 5}})
+    assert flask_store.get_rollups("r") == {"a": {"n": 1}, "b": {"n": 2}, "c": {"n": 4}, "d": {"n": 5}}